@@ -0,0 +1,189 @@
+"""
+Admission control for the booking path.
+
+Without it, an overloaded worker lets every booking request queue in
+`pool.acquire()`: latency grows without bound, clients time out and retry,
+and the retries add to the overload. The admission controller bounds that
+work per worker:
+
+- at most ADMISSION_MAX_IN_FLIGHT booking requests run at once, and at most
+  ADMISSION_MAX_IN_FLIGHT_PER_EVENT for one event (they serialize on its
+  inventory row anyway, so more would only hold connections waiting on a lock);
+  a coalesced batch (`app.coalescer`) is admitted once, as one request;
+- requests over a cap wait in a FIFO queue of at most ADMISSION_MAX_QUEUE
+  entries, each with a deadline ADMISSION_QUEUE_TIMEOUT_SECONDS away, and are
+  evicted when it passes instead of being admitted after their client gave up;
+- while the oldest acquire of the write pool has been waiting longer than
+  ADMISSION_MAX_POOL_WAIT_SECONDS, new requests are shed immediately.
+
+A shed request fails with Exception('EVENT_BUSY') (the event's share of the
+queue timed out: 429) or Exception('OVERLOADED') (the worker is saturated: 503);
+the routes add `Retry-After: ADMISSION_RETRY_AFTER_SECONDS`.
+
+Keeping ADMISSION_MAX_IN_FLIGHT below DB_WRITE_POOL_MAX_SIZE leaves write
+connections for cancellations, confirmations and streams; reads use the read
+pool. Limits are read from `settings` on every request, so they can be changed
+at runtime (`PUT /admin/admission`); waiters are admitted at once when a limit
+is raised.
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from .config import settings
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_REJECTIONS
+
+
+class _Slots:
+    """
+    Counting semaphore with a FIFO of waiting futures; the limit is passed on each call.
+    """
+
+    def __init__(self):
+        self.used = 0
+        self.waiters = deque()
+
+    def grant(self, limit: int):
+        """
+        Hand free slots to the oldest waiters still waiting.
+        """
+        while self.waiters and self.used < limit:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                self.used += 1
+
+    def release(self, limit: int):
+        self.used -= 1
+        self.grant(limit)
+
+    async def wait(self, limit: int, deadline: float) -> bool:
+        """
+        Wait for a slot until `deadline` (event loop time).
+
+        Returns:
+            bool: True once a slot is taken, False if the deadline passed first.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self.waiters.append(waiter)
+        timer = loop.call_at(deadline, lambda: waiter.done() or waiter.set_result(False))
+        granted = False
+        try:
+            granted = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                # granted just before the client went away: pass the slot on
+                self.release(limit)
+            raise
+        finally:
+            timer.cancel()
+            if not granted and waiter in self.waiters:
+                self.waiters.remove(waiter)
+        return granted
+
+
+class AdmissionController:
+    """
+    Per-worker caps and bounded wait queue for booking requests.
+    """
+
+    def __init__(self):
+        self._global = _Slots()
+        self._events = {}
+        self.queued = 0
+        ADMISSION_IN_FLIGHT.collect_from(lambda: {(): self._global.used})
+        ADMISSION_QUEUED.collect_from(lambda: {(): self.queued})
+
+    def _reject(self, reason: str, code: str):
+        ADMISSION_REJECTIONS.inc(reason)
+        raise Exception(code)
+
+    async def _take(self, slots: _Slots, limit: int, deadline: float, reason: str, code: str):
+        if slots.used < limit and not slots.waiters:
+            slots.used += 1
+            return
+        if self.queued >= settings.ADMISSION_MAX_QUEUE:
+            self._reject('queue_full', 'OVERLOADED')
+        self.queued += 1
+        try:
+            granted = await slots.wait(limit, deadline)
+        finally:
+            self.queued -= 1
+        if not granted:
+            self._reject(reason, code)
+
+    def _release_event(self, event_id: str, slots: _Slots):
+        slots.release(settings.ADMISSION_MAX_IN_FLIGHT_PER_EVENT)
+        if not slots.used and not slots.waiters:
+            del self._events[event_id]
+
+    @asynccontextmanager
+    async def admit(self, pool, event_id: Optional[str] = None):
+        """
+        Hold an admission slot (and one of `event_id`'s, if given) for the body of the block.
+
+        Args:
+            pool: the write pool, whose waiting acquires signal saturation.
+            event_id (Optional[str]): event the request books, for the per-event cap.
+
+        Raises:
+            Exception('EVENT_BUSY'): if the deadline passed waiting for an event slot.
+            Exception('OVERLOADED'): if the pool is saturated, the queue is full or
+                the deadline passed waiting for a slot.
+        """
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+        if pool.oldest_wait() > settings.ADMISSION_MAX_POOL_WAIT_SECONDS:
+            self._reject('pool_wait', 'OVERLOADED')
+        deadline = asyncio.get_running_loop().time() + settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        event_slots = None
+        if event_id is not None:
+            event_slots = self._events.setdefault(event_id, _Slots())
+            try:
+                await self._take(event_slots, settings.ADMISSION_MAX_IN_FLIGHT_PER_EVENT, deadline,
+                                 'event_deadline', 'EVENT_BUSY')
+            except BaseException:
+                if not event_slots.used and not event_slots.waiters:
+                    self._events.pop(event_id, None)
+                raise
+        try:
+            await self._take(self._global, settings.ADMISSION_MAX_IN_FLIGHT, deadline, 'deadline', 'OVERLOADED')
+            try:
+                yield
+            finally:
+                self._global.release(settings.ADMISSION_MAX_IN_FLIGHT)
+        finally:
+            if event_slots is not None:
+                self._release_event(event_id, event_slots)
+
+    def wake(self):
+        """
+        Admit waiters up to the current limits (call after raising a limit).
+        """
+        self._global.grant(settings.ADMISSION_MAX_IN_FLIGHT)
+        for slots in self._events.values():
+            slots.grant(settings.ADMISSION_MAX_IN_FLIGHT_PER_EVENT)
+
+    def stats(self) -> dict:
+        """
+        Current limits and load of this worker.
+        """
+        return {
+            'enabled': settings.ADMISSION_ENABLED,
+            'max_in_flight': settings.ADMISSION_MAX_IN_FLIGHT,
+            'max_in_flight_per_event': settings.ADMISSION_MAX_IN_FLIGHT_PER_EVENT,
+            'max_queue': settings.ADMISSION_MAX_QUEUE,
+            'queue_timeout_seconds': settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            'max_pool_wait_seconds': settings.ADMISSION_MAX_POOL_WAIT_SECONDS,
+            'in_flight': self._global.used,
+            'queued': self.queued,
+            'events': len(self._events),
+        }
+
+
+# Global admission controller for this worker
+admission = AdmissionController()
@@ -0,0 +1,232 @@
+"""
+Writers for the booking_events audit log of every booking path (bookings, batch
+and seat bookings, cancellations, holds and their confirmation, release and
+expiry, waitlist promotions).
+
+AUDIT_LOG_MODE selects how their entries reach `booking_events`:
+
+- `sync` (default): an INSERT inside the booking transaction.
+- `async`: after the booking commits, the entry is queued in memory (at most
+  AUDIT_QUEUE_MAX_SIZE entries) and a background task COPYs the queue into
+  `booking_events` every AUDIT_FLUSH_INTERVAL_MS, or as soon as
+  AUDIT_FLUSH_BATCH_SIZE entries are waiting. The queue is drained on shutdown,
+  but entries still queued when a worker crashes are lost. When the queue is
+  full the caller writes the entry itself.
+- `outbox`: the event type is appended to `bookings.audit_pending` in the
+  booking transaction (by the statement that inserts or cancels the booking on
+  the `book_tickets`/`cancel_booking` hot path, so without an extra round trip),
+  durable with the booking. `relay_outbox` moves pending entries to
+  `booking_events` in one statement per batch, exactly once, from any number of
+  workers. It rebuilds their payload from the booking row: quantity, plus user
+  and event for BOOK and HOLD entries.
+
+In both deferred modes `booking_events.created_at` is the time the entry is
+written, at most one flush interval after the booking.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+
+import asyncpg
+from asyncpg import Pool
+from .config import settings
+from .metrics import AUDIT_ENTRIES, AUDIT_FLUSH_SECONDS, AUDIT_QUEUE_DEPTH
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY_SECONDS = 1.0
+
+
+class AuditWriter:
+    """
+    Bounded in-process queue of booking_events entries, COPYed in batches over a
+    dedicated connection (`async` mode).
+
+    Attributes:
+        max_size (int): entries the queue holds before `offer` refuses more.
+        batch_size (int): entries per COPY; a full batch triggers an early flush.
+        interval (float): seconds between two flushes.
+    """
+
+    def __init__(self, dsn: str, max_size: int, batch_size: int, interval_ms: float):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self._queue = deque()
+        self._wakeup = asyncio.Event()
+        self._conn = None
+        self._task = None
+        self._flushing = asyncio.Lock()
+        AUDIT_QUEUE_DEPTH.collect_from(lambda: {(): len(self._queue)})
+
+    def offer(self, booking_id: str, event_type: str, payload: dict) -> bool:
+        """
+        Queue an entry of a committed booking.
+
+        Returns:
+            bool: False if the queue is full or the writer is not running (the caller
+                must write the entry itself).
+        """
+        if self._task is None:
+            return False
+        if len(self._queue) >= self.max_size:
+            AUDIT_ENTRIES.inc('overflow')
+            return False
+        self._queue.append((uuid.UUID(booking_id), event_type, payload))
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def _connection(self):
+        if self._conn is None or self._conn.is_closed():
+            self._conn = await asyncpg.connect(dsn=self.dsn)
+        return self._conn
+
+    async def flush(self):
+        """
+        COPY every queued entry into booking_events, `batch_size` at a time.
+
+        Entries leave the queue only once their COPY succeeded.
+        """
+        async with self._flushing:
+            while self._queue:
+                batch = [self._queue[i] for i in range(min(self.batch_size, len(self._queue)))]
+                records = [(booking_id, event_type, json.dumps(payload)) for booking_id, event_type, payload in batch]
+                started = time.perf_counter()
+                written = len(records)
+                try:
+                    conn = await self._connection()
+                    await conn.copy_records_to_table('booking_events', records=records,
+                                                     columns=['booking_id', 'event_type', 'event_payload'])
+                except (OSError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError):
+                    if self._conn is not None:
+                        self._conn.terminate()
+                        self._conn = None
+                    raise
+                except asyncpg.PostgresError:
+                    # e.g. a booking deleted before its entry was written: keep the rest of the batch
+                    written = await self._write_each(conn, records)
+                AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - started, 'async')
+                AUDIT_ENTRIES.inc('written', amount=written)
+                for _ in batch:
+                    self._queue.popleft()
+
+    async def _write_each(self, conn, records: list) -> int:
+        written = 0
+        for record in records:
+            try:
+                await conn.execute("""
+                    INSERT INTO booking_events (booking_id, event_type, event_payload)
+                    VALUES ($1, $2, $3::jsonb)
+                """, *record)
+                written += 1
+            except asyncpg.PostgresError as e:
+                AUDIT_ENTRIES.inc('failed')
+                logger.warning("dropping audit entry %s %s: %s", record[1], record[0], e)
+        return written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("audit log flush failed, retrying")
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+    def start(self):
+        """
+        Start the flush loop (no-op if it is already running).
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush loop, write the entries still queued and close the connection.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("audit log drain failed, %d entries lost", len(self._queue))
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+async def relay_outbox(pool: Pool, batch_size: int) -> int:
+    """
+    Move up to `batch_size` bookings' pending audit entries to booking_events (`outbox` mode).
+
+    Rows are claimed with SKIP LOCKED and cleared in the same statement that
+    inserts their entries, so concurrent relays never write an entry twice.
+
+    Returns:
+        int: number of booking_events written.
+    """
+    started = time.perf_counter()
+    async with pool.acquire() as conn:
+        written = await conn.fetchval("""
+            WITH picked AS (
+                SELECT id, audit_pending
+                FROM bookings
+                WHERE audit_pending IS NOT NULL
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            ), cleared AS (
+                UPDATE bookings b
+                SET audit_pending = NULL
+                FROM picked
+                WHERE b.id = picked.id
+                RETURNING b.id, b.user_id, b.event_id, b.quantity, picked.audit_pending
+            ), inserted AS (
+                INSERT INTO booking_events (booking_id, event_type, event_payload)
+                SELECT c.id, t.event_type,
+                       CASE WHEN t.event_type IN ('BOOK', 'HOLD')
+                            THEN jsonb_build_object('quantity', c.quantity, 'user_id', c.user_id,
+                                                    'event_id', c.event_id)
+                            ELSE jsonb_build_object('quantity', c.quantity) END
+                FROM cleared c, unnest(c.audit_pending) WITH ORDINALITY AS t(event_type, n)
+                ORDER BY c.id, t.n
+                RETURNING 1
+            )
+            SELECT count(*) FROM inserted
+        """, batch_size)
+    if written:
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - started, 'outbox')
+        AUDIT_ENTRIES.inc('written', amount=written)
+    return written
+
+
+def outbox_relay(pool: Pool) -> PeriodicTask:
+    """
+    Build the periodic task that relays pending outbox entries until none are left.
+    """
+    async def run():
+        while await relay_outbox(pool, settings.AUDIT_FLUSH_BATCH_SIZE) >= settings.AUDIT_FLUSH_BATCH_SIZE:
+            pass
+    return PeriodicTask('audit-outbox-relay', settings.AUDIT_FLUSH_INTERVAL_MS / 1000.0, run)
+
+
+# Global async audit writer for this worker (started only in `async` mode)
+audit_writer = AuditWriter(settings.DATABASE_URL, settings.AUDIT_QUEUE_MAX_SIZE, settings.AUDIT_FLUSH_BATCH_SIZE,
+                           settings.AUDIT_FLUSH_INTERVAL_MS)
@@ -0,0 +1,159 @@
+"""
+In-process read-through cache for event detail and event list pages.
+
+Entries are bounded in number and expire after a TTL. They are also dropped as
+soon as Postgres reports a change on the `event_changed` channel (see
+`app.listener`), so every worker stops serving stale data within milliseconds.
+While the LISTEN connection is down the cache is bypassed entirely.
+
+With a read replica the NOTIFY can arrive before the replica has the change, so
+for EVENT_CACHE_PRIMARY_REFILL_SECONDS after an invalidation the entries it
+dropped are refilled from the primary (`refill_pool`). A replica lagging by more
+than that can still refill an old version, served for at most
+EVENT_CACHE_TTL_SECONDS.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .config import settings
+from .db import init_pool
+from .listener import event_listener
+from .metrics import CACHE_HITS, CACHE_MISSES
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire `ttl` seconds after being set.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class EventCache:
+    """
+    Cache of `crud.get_event` results (by event id) and `crud.list_events` pages.
+
+    A generation counter is bumped on every invalidation; values read from the
+    database before an invalidation are not stored afterwards.
+    """
+
+    def __init__(self, enabled: bool, maxsize: int, ttl: float):
+        self.enabled = enabled
+        self.generation = 0
+        self.events = TTLCache(maxsize, ttl)
+        self.pages = TTLCache(maxsize, ttl)
+        # until when misses must read the primary: per event, for every event, for pages
+        self._primary_events = OrderedDict()
+        self._primary_all_until = 0.0
+        self._primary_pages_until = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and event_listener.connected
+
+    def get_event(self, event_id: str):
+        return self.events.get(event_id) if self.active else None
+
+    def set_event(self, event_id: str, event: dict, generation: int):
+        if self.active and generation == self.generation:
+            self.events.set(event_id, event)
+
+    def get_page(self, key: tuple):
+        return self.pages.get(key) if self.active else None
+
+    def set_page(self, key: tuple, rows: list, generation: int):
+        if self.active and generation == self.generation:
+            self.pages.set(key, rows)
+
+    def invalidate(self, event_id: Optional[str] = None):
+        """
+        Drop one event (and every list page), or everything when event_id is None.
+        """
+        self.generation += 1
+        until = time.monotonic() + settings.EVENT_CACHE_PRIMARY_REFILL_SECONDS
+        if event_id is None:
+            self.events.clear()
+            self._primary_events.clear()
+            self._primary_all_until = until
+        else:
+            self.events.pop(event_id)
+            self._primary_events[event_id] = until
+            self._primary_events.move_to_end(event_id)
+            while len(self._primary_events) > self.events.maxsize:
+                self._primary_events.popitem(last=False)
+        self.pages.clear()
+        self._primary_pages_until = until
+
+    def _recently_changed(self, event_ids: Optional[list]) -> bool:
+        now = time.monotonic()
+        if event_ids is None:
+            return now < self._primary_pages_until
+        if now < self._primary_all_until:
+            return True
+        return any(now < self._primary_events.get(event_id, 0.0) for event_id in event_ids)
+
+    async def refill_pool(self, read_pool, event_ids: Optional[list] = None):
+        """
+        Pool to read cache misses of `event_ids` (list pages when None) from.
+
+        Returns:
+            The primary pool if a replica is configured and one of them changed in
+            the last EVENT_CACHE_PRIMARY_REFILL_SECONDS, else `read_pool`.
+        """
+        if settings.DATABASE_REPLICA_URL and self._recently_changed(event_ids):
+            return await init_pool()
+        return read_pool
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'active': self.active,
+            'event_hits': self.events.hits,
+            'event_misses': self.events.misses,
+            'event_entries': len(self.events),
+            'page_hits': self.pages.hits,
+            'page_misses': self.pages.misses,
+            'page_entries': len(self.pages),
+        }
+
+
+# Global cache instance shared by the event routes
+event_cache = EventCache(settings.EVENT_CACHE_ENABLED, settings.EVENT_CACHE_MAX_ENTRIES,
+                         settings.EVENT_CACHE_TTL_SECONDS)
+if event_cache.enabled:
+    event_listener.subscribe(event_cache.invalidate)
+CACHE_HITS.collect_from(lambda: {('event',): event_cache.events.hits, ('event_page',): event_cache.pages.hits})
+CACHE_MISSES.collect_from(lambda: {('event',): event_cache.events.misses, ('event_page',): event_cache.pages.misses})
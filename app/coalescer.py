@@ -0,0 +1,123 @@
+"""
+Group-commit booking coalescer for Evently.
+
+During on-sales many concurrent bookings target the same `event_inventory` row and
+queue up on its row lock. The coalescer collects booking requests per event for a
+short window (or until a batch is full) and settles them in a single transaction
+via `crud.book_tickets_batch`. Every caller still receives its own
+CONFIRMED result or a `NOT_ENOUGH_SEATS` error, exactly like `crud.book_tickets`.
+
+Admission control (`app.admission`) admits each batch once, under the event's
+per-event cap, rather than each request: a batch holds a single connection, so
+capping its requests would only cap the batch size. A shed batch fails every
+request in it with the shed error.
+"""
+
+import asyncio
+from asyncpg import Pool
+from .admission import admission
+from .config import settings
+from .crud import book_tickets, book_tickets_batch
+
+
+class BookingCoalescer:
+    """
+    In-process batcher for bookings, keyed by event_id.
+
+    Attributes:
+        max_batch (int): number of requests that triggers an immediate flush.
+        window (float): seconds the first request of a batch waits for others.
+    """
+
+    def __init__(self, max_batch: int, window_ms: float):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._pending = {}
+        self._timers = {}
+        self._tasks = set()
+
+    async def submit(self, pool: Pool, user_id: str, event_id: str, quantity: int):
+        """
+        Queue a booking request and wait for the batch it joins to be settled.
+
+        Returns:
+            dict: { "id": <booking_id>, "status": "CONFIRMED" }
+
+        Raises:
+            Exception('NOT_ENOUGH_SEATS'): if the request did not fit in the inventory.
+            Exception('EVENT_BUSY') / Exception('OVERLOADED'): if admission control
+                shed the batch.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(event_id, [])
+        batch.append((user_id, quantity, future))
+        if len(batch) >= self.max_batch:
+            self._flush(pool, event_id)
+        elif len(batch) == 1:
+            self._timers[event_id] = loop.call_later(self.window, self._flush, pool, event_id)
+        return await future
+
+    def _flush(self, pool: Pool, event_id: str):
+        timer = self._timers.pop(event_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(event_id, None)
+        if not batch:
+            return
+        task = asyncio.create_task(self._settle(pool, event_id, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _settle(self, pool: Pool, event_id: str, batch: list):
+        try:
+            async with admission.admit(pool, event_id):
+                try:
+                    results = await book_tickets_batch(pool, [
+                        {'user_id': user_id, 'event_id': event_id, 'quantity': quantity}
+                        for user_id, quantity, _ in batch
+                    ])
+                except Exception:
+                    # An unexpected error aborts the whole batch transaction; settle each
+                    # request on the regular path so it cannot fail its neighbours.
+                    await asyncio.gather(*(self._settle_one(pool, event_id, item) for item in batch))
+                    return
+        except Exception as e:
+            # shed by admission control (the block above never raises)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(Exception(str(e)))
+            return
+
+        for item, result in zip(batch, results):
+            future = item[2]
+            if future.done():
+                continue
+            if result['status'] == 'FAILED':
+                future.set_exception(Exception(result['error']))
+            else:
+                future.set_result(result)
+
+    async def _settle_one(self, pool: Pool, event_id: str, item: tuple):
+        user_id, quantity, future = item
+        try:
+            result = await book_tickets(pool, user_id, event_id, quantity)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def drain(self, pool: Pool):
+        """
+        Settle every pending batch and wait for in-flight batches to finish.
+        """
+        for event_id in list(self._pending):
+            self._flush(pool, event_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# Global coalescer instance shared by the booking routes
+coalescer = BookingCoalescer(settings.BOOKING_COALESCER_MAX_BATCH, settings.BOOKING_COALESCER_WINDOW_MS)
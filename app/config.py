@@ -5,6 +5,8 @@ This file defines application settings using Pydantic's `BaseSettings`.
 Environment variables are automatically loaded from `.env`.
 """
 
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -13,11 +15,133 @@ class Settings(BaseSettings):
     Application settings loaded from environment variables.
 
     Attributes:
-        DATABASE_URL (str): Connection string for the PostgreSQL database.
-        INIT_DB (bool): Flag to determine whether to initialize DB schema on startup.
+        DATABASE_URL (str): Connection string for the PostgreSQL database (primary).
+        DATABASE_REPLICA_URL (Optional[str]): Connection string of a read replica used by the
+            read pool. Defaults to the primary.
+        INIT_DB (bool): Apply pending migrations on startup (see `app.migrate`).
+        BOOKING_COALESCER_ENABLED (bool): Group concurrent bookings for the same event
+            into one transaction (see `app.coalescer`).
+        BOOKING_COALESCER_MAX_BATCH (int): Maximum number of bookings settled per batch.
+        BOOKING_COALESCER_WINDOW_MS (float): How long the first booking of a batch waits
+            for others to join before the batch is settled.
+        EVENT_CACHE_ENABLED (bool): Serve event detail/list reads from the in-process cache.
+        EVENT_CACHE_MAX_ENTRIES (int): Maximum cached events (and, separately, list pages).
+        EVENT_CACHE_TTL_SECONDS (float): Upper bound on how long an entry is served.
+        EVENT_CACHE_PRIMARY_REFILL_SECONDS (float): With a replica, how long after an event
+            changes its cache misses (and list page misses) are read from the primary; set
+            it above the usual replication lag.
+        IDEMPOTENCY_TTL_SECONDS (int): How long a stored idempotent response is replayed.
+        IDEMPOTENCY_CACHE_SIZE (int): Entries in the per-worker LRU of idempotent responses.
+        IDEMPOTENCY_GC_INTERVAL_SECONDS (float): Interval between purges of expired keys.
+        HOLD_TTL_SECONDS (float): How long a seat hold stays valid before it expires.
+        HOLD_SWEEP_INTERVAL_SECONDS (float): Interval between runs of the hold expiry sweeper.
+        HOLD_SWEEP_BATCH_SIZE (int): Expired holds released per sweeper transaction.
+        WAITLIST_PROMOTION_ENABLED (bool): Promote waitlisted users when seats are freed.
+        WAITLIST_PROMOTION_MODE (str): 'hold' gives promoted users a hold (HOLD_TTL_SECONDS),
+            'booking' gives them a CONFIRMED booking.
+        WAITLIST_PROMOTION_BATCH_SIZE (int): Waitlist entries examined per promotion transaction.
+        WAITLIST_SCAN_INTERVAL_SECONDS (float): Interval between full scans for events whose
+            waitlist can be promoted (catches notifications missed while disconnected).
+        SSE_ENABLED (bool): Serve live seat availability on `GET /events/stream`.
+        SSE_COALESCE_INTERVAL_SECONDS (float): Minimum interval between two updates of one event.
+        SSE_MAX_STREAMS (int): Open streams accepted per worker (more are refused with 503).
+        SSE_MAX_EVENTS_PER_STREAM (int): Events one stream may watch.
+        SSE_KEEPALIVE_SECONDS (float): Idle time after which a keep-alive comment is sent.
+        ROLLUP_ENABLED (bool): Fold booking_events into the minute/hour analytics rollups.
+        ROLLUP_INTERVAL_SECONDS (float): Interval between runs of the rollup job.
+        ROLLUP_BATCH_SIZE (int): booking_events folded per rollup transaction.
+        ROLLUP_LAG_SECONDS (float): Age a booking event must reach before it is folded; must
+            exceed the longest transaction writing booking_events.
+        ROLLUP_MINUTE_RETENTION_DAYS (int): Days minute buckets are kept (hour buckets are kept).
+        BOOKING_EVENTS_PARTITIONS_AHEAD (int): Monthly booking_events partitions created ahead.
+        BOOKING_EVENTS_RETENTION_MONTHS (Optional[int]): Full months of booking_events kept in the
+            database; older partitions are archived and dropped. None keeps everything.
+        BOOKING_EVENTS_ARCHIVE_DIR (str): Directory receiving archived partitions (.ndjson.gz).
+        BOOKING_EVENTS_MAINTENANCE_INTERVAL_SECONDS (float): Interval between partition maintenance runs.
+        AUDIT_LOG_MODE (str): How booking/cancellation entries reach booking_events: 'sync'
+            (in the booking transaction), 'async' (in-memory queue flushed with COPY) or
+            'outbox' (pending flag on the booking, relayed in batches); see `app.audit`.
+        AUDIT_QUEUE_MAX_SIZE (int): Entries queued in memory in 'async' mode.
+        AUDIT_FLUSH_INTERVAL_MS (float): Interval between audit flushes / outbox relays.
+        AUDIT_FLUSH_BATCH_SIZE (int): Entries written per COPY / relay statement.
+        ADMISSION_ENABLED (bool): Cap and queue booking requests, shedding load when
+            saturated (see `app.admission`).
+        ADMISSION_MAX_IN_FLIGHT (int): Booking requests running at once per worker.
+        ADMISSION_MAX_IN_FLIGHT_PER_EVENT (int): Booking requests for one event running at once.
+        ADMISSION_MAX_QUEUE (int): Booking requests waiting for admission; more get 503.
+        ADMISSION_QUEUE_TIMEOUT_SECONDS (float): Longest wait for admission before 429/503.
+        ADMISSION_MAX_POOL_WAIT_SECONDS (float): Write pool wait beyond which new booking
+            requests are shed immediately.
+        ADMISSION_RETRY_AFTER_SECONDS (int): `Retry-After` sent with shed requests.
+        METRICS_ENABLED (bool): Expose Prometheus metrics on `/metrics` and time every request.
+        FAST_JSON_ENABLED (bool): Encode list endpoint rows directly instead of validating them
+            against their response model (see `app.responses`).
+        DB_WRITE_POOL_MIN_SIZE / DB_READ_POOL_MIN_SIZE (int): Connections opened at startup.
+        DB_WRITE_POOL_MAX_SIZE / DB_READ_POOL_MAX_SIZE (int): Maximum connections per worker.
+        DB_WRITE_POOL_STATEMENT_CACHE_SIZE / DB_READ_POOL_STATEMENT_CACHE_SIZE (int): Prepared
+            statements cached per connection (0 disables, e.g. behind PgBouncer in transaction mode).
+        DB_WRITE_POOL_MAX_INACTIVE_LIFETIME / DB_READ_POOL_MAX_INACTIVE_LIFETIME (float): Seconds
+            an idle connection is kept open (0 keeps it forever).
+        DB_WRITE_POOL_ACQUIRE_TIMEOUT / DB_READ_POOL_ACQUIRE_TIMEOUT (Optional[float]): Seconds to
+            wait for a free connection before failing (None waits forever).
     """
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: Optional[str] = None
     INIT_DB: bool = False
+    BOOKING_COALESCER_ENABLED: bool = False
+    BOOKING_COALESCER_MAX_BATCH: int = 100
+    BOOKING_COALESCER_WINDOW_MS: float = 5.0
+    EVENT_CACHE_ENABLED: bool = True
+    EVENT_CACHE_MAX_ENTRIES: int = 10000
+    EVENT_CACHE_TTL_SECONDS: float = 5.0
+    EVENT_CACHE_PRIMARY_REFILL_SECONDS: float = 1.0
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_GC_INTERVAL_SECONDS: float = 300.0
+    HOLD_TTL_SECONDS: float = 600.0
+    HOLD_SWEEP_INTERVAL_SECONDS: float = 5.0
+    HOLD_SWEEP_BATCH_SIZE: int = 5000
+    WAITLIST_PROMOTION_ENABLED: bool = True
+    WAITLIST_PROMOTION_MODE: Literal['hold', 'booking'] = 'hold'
+    WAITLIST_PROMOTION_BATCH_SIZE: int = 100
+    WAITLIST_SCAN_INTERVAL_SECONDS: float = 30.0
+    SSE_ENABLED: bool = True
+    SSE_COALESCE_INTERVAL_SECONDS: float = 1.0
+    SSE_MAX_STREAMS: int = 10000
+    SSE_MAX_EVENTS_PER_STREAM: int = 50
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    ROLLUP_ENABLED: bool = True
+    ROLLUP_INTERVAL_SECONDS: float = 10.0
+    ROLLUP_BATCH_SIZE: int = 10000
+    ROLLUP_LAG_SECONDS: float = 5.0
+    ROLLUP_MINUTE_RETENTION_DAYS: int = 30
+    BOOKING_EVENTS_PARTITIONS_AHEAD: int = 3
+    BOOKING_EVENTS_RETENTION_MONTHS: Optional[int] = None
+    BOOKING_EVENTS_ARCHIVE_DIR: str = 'archive/booking_events'
+    BOOKING_EVENTS_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+    AUDIT_LOG_MODE: Literal['sync', 'async', 'outbox'] = 'sync'
+    AUDIT_QUEUE_MAX_SIZE: int = 100000
+    AUDIT_FLUSH_INTERVAL_MS: float = 200.0
+    AUDIT_FLUSH_BATCH_SIZE: int = 1000
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_MAX_IN_FLIGHT: int = 8
+    ADMISSION_MAX_IN_FLIGHT_PER_EVENT: int = 4
+    ADMISSION_MAX_QUEUE: int = 500
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_MAX_POOL_WAIT_SECONDS: float = 0.5
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    METRICS_ENABLED: bool = True
+    FAST_JSON_ENABLED: bool = True
+    DB_WRITE_POOL_MIN_SIZE: int = 2
+    DB_WRITE_POOL_MAX_SIZE: int = 10
+    DB_WRITE_POOL_STATEMENT_CACHE_SIZE: int = 100
+    DB_WRITE_POOL_MAX_INACTIVE_LIFETIME: float = 300.0
+    DB_WRITE_POOL_ACQUIRE_TIMEOUT: Optional[float] = None
+    DB_READ_POOL_MIN_SIZE: int = 1
+    DB_READ_POOL_MAX_SIZE: int = 10
+    DB_READ_POOL_STATEMENT_CACHE_SIZE: int = 100
+    DB_READ_POOL_MAX_INACTIVE_LIFETIME: float = 300.0
+    DB_READ_POOL_ACQUIRE_TIMEOUT: Optional[float] = None
 
     class Config:
         """Configuration to specify environment file for local development."""
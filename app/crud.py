@@ -1,27 +1,80 @@
+import asyncio
 import json
+import random
+import time
 import uuid
+from datetime import datetime
 from typing import Optional
 from asyncpg import Pool
-from asyncpg.exceptions import UniqueViolationError
+from asyncpg.exceptions import ForeignKeyViolationError, UniqueViolationError
+from .audit import audit_writer
+from .config import settings
+from .metrics import BOOKINGS, CONTENTION, INVENTORY_UPDATE_SECONDS, timed
+from .statements import register
+from .idempotency import (idempotency_cache, claim_idempotency_key, store_idempotent_response,
+                          claim_idempotency_keys, store_idempotent_responses, release_idempotency_keys)
+
+# Rows map 1:1 to response dicts: pooled connections decode UUIDs to str
+# (see statements.init_connection), so no per-field conversion is needed.
+
+def _record(row) -> Optional[dict]:
+    return dict(row) if row is not None else None
+
+def _records(rows) -> list:
+    return list(map(dict, rows))
 
 # ------------------- EVENTS -------------------
 
-async def list_events(pool: Pool, limit: int = 25, offset: int = 0):
+_EVENT_SEATS_AVAILABLE = """
+    ei.seats_available + CASE WHEN ei.shard_count > 0
+        THEN (SELECT COALESCE(sum(sh.seats_available), 0) FROM event_inventory_shards sh
+              WHERE sh.event_id = e.id)
+        ELSE 0 END"""
+
+# seats_available is required by EventOut, and the fast JSON path does not
+# validate: an event without an inventory row reads 0, never NULL
+_EVENT_COLUMNS = f"""
+    e.id, e.name, e.venue, e.description, e.start_time, e.end_time, e.capacity,
+    COALESCE({_EVENT_SEATS_AVAILABLE}, 0) AS seats_available
+"""
+
+# keyset page: (start_time, id) > cursor, served by idx_events_start_time_id
+LIST_EVENTS_AFTER = register('list_events_after', f"""
+    SELECT {_EVENT_COLUMNS}
+    FROM events e
+    LEFT JOIN event_inventory ei ON ei.event_id = e.id
+    WHERE (e.start_time, e.id) > ($2, $3::uuid)
+    ORDER BY e.start_time ASC, e.id ASC
+    LIMIT $1
+""")
+
+LIST_EVENTS = register('list_events', f"""
+    SELECT {_EVENT_COLUMNS}
+    FROM events e
+    LEFT JOIN event_inventory ei ON ei.event_id = e.id
+    ORDER BY e.start_time ASC, e.id ASC
+    LIMIT $1 OFFSET $2
+""")
+
+GET_EVENT = register('get_event', f"""
+    SELECT {_EVENT_COLUMNS}
+    FROM events e
+    LEFT JOIN event_inventory ei ON ei.event_id = e.id
+    WHERE e.id = $1
+""")
+
+@timed
+async def list_events(pool: Pool, limit: int = 25, offset: int = 0, after: Optional[tuple] = None):
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT e.*, ei.seats_available
-            FROM events e
-            LEFT JOIN event_inventory ei ON ei.event_id = e.id
-            ORDER BY e.start_time ASC
-            LIMIT $1 OFFSET $2
-        """, limit, offset)
-        events = []
-        for r in rows:
-            event = dict(r)
-            event['id'] = str(event['id'])
-            events.append(event)
-        return events
+        if after:
+            stmt = await conn.prepared(LIST_EVENTS_AFTER)
+            rows = await stmt.fetch(limit, after[0], after[1])
+        else:
+            stmt = await conn.prepared(LIST_EVENTS)
+            rows = await stmt.fetch(limit, offset)
+        return _records(rows)
 
+@timed
 async def create_event(pool: Pool, event_data: dict):
     async with pool.acquire() as conn:
         async with conn.transaction():
@@ -38,26 +91,54 @@ async def create_event(pool: Pool, event_data: dict):
             """, row['id'], row['capacity'])
 
             result = dict(row)
-            result['id'] = str(result['id'])
             result['seats_available'] = row['capacity']
             return result
 
+@timed
 async def get_event(pool: Pool, event_id: str):
     async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT e.*, ei.seats_available
-            FROM events e
-            LEFT JOIN event_inventory ei ON ei.event_id = e.id
-            WHERE e.id = $1
-        """, event_id)
-        if row:
-            event = dict(row)
-            event['id'] = str(event['id'])
-            if 'seats_available' not in event:
-                event['seats_available'] = 0
-            return event
-        return None
+        stmt = await conn.prepared(GET_EVENT)
+        return _record(await stmt.fetchrow(event_id))
+
+GET_EVENTS = register('get_events', f"""
+    SELECT {_EVENT_COLUMNS}
+    FROM events e
+    LEFT JOIN event_inventory ei ON ei.event_id = e.id
+    WHERE e.id = ANY($1::uuid[])
+""")
+
+@timed
+async def get_events(pool: Pool, event_ids: list) -> dict:
+    """
+    Several events in one query: {event_id: event} (missing events are left out).
+    """
+    async with pool.acquire() as conn:
+        stmt = await conn.prepared(GET_EVENTS)
+        return {event['id']: event for event in _records(await stmt.fetch(event_ids))}
 
+# free seats of an `event_inventory ei` row, shards included
+_INVENTORY_SEATS_AVAILABLE = """
+    ei.seats_available + CASE WHEN ei.shard_count > 0
+        THEN (SELECT COALESCE(sum(sh.seats_available), 0) FROM event_inventory_shards sh
+              WHERE sh.event_id = ei.event_id)
+        ELSE 0 END"""
+
+SEATS_AVAILABLE = register('seats_available', f"""
+    SELECT ei.event_id,{_INVENTORY_SEATS_AVAILABLE} AS seats_available
+    FROM event_inventory ei
+    WHERE ei.event_id = ANY($1::uuid[])
+""")
+
+@timed
+async def get_seats_available(pool: Pool, event_ids: list) -> dict:
+    """
+    Current free seats of several events: {event_id: seats_available} (missing events are left out).
+    """
+    async with pool.acquire() as conn:
+        stmt = await conn.prepared(SEATS_AVAILABLE)
+        return {r['event_id']: r['seats_available'] for r in await stmt.fetch(event_ids)}
+
+@timed
 async def update_event(pool: Pool, event_id: str, event_data: dict):
     async with pool.acquire() as conn:
         async with conn.transaction():
@@ -70,17 +151,32 @@ async def update_event(pool: Pool, event_id: str, event_data: dict):
                    event_data['start_time'], event_data.get('end_time'), event_data['capacity'], event_id)
             if not row:
                 return None
+            # a sharded event keeps its shards, with the new availability spread
+            # over them (shards are locked first, like every multi-row inventory write)
+            shards = [r['shard'] for r in await conn.fetch("""
+                SELECT shard FROM event_inventory_shards
+                WHERE event_id = $1
+                ORDER BY shard
+                FOR UPDATE
+            """, event_id)]
+            if shards:
+                await conn.execute("""
+                    UPDATE event_inventory_shards s
+                    SET seats_available = d.seats_available, version = s.version + 1
+                    FROM unnest($2::int[], $3::int[]) AS d(shard, seats_available)
+                    WHERE s.event_id = $1 AND s.shard = d.shard
+                """, event_id, shards, _spread(event_data['capacity'], len(shards)))
             await conn.execute("""
                 UPDATE event_inventory
                 SET seats_available = $1
                 WHERE event_id = $2
-            """, event_data['capacity'], event_id)
+            """, 0 if shards else event_data['capacity'], event_id)
 
             result = dict(row)
-            result['id'] = str(result['id'])
             result['seats_available'] = event_data['capacity']
             return result
 
+@timed
 async def delete_event(pool: Pool, event_id: str):
     async with pool.acquire() as conn:
         async with conn.transaction():
@@ -92,13 +188,154 @@ async def delete_event(pool: Pool, event_id: str):
             """, event_id)
             if row:
                 result = dict(row)
-                result['id'] = str(result['id'])
                 result['seats_available'] = 0
                 return result
             return None
 
+@timed
+async def import_events_batch(pool: Pool, events: list) -> int:
+    """
+    Load already-validated events (dicts shaped like `schemas.EventCreate`) in one transaction.
+
+    Rows are COPYed into a session-local staging table, then `events` and
+    `event_inventory` are filled from it with a single set-based statement.
+
+    Returns:
+        int: number of events inserted.
+    """
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS events_import (
+                    name TEXT, venue TEXT, description TEXT,
+                    start_time TIMESTAMP WITH TIME ZONE, end_time TIMESTAMP WITH TIME ZONE,
+                    capacity INTEGER
+                ) ON COMMIT DELETE ROWS
+            """)
+            await conn.copy_records_to_table(
+                'events_import',
+                records=[(e['name'], e.get('venue'), e.get('description'),
+                          e['start_time'], e.get('end_time'), e['capacity']) for e in events],
+                columns=['name', 'venue', 'description', 'start_time', 'end_time', 'capacity'])
+            return await conn.fetchval("""
+                WITH inserted AS (
+                    INSERT INTO events (name, venue, description, start_time, end_time, capacity)
+                    SELECT name, venue, description, start_time, end_time, capacity
+                    FROM events_import
+                    RETURNING id, capacity
+                ), inventory AS (
+                    INSERT INTO event_inventory (event_id, seats_available)
+                    SELECT id, capacity FROM inserted
+                    RETURNING 1
+                )
+                SELECT count(*) FROM inventory
+            """)
+
+# ------------------- EVENT SEARCH -------------------
+
+SEARCH_FACET_VENUES = 20
+
+def _event_search_filters(q: Optional[str], venue: Optional[str], starts_after: Optional[datetime],
+                          starts_before: Optional[datetime], available: bool) -> tuple:
+    """
+    WHERE clause (over `events e JOIN event_inventory ei`) and arguments of a search.
+
+    Every filter maps to an index: search_vector (GIN), venue (trigram GIN, when
+    pg_trgm is installed), start_time (idx_events_start_time_id) and free seats
+    (idx_inventory_available OR idx_inventory_sharded, then the exact sum).
+    """
+    clauses, args = [], []
+    if q:
+        args.append(q)
+        clauses.append(f"e.search_vector @@ websearch_to_tsquery('english', ${len(args)})")
+    if venue:
+        args.append(venue.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+        clauses.append(f"e.venue ILIKE '%' || ${len(args)} || '%'")
+    if starts_after:
+        args.append(starts_after)
+        clauses.append(f"e.start_time >= ${len(args)}")
+    if starts_before:
+        args.append(starts_before)
+        clauses.append(f"e.start_time < ${len(args)}")
+    if available:
+        clauses.append(f"(ei.seats_available > 0 OR ei.shard_count > 0) AND {_EVENT_SEATS_AVAILABLE} > 0")
+    return ' AND '.join(clauses) or 'true', args
+
+def _search_events_query(q: Optional[str], venue: Optional[str], starts_after: Optional[datetime],
+                         starts_before: Optional[datetime], available: bool, sort: str, limit: int,
+                         after: Optional[tuple]) -> tuple:
+    where, args = _event_search_filters(q, venue, starts_after, starts_before, available)
+    if sort == 'relevance':
+        order = "ts_rank(e.search_vector, websearch_to_tsquery('english', $1)) DESC, e.start_time, e.id"
+    else:
+        order = "e.start_time, e.id"
+        if after:
+            args += [after[0], after[1]]
+            where += f" AND (e.start_time, e.id) > (${len(args) - 1}, ${len(args)}::uuid)"
+    args.append(limit)
+    return f"""
+        SELECT {_EVENT_COLUMNS}
+        FROM events e
+        JOIN event_inventory ei ON ei.event_id = e.id
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT ${len(args)}
+    """, args
+
+@timed
+async def search_events(pool: Pool, q: Optional[str] = None, venue: Optional[str] = None,
+                        starts_after: Optional[datetime] = None, starts_before: Optional[datetime] = None,
+                        available: bool = False, sort: str = 'start_time', limit: int = 25,
+                        after: Optional[tuple] = None):
+    """
+    Events matching keywords (`websearch_to_tsquery` syntax), a venue substring, a start
+    time range and/or "seats left", by start time (keyset `after` cursor) or by relevance.
+    """
+    sql, args = _search_events_query(q, venue, starts_after, starts_before, available, sort, limit, after)
+    async with pool.acquire() as conn:
+        return _records(await conn.fetch(sql, *args))
+
+def _event_search_facets_query(q: Optional[str], venue: Optional[str], starts_after: Optional[datetime],
+                               starts_before: Optional[datetime], available: bool) -> tuple:
+    where, args = _event_search_filters(q, venue, starts_after, starts_before, available)
+    month = "to_char(e.start_time AT TIME ZONE 'UTC', 'YYYY-MM')"
+    return f"""
+        SELECT e.venue, {month} AS month,
+               GROUPING(e.venue) AS by_month, GROUPING({month}) AS by_venue,
+               count(*) AS count,
+               count(*) FILTER (WHERE {_EVENT_SEATS_AVAILABLE} > 0) AS available
+        FROM events e
+        JOIN event_inventory ei ON ei.event_id = e.id
+        WHERE {where}
+        GROUP BY GROUPING SETS ((), (e.venue), ({month}))
+    """, args
+
+@timed
+async def event_search_facets(pool: Pool, q: Optional[str] = None, venue: Optional[str] = None,
+                              starts_after: Optional[datetime] = None, starts_before: Optional[datetime] = None,
+                              available: bool = False) -> dict:
+    """
+    Counts over every event matching a search: total, with seats left, per venue
+    (the SEARCH_FACET_VENUES largest) and per start month (UTC, `YYYY-MM`).
+    """
+    sql, args = _event_search_facets_query(q, venue, starts_after, starts_before, available)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *args)
+    facets = {'total': 0, 'available': 0, 'venues': [], 'months': []}
+    for row in rows:
+        if row['by_month'] and row['by_venue']:
+            facets['total'], facets['available'] = row['count'], row['available']
+        elif row['by_month']:
+            facets['months'].append({'value': row['month'], 'count': row['count']})
+        else:
+            facets['venues'].append({'value': row['venue'], 'count': row['count']})
+    facets['venues'] = sorted(facets['venues'], key=lambda v: (-v['count'], v['value'] or ''))[:SEARCH_FACET_VENUES]
+    facets['months'].sort(key=lambda m: m['value'])
+    return facets
+
 # ------------------- USERS -------------------
 
+@timed
 async def create_user(pool: Pool, email: str, name: Optional[str] = None):
     async with pool.acquire() as conn:
         try:
@@ -107,41 +344,50 @@ async def create_user(pool: Pool, email: str, name: Optional[str] = None):
                 VALUES ($1,$2)
                 RETURNING id, email, name, created_at
             """, email, name)
-            if row:
-                row = dict(row)
-                row['id'] = str(row['id'])
-            return row
+            return _record(row)
         except UniqueViolationError:
             row = await conn.fetchrow("SELECT id, email, name, created_at FROM users WHERE email=$1", email)
-            if row:
-                row = dict(row)
-                row['id'] = str(row['id'])
-            return row
+            return _record(row)
+
+GET_USER = register('get_user', """
+    SELECT id, email, name, created_at
+    FROM users
+    WHERE id = $1
+""")
+
+LIST_USERS_BEFORE = register('list_users_before', """
+    SELECT id, email, name, created_at
+    FROM users
+    WHERE (created_at, id) < ($2, $3::uuid)
+    ORDER BY created_at DESC, id DESC
+    LIMIT $1
+""")
 
+LIST_USERS = register('list_users', """
+    SELECT id, email, name, created_at
+    FROM users
+    ORDER BY created_at DESC, id DESC
+    LIMIT $1
+""")
+
+@timed
 async def get_user(pool: Pool, user_id: str):
     async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT id, email, name, created_at
-            FROM users
-            WHERE id = $1
-        """, user_id)
-        if row:
-            row = dict(row)
-            row['id'] = str(row['id'])
-        return row
+        stmt = await conn.prepared(GET_USER)
+        return _record(await stmt.fetchrow(user_id))
 
-async def list_users(pool: Pool):
+@timed
+async def list_users(pool: Pool, limit: int = 50, before: Optional[tuple] = None):
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT id, email, name, created_at
-            FROM users
-            ORDER BY created_at DESC
-        """)
-        result = [dict(r) for r in rows]
-        for r in result:
-            r['id'] = str(r['id'])
-        return result
+        if before:
+            stmt = await conn.prepared(LIST_USERS_BEFORE)
+            rows = await stmt.fetch(limit, before[0], before[1])
+        else:
+            stmt = await conn.prepared(LIST_USERS)
+            rows = await stmt.fetch(limit)
+        return _records(rows)
 
+@timed
 async def delete_user(pool: Pool, user_id: str):
     async with pool.acquire() as conn:
         row = await conn.fetchrow("""
@@ -149,103 +395,1341 @@ async def delete_user(pool: Pool, user_id: str):
             WHERE id=$1
             RETURNING id, email, name, created_at
         """, user_id)
-        if row:
-            row = dict(row)
-            row['id'] = str(row['id'])
-        return row
+        return _record(row)
 
-# ------------------- BOOKINGS -------------------
+# ------------------- INVENTORY SHARDS -------------------
 
-async def book_tickets(pool: Pool, user_id: str, event_id: str, quantity: int, idempotency_key: Optional[str] = None):
+def _spread(seats: int, shards: int) -> list:
+    # `seats` split as evenly as possible over `shards` counters
+    return [seats // shards + (1 if i < seats % shards else 0) for i in range(shards)]
+
+@timed
+async def set_inventory_shards(pool: Pool, event_id: str, shards: int):
+    """
+    Split an event's free seats across `shards` sub-counter rows (0 turns sharding off).
+
+    Existing shards are folded back into the main `event_inventory` row first
+    (availability, reservations, booked totals and versions), then the free seats
+    are spread evenly over the new shards. Bookings taken from the old shards
+    are re-pointed at the main row so cancellations stay balanced.
+
+    Returns:
+        Optional[dict]: { "event_id", "shards", "seats_available" }, or None if the
+            event has no inventory row.
+    """
     async with pool.acquire() as conn:
         async with conn.transaction():
-            if idempotency_key:
-                existing = await conn.fetchrow("SELECT id, status FROM bookings WHERE idempotency_key=$1 LIMIT 1", idempotency_key)
-                if existing:
-                    return {'reused': True, 'id': str(existing['id']), 'status': existing['status']}
+            # lock order: shards (by shard number), then the main row
+            old = await conn.fetchrow("""
+                SELECT COALESCE(sum(seats_available), 0) AS seats_available,
+                       COALESCE(sum(seats_reserved), 0) AS seats_reserved,
+                       COALESCE(sum(total_booked), 0) AS total_booked,
+                       COALESCE(sum(version), 0) AS version
+                FROM (
+                    SELECT * FROM event_inventory_shards
+                    WHERE event_id = $1
+                    ORDER BY shard
+                    FOR UPDATE
+                ) s
+            """, event_id)
+            available = await conn.fetchval("""
+                SELECT seats_available FROM event_inventory WHERE event_id = $1 FOR UPDATE
+            """, event_id)
+            if available is None:
+                return None
+            available += old['seats_available']
+
+            await conn.execute("DELETE FROM event_inventory_shards WHERE event_id = $1", event_id)
+            await conn.execute("""
+                UPDATE bookings SET inventory_shard = NULL
+                WHERE event_id = $1 AND inventory_shard IS NOT NULL
+            """, event_id)
+            if old['total_booked']:
+                stmt = await conn.prepared(ADD_BOOKED_STATS)
+                await stmt.execute(event_id, old['total_booked'])
 
-            updated = await conn.fetchrow("""
+            if shards:
+                per_shard = _spread(available, shards)
+                await conn.execute("""
+                    INSERT INTO event_inventory_shards (event_id, shard, seats_available)
+                    SELECT $1, s.shard - 1, s.seats_available
+                    FROM unnest($2::int[]) WITH ORDINALITY AS s(seats_available, shard)
+                """, event_id, per_shard)
+
+            await conn.execute("""
                 UPDATE event_inventory
-                SET seats_available = seats_available - $1,
-                    seats_reserved = seats_reserved + $1,
-                    version = version + 1
-                WHERE event_id = $2 AND seats_available >= $1
-                RETURNING seats_available
-            """, quantity, event_id)
-
-            if not updated:
+                SET seats_available = $2,
+                    seats_reserved = seats_reserved + $3,
+                    shard_count = $4,
+                    version = version + $5 + 1
+                WHERE event_id = $1
+            """, event_id, 0 if shards else available, old['seats_reserved'], shards, old['version'])
+            return {'event_id': event_id, 'shards': shards, 'seats_available': available}
+
+class _ShardsExhausted(Exception):
+    """No single shard could serve the booking: retry it with `gather=True`."""
+
+TAKE_FROM_SHARD = register('take_from_shard', """
+    UPDATE event_inventory_shards
+    SET seats_available = seats_available - $1,
+        seats_reserved = seats_reserved + $1,
+        total_booked = total_booked + $1,
+        version = version + 1
+    WHERE event_id = $2 AND shard = $3 AND seats_available >= $1
+    RETURNING shard
+""")
+
+TAKE_FROM_ANY_SHARD = register('take_from_any_shard', """
+    WITH candidate AS (
+        SELECT shard FROM event_inventory_shards
+        WHERE event_id = $2 AND seats_available >= $1
+        ORDER BY seats_available DESC
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE event_inventory_shards s
+    SET seats_available = s.seats_available - $1,
+        seats_reserved = s.seats_reserved + $1,
+        total_booked = s.total_booked + $1,
+        version = s.version + 1
+    FROM candidate
+    WHERE s.event_id = $2 AND s.shard = candidate.shard
+    RETURNING s.shard
+""")
+
+async def _take_from_shards(conn, event_id: str, quantity: int, shard_count: int) -> int:
+    """
+    Take `quantity` seats from a single shard of a sharded event's inventory.
+
+    Tries a random shard, then any unlocked shard with enough seats. If neither
+    works, raises _ShardsExhausted: the caller must retry in a new transaction
+    with `_gather_from_shards`, which locks every shard (then the main row) and
+    takes the seats wherever they are. The retry cannot happen in the same
+    transaction, because an UPDATE that waited on a shard and then found it too
+    empty still holds that shard's row lock, and waiting on other shards while
+    holding it can deadlock.
+
+    Returns:
+        int: the shard the seats came from.
+    """
+    stmt = await conn.prepared(TAKE_FROM_SHARD)
+    shard = await stmt.fetchval(quantity, event_id, random.randrange(shard_count))
+    if shard is not None:
+        return shard
+    CONTENTION.inc('shard_fallback')
+
+    stmt = await conn.prepared(TAKE_FROM_ANY_SHARD)
+    shard = await stmt.fetchval(quantity, event_id)
+    if shard is not None:
+        return shard
+    raise _ShardsExhausted()
+
+LOCK_SHARDS = register('lock_shards', """
+    SELECT shard, seats_available FROM event_inventory_shards
+    WHERE event_id = $1
+    ORDER BY shard
+    FOR UPDATE
+""")
+
+LOCK_INVENTORY = register('lock_inventory', """
+    SELECT seats_available FROM event_inventory WHERE event_id = $1 FOR UPDATE
+""")
+
+async def _lock_inventory(conn, event_id: str) -> tuple:
+    """
+    Lock an event's shards (by shard number), then its main row: the lock order of
+    every write touching several inventory rows. Works for unsharded events too.
+
+    Returns:
+        tuple: (main row seats_available, or None without an inventory row;
+            [(shard, seats_available)] of the shards)
+    """
+    stmt = await conn.prepared(LOCK_SHARDS)
+    rows = await stmt.fetch(event_id)
+    stmt = await conn.prepared(LOCK_INVENTORY)
+    main_available = await stmt.fetchval(event_id)
+    return main_available, rows
+
+async def _gather_from_shards(conn, event_id: str, quantity: int) -> None:
+    """
+    Take `quantity` seats wherever they are (main row first, then shards in order),
+    under `_lock_inventory`. The booking belongs to the main row.
+
+    Raises:
+        Exception('NOT_ENOUGH_SEATS'): if the shards and the main row together lack the seats.
+    """
+    main_available, rows = await _lock_inventory(conn, event_id)
+    if main_available is None or main_available + sum(r['seats_available'] for r in rows) < quantity:
+        BOOKINGS.inc('not_enough_seats')
+        raise Exception('NOT_ENOUGH_SEATS')
+    await _take_locked(conn, event_id, quantity, main_available, rows)
+
+async def _take_locked(conn, event_id: str, quantity: int, main_available: int, rows: list) -> None:
+    # seats already checked under `_lock_inventory`
+    from_main = min(main_available, quantity)
+    needed = quantity - from_main
+    taken_shards, taken = [], []
+    for r in rows:
+        if not needed:
+            break
+        take = min(r['seats_available'], needed)
+        if take:
+            taken_shards.append(r['shard'])
+            taken.append(take)
+            needed -= take
+    if taken_shards:
+        await conn.execute("""
+            UPDATE event_inventory_shards s
+            SET seats_available = s.seats_available - d.quantity,
+                version = s.version + 1
+            FROM unnest($2::int[], $3::int[]) AS d(shard, quantity)
+            WHERE s.event_id = $1 AND s.shard = d.shard
+        """, event_id, taken_shards, taken)
+    await conn.execute("""
+        UPDATE event_inventory
+        SET seats_available = seats_available - $1,
+            seats_reserved = seats_reserved + $2,
+            version = version + 1
+        WHERE event_id = $3
+    """, from_main, quantity, event_id)
+
+SHARD_COUNT = register('shard_count', """
+    SELECT shard_count FROM event_inventory WHERE event_id = $1
+""")
+
+async def _resharded(conn, event_id: str) -> bool:
+    # RESERVE_SEATS reads shard_count from its statement snapshot, which predates
+    # a set_inventory_shards its UPDATE waited for; a new statement sees it
+    stmt = await conn.prepared(SHARD_COUNT)
+    return bool(await stmt.fetchval(event_id))
+
+async def _reserve_seats(conn, event_id: str, quantity: int, gather: bool = False) -> None:
+    """
+    Take `quantity` seats for a booking that belongs to the main inventory row
+    (holds, assigned seats).
+
+    Unsharded events take them from the main row in one statement. For a sharded
+    event raises _ShardsExhausted: the caller retries in a new transaction with
+    gather=True, which takes them across the shards (see `_gather_from_shards`).
+
+    Raises:
+        Exception('NOT_ENOUGH_SEATS'): if the event lacks the seats.
+    """
+    if gather:
+        return await _gather_from_shards(conn, event_id, quantity)
+    stmt = await conn.prepared(RESERVE_SEATS)
+    updated = await stmt.fetchrow(quantity, event_id)
+    if updated['booked']:
+        return
+    if updated['shard_count'] or await _resharded(conn, event_id):
+        raise _ShardsExhausted()
+    BOOKINGS.inc('not_enough_seats')
+    raise Exception('NOT_ENOUGH_SEATS')
+
+async def _with_gather_retry(conn, func, *args):
+    # run func(conn, *args, gather=...) in a transaction, again with gather=True
+    # in a new one if the event's shards could not serve it
+    try:
+        async with conn.transaction():
+            return await func(conn, *args, gather=False)
+    except _ShardsExhausted:
+        CONTENTION.inc('shard_gather')
+        async with conn.transaction():
+            return await func(conn, *args, gather=True)
+
+# ------------------- BOOKINGS -------------------
+
+RESERVE_SEATS = register('reserve_seats', """
+    WITH updated AS (
+        UPDATE event_inventory
+        SET seats_available = seats_available - $1,
+            seats_reserved = seats_reserved + $1,
+            version = version + 1
+        WHERE event_id = $2 AND seats_available >= $1 AND shard_count = 0
+        RETURNING seats_available
+    )
+    SELECT EXISTS (SELECT 1 FROM updated) AS booked,
+           (SELECT shard_count FROM event_inventory WHERE event_id = $2) AS shard_count
+""")
+
+INSERT_BOOKING = register('insert_booking', """
+    INSERT INTO bookings (id, user_id, event_id, quantity, status, idempotency_key, inventory_shard)
+    VALUES ($1,$2,$3,$4,'CONFIRMED',$5,$6)
+""")
+
+# AUDIT_LOG_MODE=outbox: the booking row carries its pending audit entry
+INSERT_BOOKING_OUTBOX = register('insert_booking_outbox', """
+    INSERT INTO bookings (id, user_id, event_id, quantity, status, idempotency_key, inventory_shard, audit_pending)
+    VALUES ($1,$2,$3,$4,'CONFIRMED',$5,$6,'{BOOK}')
+""")
+
+INSERT_BOOKING_EVENT = register('insert_booking_event', """
+    INSERT INTO booking_events (booking_id, event_type, event_payload)
+    VALUES ($1, $2, $3::jsonb)
+""")
+
+async def _write_booking_event(conn, booking_id: str, event_type: str, payload: dict):
+    stmt = await conn.prepared(INSERT_BOOKING_EVENT)
+    await stmt.fetch(booking_id, event_type, json.dumps(payload))
+
+async def _defer_booking_event(conn, booking_id: str, event_type: str, payload: dict):
+    # AUDIT_LOG_MODE=async, after commit: queue the entry, or write it now if the queue is full
+    if not audit_writer.offer(booking_id, event_type, payload):
+        await _write_booking_event(conn, booking_id, event_type, payload)
+
+async def _audit_in_tx(conn, entries: list):
+    """
+    Record (booking_id, event_type, payload) audit entries inside the booking
+    transaction, as AUDIT_LOG_MODE says: `sync` inserts them, `outbox` appends
+    their types to the bookings' audit_pending. `async` entries are queued by
+    `_audit_after_commit` once the transaction has committed.
+    """
+    mode = settings.AUDIT_LOG_MODE
+    if mode == 'sync':
+        await conn.execute("""
+            INSERT INTO booking_events (booking_id, event_type, event_payload)
+            SELECT e.booking_id, e.event_type, e.payload::jsonb
+            FROM unnest($1::uuid[], $2::text[], $3::text[]) AS e(booking_id, event_type, payload)
+        """, [e[0] for e in entries], [e[1] for e in entries], [json.dumps(e[2]) for e in entries])
+    elif mode == 'outbox':
+        await conn.execute("""
+            UPDATE bookings b
+            SET audit_pending = array_append(b.audit_pending, e.event_type)
+            FROM unnest($1::uuid[], $2::text[]) AS e(booking_id, event_type)
+            WHERE b.id = e.booking_id
+        """, [e[0] for e in entries], [e[1] for e in entries])
+
+async def _audit_after_commit(conn, entries: list):
+    if settings.AUDIT_LOG_MODE == 'async':
+        for booking_id, event_type, payload in entries:
+            await _defer_booking_event(conn, booking_id, event_type, payload)
+
+ADD_BOOKED_STATS = register('add_booked_stats', """
+    INSERT INTO event_booking_stats (event_id, total_booked)
+    VALUES ($1, $2)
+    ON CONFLICT (event_id) DO UPDATE
+    SET total_booked = event_booking_stats.total_booked + EXCLUDED.total_booked,
+        updated_at = now()
+""")
+
+ADD_BOOKED_STATS_MANY = register('add_booked_stats_many', """
+    INSERT INTO event_booking_stats (event_id, total_booked)
+    SELECT s.event_id, s.total_booked
+    FROM unnest($1::uuid[], $2::bigint[]) AS s(event_id, total_booked)
+    ON CONFLICT (event_id) DO UPDATE
+    SET total_booked = event_booking_stats.total_booked + EXCLUDED.total_booked,
+        updated_at = now()
+""")
+
+CANCEL_BOOKING = register('cancel_booking', """
+    UPDATE bookings
+    SET status = 'CANCELLED', updated_at = now()
+    WHERE id=$1 AND status='CONFIRMED'
+    RETURNING quantity, event_id, inventory_shard
+""")
+
+CANCEL_BOOKING_OUTBOX = register('cancel_booking_outbox', """
+    UPDATE bookings
+    SET status = 'CANCELLED', updated_at = now(), audit_pending = array_append(audit_pending, 'CANCEL')
+    WHERE id=$1 AND status='CONFIRMED'
+    RETURNING quantity, event_id, inventory_shard
+""")
+
+RELEASE_SEATS = register('release_seats', """
+    UPDATE event_inventory
+    SET seats_available = seats_available + $1,
+        seats_reserved = seats_reserved - $1,
+        version = version + 1
+    WHERE event_id = $2
+""")
+
+REMOVE_BOOKED_STATS = register('remove_booked_stats', """
+    UPDATE event_booking_stats
+    SET total_booked = total_booked - $1, updated_at = now()
+    WHERE event_id = $2
+""")
+
+@timed
+async def book_tickets(pool: Pool, user_id: str, event_id: str, quantity: int, idempotency_key: Optional[str] = None):
+    if idempotency_key:
+        cached = idempotency_cache.get(idempotency_key)
+        if cached is not None:
+            BOOKINGS.inc('reused')
+            return cached
+
+    booked = False
+    async with pool.acquire() as conn:
+        try:
+            try:
+                async with conn.transaction():
+                    stored = await claim_idempotency_key(conn, idempotency_key) if idempotency_key else None
+                    if stored is not None:
+                        BOOKINGS.inc('reused')
+                        result = stored
+                    else:
+                        result = await _book_tickets_in_tx(conn, user_id, event_id, quantity, idempotency_key)
+                        booked = True
+            except _ShardsExhausted:
+                # no single shard had room: gather the seats in a fresh transaction
+                CONTENTION.inc('shard_gather')
+                async with conn.transaction():
+                    stored = await claim_idempotency_key(conn, idempotency_key) if idempotency_key else None
+                    if stored is not None:
+                        BOOKINGS.inc('reused')
+                        result = stored
+                    else:
+                        result = await _book_tickets_in_tx(conn, user_id, event_id, quantity, idempotency_key,
+                                                           gather=True)
+                        booked = True
+        except UniqueViolationError:
+            # key already purged from the idempotency store but still recorded
+            # on its original booking: replay that booking
+            existing = await conn.fetchrow("SELECT id, status FROM bookings WHERE idempotency_key=$1", idempotency_key)
+            if not existing:
+                raise
+            BOOKINGS.inc('reused')
+            result = {'id': existing['id'], 'status': existing['status']}
+
+        if booked and settings.AUDIT_LOG_MODE == 'async':
+            await _defer_booking_event(conn, result['id'], 'BOOK',
+                                       {'quantity': quantity, 'user_id': user_id, 'event_id': event_id})
+
+    if idempotency_key:
+        idempotency_cache.set(idempotency_key, result)
+    return result
+
+async def _book_tickets_in_tx(conn, user_id: str, event_id: str, quantity: int, idempotency_key: Optional[str],
+                              gather: bool = False):
+    inventory_shard = None
+    if gather:
+        await _gather_from_shards(conn, event_id, quantity)
+    else:
+        # sharded events skip the main row here (seats returned to it are only
+        # used by the gather path), so their bookings never queue on it
+        started = time.perf_counter()
+        stmt = await conn.prepared(RESERVE_SEATS)
+        updated = await stmt.fetchrow(quantity, event_id)
+        INVENTORY_UPDATE_SECONDS.observe(time.perf_counter() - started)
+        if not updated['booked']:
+            if not updated['shard_count']:
+                if await _resharded(conn, event_id):
+                    # our UPDATE may hold the main row: gather in a new transaction
+                    raise _ShardsExhausted()
+                BOOKINGS.inc('not_enough_seats')
                 raise Exception('NOT_ENOUGH_SEATS')
+            inventory_shard = await _take_from_shards(conn, event_id, quantity, updated['shard_count'])
+
+    booking_id = str(uuid.uuid4())
+    mode = settings.AUDIT_LOG_MODE
+    stmt = await conn.prepared(INSERT_BOOKING_OUTBOX if mode == 'outbox' else INSERT_BOOKING)
+    await stmt.fetch(booking_id, user_id, event_id, quantity, idempotency_key, inventory_shard)
+
+    if mode == 'sync':
+        await _write_booking_event(conn, booking_id, 'BOOK',
+                                   {'quantity': quantity, 'user_id': user_id, 'event_id': event_id})
+
+    # incremental stats: the inventory row for this event is already locked,
+    # so bumping its counter row adds no extra contention (shard bookings are
+    # counted in their shard's total_booked instead)
+    if inventory_shard is None:
+        stmt = await conn.prepared(ADD_BOOKED_STATS)
+        await stmt.fetch(event_id, quantity)
+
+    result = {'id': booking_id, 'status': 'CONFIRMED'}
+    if idempotency_key:
+        await store_idempotent_response(conn, idempotency_key, booking_id, result)
+    BOOKINGS.inc('confirmed')
+    return result
+
+class _BatchAborted(Exception):
+    def __init__(self, results):
+        super().__init__('BATCH_ABORTED')
+        self.results = results
+
+def _parse_uuid(value) -> Optional[str]:
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
 
+@timed
+async def book_tickets_batch(pool: Pool, items: list, atomic: bool = False):
+    """
+    Settle many bookings with set-based SQL in a fixed number of round trips.
+
+    `items` are dicts with user_id, event_id, quantity and optional idempotency_key.
+    Inventory rows are locked in event_id order, so concurrent batches cannot
+    deadlock. Items are granted in request order while seats remain.
+
+    Returns one result per item: {'id', 'status': 'CONFIRMED'} (or the replayed
+    idempotent response), or {'status': 'FAILED', 'error': <reason>}. With
+    atomic=True nothing is written unless every item succeeds; otherwise the
+    items that would have succeeded are reported as 'ABORTED'.
+
+    The batch only draws from the main inventory row. Items of sharded events it
+    cannot serve are booked one by one through book_tickets afterwards, or fail
+    with INVENTORY_SHARDED in an atomic batch.
+    """
+    results = [None] * len(items)
+    first_by_key = {}
+    duplicates = []
+    for index, item in enumerate(items):
+        key = item.get('idempotency_key')
+        if key:
+            if key in first_by_key:
+                duplicates.append((index, first_by_key[key]))
+                continue
+            first_by_key[key] = index
+            cached = idempotency_cache.get(key)
+            if cached is not None:
+                BOOKINGS.inc('reused')
+                results[index] = cached
+                continue
+        if _parse_uuid(item['user_id']) is None or _parse_uuid(item['event_id']) is None:
+            results[index] = {'status': 'FAILED', 'error': 'INVALID_ID'}
+
+    async with pool.acquire() as conn:
+        try:
+            async with conn.transaction():
+                audit = await _book_tickets_batch_in_tx(conn, items, results, {i for i, _ in duplicates}, atomic)
+            await _audit_after_commit(conn, audit)
+        except _BatchAborted as e:
+            results = e.results
+
+    if not atomic:
+        sharded = [i for i, r in enumerate(results)
+                   if r is not None and r.get('error') == 'INVENTORY_SHARDED']
+        if sharded:
+            settled = await asyncio.gather(*(_book_sharded_item(pool, items[i]) for i in sharded))
+            for index, result in zip(sharded, settled):
+                results[index] = result
+
+    for index, first in duplicates:
+        results[index] = results[first]
+    for key, index in first_by_key.items():
+        if results[index].get('status') == 'CONFIRMED':
+            idempotency_cache.set(key, results[index])
+    return results
+
+async def _book_sharded_item(pool: Pool, item: dict):
+    try:
+        return await book_tickets(pool, _parse_uuid(item['user_id']), _parse_uuid(item['event_id']),
+                                  item['quantity'], item.get('idempotency_key'))
+    except Exception as e:
+        if str(e) in ('NOT_ENOUGH_SEATS', 'IDEMPOTENCY_CONFLICT'):
+            return {'status': 'FAILED', 'error': str(e)}
+        raise
+
+async def _book_tickets_batch_in_tx(conn, items: list, results: list, skip: set, atomic: bool) -> list:
+    # returns the audit entries of the bookings made
+    pending = [i for i, r in enumerate(results) if r is None and i not in skip]
+
+    keys = [items[i]['idempotency_key'] for i in pending if items[i].get('idempotency_key')]
+    if keys:
+        claims = await claim_idempotency_keys(conn, keys)
+        still_pending = []
+        for i in pending:
+            claim = claims.get(items[i].get('idempotency_key'))
+            if claim is None:
+                still_pending.append(i)
+            elif claim == 'IDEMPOTENCY_CONFLICT':
+                results[i] = {'status': 'FAILED', 'error': 'IDEMPOTENCY_CONFLICT'}
+            else:
+                BOOKINGS.inc('reused')
+                results[i] = claim
+        pending = still_pending
+
+    remaining, known_users, sharded = {}, set(), set()
+    if pending:
+        event_ids = sorted({_parse_uuid(items[i]['event_id']) for i in pending})
+        inventory = await conn.fetch("""
+            SELECT event_id, seats_available, shard_count
+            FROM event_inventory
+            WHERE event_id = ANY($1::uuid[])
+            ORDER BY event_id
+            FOR UPDATE
+        """, event_ids)
+        remaining = {r['event_id']: r['seats_available'] for r in inventory}
+        sharded = {r['event_id'] for r in inventory if r['shard_count']}
+
+        user_ids = list({_parse_uuid(items[i]['user_id']) for i in pending})
+        known_users = {r['id'] for r in await conn.fetch(
+            "SELECT id FROM users WHERE id = ANY($1::uuid[])", user_ids)}
+
+    booked = []
+    for i in pending:
+        user_id = _parse_uuid(items[i]['user_id'])
+        event_id = _parse_uuid(items[i]['event_id'])
+        quantity = items[i]['quantity']
+        if user_id not in known_users:
+            results[i] = {'status': 'FAILED', 'error': 'USER_NOT_FOUND'}
+        elif quantity > remaining.get(event_id, 0):
+            # batches only draw from the main row; sharded events are left
+            # to book_tickets
+            error = 'INVENTORY_SHARDED' if event_id in sharded else 'NOT_ENOUGH_SEATS'
+            if error == 'NOT_ENOUGH_SEATS':
+                BOOKINGS.inc('not_enough_seats')
+            results[i] = {'status': 'FAILED', 'error': error}
+        else:
+            remaining[event_id] -= quantity
             booking_id = str(uuid.uuid4())
-            await conn.execute("""
-                INSERT INTO bookings (id, user_id, event_id, quantity, status, idempotency_key)
-                VALUES ($1,$2,$3,$4,'CONFIRMED',$5)
-            """, booking_id, user_id, event_id, quantity, idempotency_key)
+            results[i] = {'id': booking_id, 'status': 'CONFIRMED'}
+            booked.append((i, booking_id, user_id, event_id, quantity))
 
-            payload = json.dumps({'quantity': quantity, 'user_id': user_id, 'event_id': event_id})
-            await conn.execute("""
-                INSERT INTO booking_events (booking_id, event_type, event_payload)
-                VALUES ($1, 'BOOK', $2::jsonb)
-            """, booking_id, payload)
+    if atomic and any(r is not None and r.get('status') == 'FAILED' for r in results):
+        aborted = list(results)
+        for b in booked:
+            aborted[b[0]] = {'status': 'ABORTED'}
+        raise _BatchAborted(aborted)
 
-            # <-- FIXED: refresh without CONCURRENTLY
-            await conn.execute("REFRESH MATERIALIZED VIEW mv_event_booking_stats")
-            return {'id': booking_id, 'status': 'CONFIRMED'}
+    # a failed item's claim would commit without a response and turn every
+    # retry of that key into IDEMPOTENCY_CONFLICT
+    failed_keys = [items[i]['idempotency_key'] for i in pending
+                   if items[i].get('idempotency_key') and results[i].get('status') == 'FAILED']
+    if failed_keys:
+        await release_idempotency_keys(conn, failed_keys)
 
+    if not booked:
+        return []
+
+    per_event = {}
+    for _, _, _, event_id, quantity in booked:
+        per_event[event_id] = per_event.get(event_id, 0) + quantity
+    await conn.execute("""
+        UPDATE event_inventory ei
+        SET seats_available = ei.seats_available - d.quantity,
+            seats_reserved = ei.seats_reserved + d.quantity,
+            version = ei.version + 1
+        FROM unnest($1::uuid[], $2::int[]) AS d(event_id, quantity)
+        WHERE ei.event_id = d.event_id
+    """, list(per_event), list(per_event.values()))
+
+    await conn.execute("""
+        INSERT INTO bookings (id, user_id, event_id, quantity, status, idempotency_key)
+        SELECT b.id, b.user_id, b.event_id, b.quantity, 'CONFIRMED', b.idempotency_key
+        FROM unnest($1::uuid[], $2::uuid[], $3::uuid[], $4::int[], $5::text[])
+             AS b(id, user_id, event_id, quantity, idempotency_key)
+    """, [b[1] for b in booked], [b[2] for b in booked], [b[3] for b in booked],
+        [b[4] for b in booked], [items[b[0]].get('idempotency_key') for b in booked])
+
+    audit = [(b[1], 'BOOK', {'quantity': b[4], 'user_id': b[2], 'event_id': b[3]}) for b in booked]
+    await _audit_in_tx(conn, audit)
+
+    stmt = await conn.prepared(ADD_BOOKED_STATS_MANY)
+    await stmt.execute(list(per_event), list(per_event.values()))
+
+    keyed = [b for b in booked if items[b[0]].get('idempotency_key')]
+    if keyed:
+        await store_idempotent_responses(conn, [items[b[0]]['idempotency_key'] for b in keyed],
+                                         [b[1] for b in keyed], [results[b[0]] for b in keyed])
+    BOOKINGS.inc('confirmed', amount=len(booked))
+    return audit
+
+RETURN_TO_SHARD = register('return_to_shard', """
+    UPDATE event_inventory_shards
+    SET seats_available = seats_available + $1,
+        seats_reserved = seats_reserved - $1,
+        total_booked = total_booked - $1,
+        version = version + 1
+    WHERE event_id = $2 AND shard = $3
+    RETURNING shard
+""")
+
+FREE_BOOKING_SEATS = register('free_booking_seats', """
+    UPDATE seats
+    SET status = 'AVAILABLE', booking_id = NULL
+    WHERE booking_id = $1
+""")
+
+@timed
 async def cancel_booking(pool: Pool, booking_id: str):
+    mode = settings.AUDIT_LOG_MODE
     async with pool.acquire() as conn:
         async with conn.transaction():
-            row = await conn.fetchrow("""
-                UPDATE bookings
-                SET status = 'CANCELLED', updated_at = now()
-                WHERE id=$1 AND status='CONFIRMED'
-                RETURNING quantity, event_id
-            """, booking_id)
+            stmt = await conn.prepared(CANCEL_BOOKING_OUTBOX if mode == 'outbox' else CANCEL_BOOKING)
+            row = await stmt.fetchrow(booking_id)
             if not row:
                 raise Exception('CANNOT_CANCEL')
 
             qty = row['quantity']
             event_id = row['event_id']
 
+            returned = None
+            if row['inventory_shard'] is not None:
+                stmt = await conn.prepared(RETURN_TO_SHARD)
+                returned = await stmt.fetchval(qty, event_id, row['inventory_shard'])
+            if returned is None:
+                stmt = await conn.prepared(RELEASE_SEATS)
+                await stmt.fetch(qty, event_id)
+
+            if mode == 'sync':
+                await _write_booking_event(conn, booking_id, 'CANCEL', {'quantity': qty})
+
+            if returned is None:
+                stmt = await conn.prepared(REMOVE_BOOKED_STATS)
+                await stmt.fetch(qty, event_id)
+
+            # assigned seats (if any) go back to the seat map
+            stmt = await conn.prepared(FREE_BOOKING_SEATS)
+            await stmt.execute(booking_id)
+            BOOKINGS.inc('cancelled')
+        if mode == 'async':
+            await _defer_booking_event(conn, booking_id, 'CANCEL', {'quantity': qty})
+        return {'id': booking_id, 'event_id': event_id, 'cancelled_quantity': qty}
+
+# ------------------- SEATS -------------------
+
+@timed
+async def create_seats(pool: Pool, event_id: str, rows: dict):
+    """
+    Create the seat map of an event: `rows` maps a row name to its number of seats.
+
+    Seats are labelled <row><number> (e.g. A1..A20). Existing labels are kept.
+    Returns the number of seats of the event, or None if the event does not exist.
+    """
+    labels, seat_rows, numbers = [], [], []
+    for row_name, count in rows.items():
+        for number in range(1, count + 1):
+            labels.append(f"{row_name}{number}")
+            seat_rows.append(row_name)
+            numbers.append(number)
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            capacity = await conn.fetchval("SELECT capacity FROM events WHERE id=$1 FOR UPDATE", event_id)
+            if capacity is None:
+                return None
+            existing = await conn.fetchval("""
+                SELECT count(*) FROM seats
+                WHERE event_id = $1 AND NOT (seat_label = ANY($2::text[]))
+            """, event_id, labels)
+            if existing + len(labels) > capacity:
+                raise Exception('SEATS_EXCEED_CAPACITY')
             await conn.execute("""
-                UPDATE event_inventory
-                SET seats_available = seats_available + $1,
-                    seats_reserved = seats_reserved - $1,
-                    version = version + 1
-                WHERE event_id = $2
-            """, qty, event_id)
+                INSERT INTO seats (event_id, seat_label, seat_row, seat_number, status)
+                SELECT $1, s.label, s.seat_row, s.seat_number, 'AVAILABLE'
+                FROM unnest($2::text[], $3::text[], $4::int[]) AS s(label, seat_row, seat_number)
+                ON CONFLICT (event_id, seat_label) DO NOTHING
+            """, event_id, labels, seat_rows, numbers)
+            return existing + len(labels)
+
+@timed
+async def list_seats(pool: Pool, event_id: str):
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT seat_label, seat_row, seat_number, status
+            FROM seats
+            WHERE event_id = $1
+            ORDER BY seat_row, seat_number, seat_label
+        """, event_id)
+        return _records(rows)
+
+@timed
+async def claim_seats(pool: Pool, user_id: str, event_id: str, labels: list):
+    """
+    Book exactly the seats in `labels` for one user.
+
+    Candidate seats are locked with FOR UPDATE SKIP LOCKED, so buyers racing for
+    other seats of the same event never wait on each other. The inventory counter
+    is decremented in the same transaction to keep it consistent with the seats.
+
+    Returns:
+        tuple: (booking dict, []) on success, or (None, unavailable_labels) if some
+            seats are booked/held or locked by a concurrent buyer.
+
+    Raises:
+        Exception('NOT_ENOUGH_SEATS'): if the inventory counter has no room left.
+    """
+    async with pool.acquire() as conn:
+        booking, unavailable = await _with_gather_retry(conn, _claim_seats_in_tx, user_id, event_id, labels)
+        if booking is not None:
+            await _audit_after_commit(conn, [_claim_audit_entry(booking, user_id, event_id)])
+        return booking, unavailable
+
+def _claim_audit_entry(booking: dict, user_id: str, event_id: str) -> tuple:
+    labels = booking['seats']
+    return booking['id'], 'BOOK', {'quantity': len(labels), 'user_id': user_id, 'event_id': event_id, 'seats': labels}
+
+LOCK_FREE_SEATS = register('lock_free_seats', """
+    SELECT id, seat_label
+    FROM seats
+    WHERE event_id = $1 AND seat_label = ANY($2::text[]) AND status = 'AVAILABLE'
+    FOR UPDATE SKIP LOCKED
+""")
+
+INSERT_SEAT_BOOKING = register('insert_seat_booking', """
+    INSERT INTO bookings (id, user_id, event_id, quantity, status)
+    VALUES ($1,$2,$3,$4,'CONFIRMED')
+""")
+
+BOOK_SEATS = register('book_seats', """
+    UPDATE seats
+    SET status = 'BOOKED', booking_id = $1
+    WHERE id = ANY($2::uuid[])
+""")
+
+async def _claim_seats_in_tx(conn, user_id: str, event_id: str, labels: list, gather: bool = False):
+    stmt = await conn.prepared(LOCK_FREE_SEATS)
+    seats = await stmt.fetch(event_id, labels)
+    if len(seats) < len(labels):
+        claimed = {r['seat_label'] for r in seats}
+        return None, [label for label in labels if label not in claimed]
+
+    quantity = len(labels)
+    await _reserve_seats(conn, event_id, quantity, gather)
+
+    booking_id = str(uuid.uuid4())
+    stmt = await conn.prepared(INSERT_SEAT_BOOKING)
+    await stmt.execute(booking_id, user_id, event_id, quantity)
+
+    stmt = await conn.prepared(BOOK_SEATS)
+    await stmt.execute(booking_id, [r['id'] for r in seats])
+
+    booking = {'id': booking_id, 'status': 'CONFIRMED', 'seats': labels}
+    await _audit_in_tx(conn, [_claim_audit_entry(booking, user_id, event_id)])
+
+    stmt = await conn.prepared(ADD_BOOKED_STATS)
+    await stmt.execute(event_id, quantity)
+    return booking, []
+
+# ------------------- HOLDS -------------------
+
+@timed
+async def hold_tickets(pool: Pool, user_id: str, event_id: str, quantity: int, ttl_seconds: float):
+    async with pool.acquire() as conn:
+        hold = await _with_gather_retry(conn, _hold_tickets_in_tx, user_id, event_id, quantity, ttl_seconds)
+        await _audit_after_commit(conn, [(hold['id'], 'HOLD',
+                                          {'quantity': quantity, 'user_id': user_id, 'event_id': event_id})])
+        return hold
+
+INSERT_HOLD = register('insert_hold', """
+    INSERT INTO bookings (id, user_id, event_id, quantity, status, expires_at)
+    VALUES ($1,$2,$3,$4,'PENDING', now() + make_interval(secs => $5))
+    RETURNING expires_at
+""")
+
+async def _hold_tickets_in_tx(conn, user_id: str, event_id: str, quantity: int, ttl_seconds: float,
+                              gather: bool = False):
+    # holds belong to the main row: release and expiry give their seats back there
+    await _reserve_seats(conn, event_id, quantity, gather)
+
+    booking_id = str(uuid.uuid4())
+    stmt = await conn.prepared(INSERT_HOLD)
+    row = await stmt.fetchrow(booking_id, user_id, event_id, quantity, float(ttl_seconds))
+
+    await _audit_in_tx(conn, [(booking_id, 'HOLD', {'quantity': quantity, 'user_id': user_id,
+                                                    'event_id': event_id})])
+    return {'id': booking_id, 'status': 'PENDING', 'expires_at': row['expires_at']}
+
+CONFIRM_HOLD = register('confirm_hold', """
+    UPDATE bookings
+    SET status = 'CONFIRMED', expires_at = NULL, updated_at = now()
+    WHERE id=$1 AND status='PENDING' AND expires_at > now()
+    RETURNING quantity, event_id
+""")
+
+@timed
+async def confirm_hold(pool: Pool, booking_id: str):
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            stmt = await conn.prepared(CONFIRM_HOLD)
+            row = await stmt.fetchrow(booking_id)
+            if not row:
+                raise Exception('CANNOT_CONFIRM')
+
+            audit = [(booking_id, 'CONFIRM', {'quantity': row['quantity']})]
+            await _audit_in_tx(conn, audit)
+
+            stmt = await conn.prepared(ADD_BOOKED_STATS)
+            await stmt.execute(row['event_id'], row['quantity'])
+        await _audit_after_commit(conn, audit)
+        return {'id': booking_id, 'event_id': row['event_id'], 'status': 'CONFIRMED'}
+
+RELEASE_HOLD = register('release_hold', """
+    UPDATE bookings
+    SET status = 'CANCELLED', expires_at = NULL, updated_at = now()
+    WHERE id=$1 AND status='PENDING'
+    RETURNING quantity, event_id
+""")
+
+@timed
+async def release_hold(pool: Pool, booking_id: str):
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            stmt = await conn.prepared(RELEASE_HOLD)
+            row = await stmt.fetchrow(booking_id)
+            if not row:
+                raise Exception('CANNOT_RELEASE')
+
+            stmt = await conn.prepared(RELEASE_SEATS)
+            await stmt.execute(row['quantity'], row['event_id'])
+
+            audit = [(booking_id, 'RELEASE', {'quantity': row['quantity']})]
+            await _audit_in_tx(conn, audit)
+        await _audit_after_commit(conn, audit)
+        return {'id': booking_id, 'event_id': row['event_id'], 'released_quantity': row['quantity']}
+
+@timed
+async def expire_holds(pool: Pool, batch_size: int) -> list:
+    """
+    Release up to `batch_size` expired holds in one transaction, in three statements.
+
+    Expired PENDING bookings are claimed with SKIP LOCKED (so several workers can
+    sweep at once), cancelled and audited (per AUDIT_LOG_MODE) in one statement. Inventory is then
+    given back per event, with rows locked in event_id order so the sweeper cannot
+    deadlock with batch bookings.
+
+    Returns:
+        list: (event_id, released seats, released holds) per affected event.
+    """
+    mode = settings.AUDIT_LOG_MODE
+    outbox = ", audit_pending = array_append(b.audit_pending, 'EXPIRE')" if mode == 'outbox' else ''
+    audit = """, audit AS (
+                    INSERT INTO booking_events (booking_id, event_type, event_payload)
+                    SELECT id, 'EXPIRE', jsonb_build_object('quantity', quantity)
+                    FROM released
+                )""" if mode == 'sync' else ''
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            released = await conn.fetch(f"""
+                WITH expired AS (
+                    SELECT id FROM bookings
+                    WHERE status = 'PENDING' AND expires_at <= now()
+                    ORDER BY expires_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                ), released AS (
+                    UPDATE bookings b
+                    SET status = 'CANCELLED', expires_at = NULL, updated_at = now(){outbox}
+                    FROM expired
+                    WHERE b.id = expired.id
+                    RETURNING b.id, b.event_id, b.quantity
+                ){audit}
+                SELECT event_id, SUM(quantity)::int AS quantity, count(*) AS holds,
+                       array_agg(id) AS booking_ids, array_agg(quantity) AS quantities
+                FROM released
+                GROUP BY event_id
+                ORDER BY event_id
+            """, batch_size)
+            if not released:
+                return []
 
+            event_ids = [r['event_id'] for r in released]
             await conn.execute("""
-                INSERT INTO booking_events (booking_id, event_type, event_payload)
-                VALUES ($1, 'CANCEL', $2::jsonb)
-            """, booking_id, json.dumps({'quantity': qty}))
+                SELECT 1 FROM event_inventory
+                WHERE event_id = ANY($1::uuid[])
+                ORDER BY event_id
+                FOR UPDATE
+            """, event_ids)
+            await conn.execute("""
+                UPDATE event_inventory ei
+                SET seats_available = ei.seats_available + d.quantity,
+                    seats_reserved = ei.seats_reserved - d.quantity,
+                    version = ei.version + 1
+                FROM unnest($1::uuid[], $2::int[]) AS d(event_id, quantity)
+                WHERE ei.event_id = d.event_id
+            """, event_ids, [r['quantity'] for r in released])
+        await _audit_after_commit(conn, [(booking_id, 'EXPIRE', {'quantity': quantity})
+                                         for r in released
+                                         for booking_id, quantity in zip(r['booking_ids'], r['quantities'])])
+        return [(r['event_id'], r['quantity'], r['holds']) for r in released]
 
-            # <-- FIXED: refresh without CONCURRENTLY
-            await conn.execute("REFRESH MATERIALIZED VIEW mv_event_booking_stats")
-            return {'id': str(booking_id), 'event_id': str(event_id), 'cancelled_quantity': qty}
+# ------------------- WAITLIST -------------------
 
-async def get_user_bookings(pool: Pool, user_id: str):
+@timed
+async def join_waitlist(pool: Pool, event_id: str, user_id: str, quantity: int):
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT id, user_id, event_id, quantity, status, created_at
-            FROM bookings
-            WHERE user_id=$1
-            ORDER BY created_at DESC
-        """, user_id)
-        bookings = []
-        for r in rows:
-            booking = dict(r)
-            booking["id"] = str(booking["id"])
-            booking["user_id"] = str(booking["user_id"])
-            booking["event_id"] = str(booking["event_id"])
-            bookings.append(booking)
-        return bookings
+        try:
+            row = await conn.fetchrow("""
+                INSERT INTO waitlist (event_id, user_id, quantity)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (event_id, user_id) DO UPDATE SET quantity = EXCLUDED.quantity
+                RETURNING id, event_id, user_id, quantity, joined_at
+            """, event_id, user_id, quantity)
+        except ForeignKeyViolationError:
+            raise Exception('NOT_FOUND')
+        return dict(row)
+
+@timed
+async def leave_waitlist(pool: Pool, event_id: str, user_id: str):
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            DELETE FROM waitlist
+            WHERE event_id = $1 AND user_id = $2
+            RETURNING id, event_id, user_id, quantity, joined_at
+        """, event_id, user_id)
+        return _record(row)
+
+@timed
+async def events_with_promotable_waitlist(pool: Pool):
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f"""
+            SELECT ei.event_id
+            FROM event_inventory ei
+            WHERE (ei.seats_available > 0 OR ei.shard_count > 0)
+              AND EXISTS (SELECT 1 FROM waitlist w WHERE w.event_id = ei.event_id)
+              AND {_INVENTORY_SEATS_AVAILABLE} > 0
+        """)
+        return [r['event_id'] for r in rows]
+
+@timed
+async def promote_waitlist(pool: Pool, event_id: str, batch_size: int, hold_ttl_seconds: Optional[float] = None):
+    """
+    Turn the head of an event's waitlist into bookings while seats are free.
+
+    Entries are promoted in strict FIFO `joined_at` order: promotion stops at the
+    first entry that does not fit. Promoted users get a hold (PENDING booking
+    expiring after `hold_ttl_seconds`), or a CONFIRMED booking if no TTL is given.
+    The inventory (shards, then the main row) is locked before the waitlist rows
+    are claimed with SKIP LOCKED, so promoters in several workers can run at once.
+    Seats are taken from the main row first, then from the shards of a sharded
+    event; the promoted bookings belong to the main row.
+
+    Returns:
+        list: promoted bookings as dicts (id, user_id, quantity, status).
+    """
+    async with pool.acquire() as conn:
+        # cheap lock-free check first: most notifications are for events whose
+        # waitlist is empty or that have no free seats
+        promotable = await conn.fetchval(f"""
+            SELECT EXISTS (SELECT 1 FROM waitlist w WHERE w.event_id = ei.event_id)
+                   AND {_INVENTORY_SEATS_AVAILABLE} > 0
+            FROM event_inventory ei
+            WHERE ei.event_id = $1
+        """, event_id)
+        if not promotable:
+            return []
 
+        async with conn.transaction():
+            main_available, shards = await _lock_inventory(conn, event_id)
+            if main_available is None:
+                return []
+            remaining = main_available + sum(r['seats_available'] for r in shards)
+            entries = await conn.fetch("""
+                SELECT id, user_id, quantity
+                FROM waitlist
+                WHERE event_id = $1
+                ORDER BY joined_at, id
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            """, event_id, batch_size)
+
+            promoted = []
+            for entry in entries:
+                if entry['quantity'] > remaining:
+                    break
+                remaining -= entry['quantity']
+                promoted.append(entry)
+            if not promoted:
+                return []
+
+            status = 'PENDING' if hold_ttl_seconds else 'CONFIRMED'
+            booking_ids = [str(uuid.uuid4()) for _ in promoted]
+            user_ids = [e['user_id'] for e in promoted]
+            quantities = [e['quantity'] for e in promoted]
+            total = sum(quantities)
+
+            await conn.execute("DELETE FROM waitlist WHERE id = ANY($1::uuid[])", [e['id'] for e in promoted])
+            await _take_locked(conn, event_id, total, main_available, shards)
+
+            await conn.execute("""
+                INSERT INTO bookings (id, user_id, event_id, quantity, status, expires_at)
+                SELECT b.id, b.user_id, $4, b.quantity, $5::booking_status,
+                       CASE WHEN $6::float8 IS NULL THEN NULL ELSE now() + make_interval(secs => $6::float8) END
+                FROM unnest($1::uuid[], $2::uuid[], $3::int[]) AS b(id, user_id, quantity)
+            """, booking_ids, user_ids, quantities, event_id, status,
+                float(hold_ttl_seconds) if hold_ttl_seconds else None)
+
+            event_type = 'HOLD' if status == 'PENDING' else 'BOOK'
+            audit = [(b, event_type, {'quantity': q, 'user_id': u, 'event_id': event_id, 'waitlist': True})
+                     for b, u, q in zip(booking_ids, user_ids, quantities)]
+            await _audit_in_tx(conn, audit)
+
+            if status == 'CONFIRMED':
+                stmt = await conn.prepared(ADD_BOOKED_STATS)
+                await stmt.execute(event_id, total)
+
+        await _audit_after_commit(conn, audit)
+        return [{'id': b, 'user_id': u, 'quantity': q, 'status': status}
+                for b, u, q in zip(booking_ids, user_ids, quantities)]
+
+USER_BOOKINGS_BEFORE = register('user_bookings_before', """
+    SELECT id, user_id, event_id, quantity, status, created_at
+    FROM bookings
+    WHERE user_id=$1 AND (created_at, id) < ($3, $4::uuid)
+    ORDER BY created_at DESC, id DESC
+    LIMIT $2
+""")
+
+USER_BOOKINGS = register('user_bookings', """
+    SELECT id, user_id, event_id, quantity, status, created_at
+    FROM bookings
+    WHERE user_id=$1
+    ORDER BY created_at DESC, id DESC
+    LIMIT $2
+""")
+
+@timed
+async def get_user_bookings(pool: Pool, user_id: str, limit: int = 50, before: Optional[tuple] = None):
+    async with pool.acquire() as conn:
+        if before:
+            stmt = await conn.prepared(USER_BOOKINGS_BEFORE)
+            rows = await stmt.fetch(user_id, limit, before[0], before[1])
+        else:
+            stmt = await conn.prepared(USER_BOOKINGS)
+            rows = await stmt.fetch(user_id, limit)
+        return _records(rows)
+
+@timed
 async def admin_event_stats(pool: Pool):
     async with pool.acquire() as conn:
         rows = await conn.fetch("""
-            SELECT event_id, name, capacity, total_booked, utilization
-            FROM mv_event_booking_stats
+            SELECT e.id AS event_id, e.name, e.capacity,
+                   COALESCE(s.total_booked, 0) + COALESCE(sh.total_booked, 0) AS total_booked,
+                   CASE WHEN e.capacity > 0
+                        THEN (COALESCE(s.total_booked, 0) + COALESCE(sh.total_booked, 0))::float / e.capacity
+                   END AS utilization
+            FROM events e
+            LEFT JOIN event_booking_stats s ON s.event_id = e.id
+            LEFT JOIN (
+                SELECT event_id, sum(total_booked)::bigint AS total_booked
+                FROM event_inventory_shards
+                GROUP BY event_id
+            ) sh ON sh.event_id = e.id
             ORDER BY total_booked DESC NULLS LAST
         """)
-        return [dict(r) for r in rows]
+        return _records(rows)
+
+# ------------------- ROLLUPS -------------------
+
+ROLLUP_TABLES = {'minute': 'booking_rollups_minute', 'hour': 'booking_rollups_hour'}
+
+_ROLLUP_UPSERT = """
+    INSERT INTO {table} AS r (event_id, bucket, bookings, tickets_booked, cancellations,
+                              tickets_cancelled, holds, holds_released)
+    SELECT event_id, date_trunc('{unit}', created_at, 'UTC'), sum(bookings), sum(tickets_booked),
+           sum(cancellations), sum(tickets_cancelled), sum(holds), sum(holds_released)
+    FROM activity
+    GROUP BY 1, 2
+    ON CONFLICT (event_id, bucket) DO UPDATE
+    SET bookings = r.bookings + EXCLUDED.bookings,
+        tickets_booked = r.tickets_booked + EXCLUDED.tickets_booked,
+        cancellations = r.cancellations + EXCLUDED.cancellations,
+        tickets_cancelled = r.tickets_cancelled + EXCLUDED.tickets_cancelled,
+        holds = r.holds + EXCLUDED.holds,
+        holds_released = r.holds_released + EXCLUDED.holds_released
+"""
+
+@timed
+async def advance_booking_rollups(pool: Pool, batch_size: int, lag_seconds: float) -> Optional[int]:
+    """
+    Fold the next `batch_size` booking_events past the watermark into the minute and hour rollups.
+
+    booking_events ids are assigned before commit, so a lower id can become
+    visible after a higher one. The batch therefore stops at the first event
+    younger than `lag_seconds`: rows of transactions still in flight are picked
+    up by a later run instead of being skipped by the watermark. The watermark
+    row is taken with SKIP LOCKED, so only one worker advances it at a time.
+
+    Returns:
+        int: number of booking_events folded (None if another worker holds the watermark).
+    """
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            last_id = await conn.fetchval("""
+                SELECT last_id FROM rollup_watermarks
+                WHERE name = 'booking_events'
+                FOR UPDATE SKIP LOCKED
+            """)
+            if last_id is None:
+                return None
+            row = await conn.fetchrow(f"""
+                WITH candidates AS (
+                    SELECT id, booking_id, event_type, created_at,
+                           created_at > now() - make_interval(secs => $3) AS recent
+                    FROM booking_events
+                    WHERE id > $1
+                    ORDER BY id
+                    LIMIT $2
+                ), batch AS (
+                    SELECT c.id, c.booking_id, c.event_type, c.created_at
+                    FROM candidates c
+                    WHERE NOT EXISTS (SELECT 1 FROM candidates r WHERE r.recent AND r.id <= c.id)
+                ), activity AS (
+                    SELECT b.event_id, batch.created_at,
+                           (batch.event_type IN ('BOOK', 'CONFIRM'))::int AS bookings,
+                           CASE WHEN batch.event_type IN ('BOOK', 'CONFIRM') THEN b.quantity ELSE 0 END
+                               AS tickets_booked,
+                           (batch.event_type = 'CANCEL')::int AS cancellations,
+                           CASE WHEN batch.event_type = 'CANCEL' THEN b.quantity ELSE 0 END AS tickets_cancelled,
+                           (batch.event_type = 'HOLD')::int AS holds,
+                           (batch.event_type IN ('RELEASE', 'EXPIRE'))::int AS holds_released
+                    FROM batch
+                    JOIN bookings b ON b.id = batch.booking_id
+                    WHERE b.event_id IS NOT NULL
+                ), minute AS ({_ROLLUP_UPSERT.format(table='booking_rollups_minute', unit='minute')}
+                ), hour AS ({_ROLLUP_UPSERT.format(table='booking_rollups_hour', unit='hour')}
+                )
+                SELECT count(*) AS folded, max(id) AS last_id FROM batch
+            """, last_id, batch_size, lag_seconds)
+            if row['folded']:
+                await conn.execute("""
+                    UPDATE rollup_watermarks
+                    SET last_id = $1, updated_at = now()
+                    WHERE name = 'booking_events'
+                """, row['last_id'])
+            return row['folded']
+
+@timed
+async def prune_minute_rollups(pool: Pool, retention_days: int) -> int:
+    async with pool.acquire() as conn:
+        result = await conn.execute("""
+            DELETE FROM booking_rollups_minute
+            WHERE bucket < now() - make_interval(days => $1)
+        """, retention_days)
+        return int(result.split()[-1])
+
+@timed
+async def booking_timeseries(pool: Pool, granularity: str, start: datetime, end: datetime,
+                             event_id: Optional[str] = None, limit: int = 10000):
+    """
+    Booking activity per `granularity` bucket in [start, end), for one event or summed over all events.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f"""
+            SELECT bucket,
+                   sum(bookings)::bigint AS bookings,
+                   sum(tickets_booked)::bigint AS tickets_booked,
+                   sum(cancellations)::bigint AS cancellations,
+                   sum(tickets_cancelled)::bigint AS tickets_cancelled,
+                   sum(holds)::bigint AS holds,
+                   sum(holds_released)::bigint AS holds_released
+            FROM {ROLLUP_TABLES[granularity]}
+            WHERE bucket >= $1 AND bucket < $2 AND ($3::uuid IS NULL OR event_id = $3::uuid)
+            GROUP BY bucket
+            ORDER BY bucket
+            LIMIT $4
+        """, start, end, event_id, limit)
+        return _records(rows)
+
+@timed
+async def booking_velocity(pool: Pool, window_minutes: int, limit: int = 50):
+    """
+    Sales velocity and cancellation rate per event over the last `window_minutes`,
+    fastest-selling events first.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT r.event_id, e.name,
+                   sum(r.bookings)::bigint AS bookings,
+                   sum(r.tickets_booked)::bigint AS tickets_booked,
+                   sum(r.cancellations)::bigint AS cancellations,
+                   sum(r.tickets_cancelled)::bigint AS tickets_cancelled,
+                   sum(r.tickets_booked)::float / $1::int AS tickets_per_minute,
+                   CASE WHEN sum(r.tickets_booked) > 0
+                        THEN sum(r.tickets_cancelled)::float / sum(r.tickets_booked)
+                   END AS cancellation_rate
+            FROM booking_rollups_minute r
+            JOIN events e ON e.id = r.event_id
+            WHERE r.bucket >= now() - make_interval(mins => $1::int)
+            GROUP BY r.event_id, e.name
+            ORDER BY tickets_booked DESC, r.event_id
+            LIMIT $2
+        """, window_minutes, limit)
+        return _records(rows)
+
+# ------------------- EXPORTS -------------------
+
+# Full-table exports filtered by a `since` watermark (NULL exports everything).
+# Bookings use updated_at so cancellations show up in incremental pulls.
+EXPORT_QUERIES = {
+    'bookings': """
+        SELECT id, user_id, event_id, quantity, status, idempotency_key, created_at, updated_at
+        FROM bookings
+        WHERE $1::timestamptz IS NULL OR updated_at >= $1::timestamptz
+    """,
+    'users': """
+        SELECT id, email, name, created_at
+        FROM users
+        WHERE $1::timestamptz IS NULL OR created_at >= $1::timestamptz
+    """,
+    'booking_events': """
+        SELECT id, booking_id, event_type, event_payload, created_at
+        FROM booking_events
+        WHERE $1::timestamptz IS NULL OR created_at >= $1::timestamptz
+    """,
+}
+
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def export_ndjson(pool: Pool, dataset: str, since: Optional[datetime] = None):
+    """
+    Stream a dataset as NDJSON bytes using a server-side cursor.
+
+    Only EXPORT_FETCH_SIZE rows are held in memory at a time.
+    """
+    query = EXPORT_QUERIES[dataset]
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            lines = []
+            async for record in conn.cursor(query, since, prefetch=EXPORT_FETCH_SIZE):
+                row = dict(record)
+                if isinstance(row.get('event_payload'), str):
+                    row['event_payload'] = json.loads(row['event_payload'])
+                lines.append(json.dumps(row, default=_json_default))
+                if len(lines) >= EXPORT_FETCH_SIZE:
+                    yield ('\n'.join(lines) + '\n').encode()
+                    lines = []
+            if lines:
+                yield ('\n'.join(lines) + '\n').encode()
+
+
+async def export_csv(pool: Pool, dataset: str, since: Optional[datetime] = None):
+    """
+    Stream a dataset as CSV bytes using `COPY ... TO STDOUT`.
+
+    COPY output is buffered into chunks of about EXPORT_CHUNK_BYTES and handed over
+    through a small bounded queue, so a slow client applies backpressure to the
+    COPY instead of letting rows pile up in memory.
+    """
+    query = EXPORT_QUERIES[dataset]
+    queue = asyncio.Queue(maxsize=4)
+    buffer = bytearray()
+
+    async def collect(data):
+        buffer.extend(data)
+        if len(buffer) >= EXPORT_CHUNK_BYTES:
+            await queue.put(bytes(buffer))
+            buffer.clear()
+
+    async def produce():
+        try:
+            async with pool.acquire() as conn:
+                await conn.copy_from_query(query, since, output=collect, format='csv', header=True)
+            if buffer:
+                await queue.put(bytes(buffer))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        # re-raise a COPY failure instead of ending the stream silently
+        await task
+    finally:
+        task.cancel()
@@ -2,46 +2,177 @@
 Database connection pool and initialization utilities for Evently.
 """
 
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import Optional
+
 import asyncpg
-from pathlib import Path
 from .config import settings
+from .migrate import migrate_database
+from .statements import STATEMENTS, EventlyConnection, init_connection
+from .metrics import (DB_POOL_ACQUIRE_SECONDS, DB_POOL_ACQUIRE_TIMEOUTS, DB_POOL_IN_USE, DB_POOL_MAX_SIZE,
+                      DB_POOL_SIZE)
+
+logger = logging.getLogger(__name__)
 
 _pool = None
+_read_pool = None
+
+# asyncpg pools by name, read by the pool gauges at scrape time
+_open_pools = {}
+DB_POOL_SIZE.collect_from(lambda: {(name,): p.get_size() for name, p in _open_pools.items()})
+DB_POOL_IN_USE.collect_from(lambda: {(name,): p.get_size() - p.get_idle_size() for name, p in _open_pools.items()})
+DB_POOL_MAX_SIZE.collect_from(lambda: {(name,): p.get_max_size() for name, p in _open_pools.items()})
+
+
+class _TimedAcquire:
+    def __init__(self, context, labels: tuple, waiting: dict):
+        self._context = context
+        self._labels = labels
+        self._waiting = waiting
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        self._waiting[self] = started
+        try:
+            conn = await self._context.__aenter__()
+        except asyncio.TimeoutError:
+            DB_POOL_ACQUIRE_TIMEOUTS.inc(*self._labels)
+            raise
+        finally:
+            del self._waiting[self]
+        DB_POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - started, *self._labels)
+        return conn
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+
+class InstrumentedPool:
+    """
+    Thin proxy over an asyncpg pool that records how long `acquire()` waits.
+
+    `acquire()` uses the pool's configured acquire timeout unless one is given.
+    Everything else (`close`, `fetch`, `get_size`, ...) is passed through to the
+    wrapped pool. Size gauges are read from the pool at scrape time.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, name: str, acquire_timeout: Optional[float] = None):
+        self._pool = pool
+        self._labels = (name,)
+        self.acquire_timeout = acquire_timeout
+        # acquires still waiting for a connection, oldest first
+        self._waiting = {}
+        _open_pools[name] = pool
+
+    def acquire(self, *, timeout=None):
+        if timeout is None:
+            timeout = self.acquire_timeout
+        return _TimedAcquire(self._pool.acquire(timeout=timeout), self._labels, self._waiting)
+
+    def oldest_wait(self) -> float:
+        """
+        Seconds the longest-waiting `acquire()` has been waiting so far (0 when none waits).
+        """
+        for started in self._waiting.values():
+            return time.perf_counter() - started
+        return 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+async def create_pool(dsn: str, min_size: int, max_size: int, **kwargs) -> asyncpg.Pool:
+    """
+    Create an asyncpg pool of `EventlyConnection`s (UUID codec + registered queries, prepared when the pool has a statement cache).
+
+    Every pool whose connections are passed to `crud` must be created here.
+    """
+    statement_cache_size = kwargs.get('statement_cache_size', 100)
+    if 0 < statement_cache_size < len(STATEMENTS):
+        logger.warning("statement cache (%d) smaller than the %d registered statements",
+                       statement_cache_size, len(STATEMENTS))
+    return await asyncpg.create_pool(dsn=dsn, min_size=min_size, max_size=max_size,
+                                     connection_class=EventlyConnection,
+                                     init=partial(init_connection, statement_cache_size=statement_cache_size),
+                                     **kwargs)
+
+
+async def _create_pool(name: str, dsn: str, min_size: int, max_size: int, statement_cache_size: int,
+                       max_inactive_lifetime: float, acquire_timeout: Optional[float]) -> InstrumentedPool:
+    # asyncpg opens `min_size` connections (running the init hook, which prepares
+    # the registered statements) before returning, so the pool is warm
+    pool = await create_pool(dsn, min_size, max_size,
+                             statement_cache_size=statement_cache_size,
+                             max_inactive_connection_lifetime=max_inactive_lifetime)
+    return InstrumentedPool(pool, name, acquire_timeout)
 
 
 async def init_pool():
     """
-    Initialize a global asyncpg connection pool.
+    Initialize the global write pool (primary database).
+
+    Every write and every read that must see its own writes goes through this pool.
 
     Returns:
-        asyncpg.pool.Pool: The created connection pool.
+        InstrumentedPool: The created connection pool (an asyncpg pool with acquire timing).
     """
     global _pool
     if _pool is None:
-        _pool = await asyncpg.create_pool(dsn=settings.DATABASE_URL, min_size=1, max_size=10)
+        _pool = await _create_pool(
+            'write', settings.DATABASE_URL,
+            settings.DB_WRITE_POOL_MIN_SIZE, settings.DB_WRITE_POOL_MAX_SIZE,
+            settings.DB_WRITE_POOL_STATEMENT_CACHE_SIZE, settings.DB_WRITE_POOL_MAX_INACTIVE_LIFETIME,
+            settings.DB_WRITE_POOL_ACQUIRE_TIMEOUT)
     return _pool
 
 
+async def init_read_pool():
+    """
+    Initialize the global read pool.
+
+    Read-only endpoints (listings, analytics, exports) use it so they cannot take
+    connections away from bookings. It connects to DATABASE_REPLICA_URL when set,
+    otherwise to the primary.
+
+    Returns:
+        InstrumentedPool: The created connection pool.
+    """
+    global _read_pool
+    if _read_pool is None:
+        _read_pool = await _create_pool(
+            'read', settings.DATABASE_REPLICA_URL or settings.DATABASE_URL,
+            settings.DB_READ_POOL_MIN_SIZE, settings.DB_READ_POOL_MAX_SIZE,
+            settings.DB_READ_POOL_STATEMENT_CACHE_SIZE, settings.DB_READ_POOL_MAX_INACTIVE_LIFETIME,
+            settings.DB_READ_POOL_ACQUIRE_TIMEOUT)
+    return _read_pool
+
+
 async def close_pool():
     """
-    Close the global connection pool and release resources.
+    Close the global connection pools and release resources.
     """
-    global _pool
-    if _pool is not None:
-        await _pool.close()
-        _pool = None
+    global _pool, _read_pool
+    for pool in (_pool, _read_pool):
+        if pool is not None:
+            await pool.close()
+    _open_pools.clear()
+    _pool = None
+    _read_pool = None
 
 
 async def init_db_from_migration():
     """
-    Run the initial migration (001_init.sql) to create the database schema.
+    Apply pending SQL migrations from `migrations/` (see `app.migrate`).
 
-    Executes the SQL file only if INIT_DB is set to True in settings.
+    Runs only if INIT_DB is set to True in settings. When the schema is already
+    up to date this is a single query; when several workers start at once, an
+    advisory lock lets exactly one of them migrate.
     """
     if not settings.INIT_DB:
         return
-    pool = await init_pool()
-    path = Path(__file__).parent.parent / 'migrations' / '001_init.sql'
-    sql = path.read_text()
-    async with pool.acquire() as conn:
-        await conn.execute(sql)
+    # a dedicated connection: pooled connections prepare statements against the
+    # schema, so the pools are created after the migrations have run
+    await migrate_database(settings.DATABASE_URL)
@@ -0,0 +1,41 @@
+"""
+Expiry sweeper for temporary seat holds.
+
+Holds are PENDING bookings with an `expires_at`. A periodic task releases expired
+holds in batches through `crud.expire_holds` (a fixed number of statements per
+batch, never one round trip per hold) and keeps going until the backlog is
+drained, so it keeps up with very large numbers of open holds during flash sales.
+"""
+
+from asyncpg import Pool
+from .cache import event_cache
+from .config import settings
+from .crud import expire_holds
+from .tasks import PeriodicTask
+
+
+async def sweep_expired_holds(pool: Pool) -> int:
+    """
+    Release every expired hold, HOLD_SWEEP_BATCH_SIZE at a time.
+
+    Returns:
+        int: number of holds released.
+    """
+    total = 0
+    while True:
+        released = await expire_holds(pool, settings.HOLD_SWEEP_BATCH_SIZE)
+        holds = sum(count for _, _, count in released)
+        for event_id, _, _ in released:
+            event_cache.invalidate(event_id)
+        total += holds
+        if holds < settings.HOLD_SWEEP_BATCH_SIZE:
+            return total
+
+
+def hold_sweeper(pool: Pool) -> PeriodicTask:
+    """
+    Build the periodic task that releases expired holds.
+    """
+    async def run():
+        await sweep_expired_holds(pool)
+    return PeriodicTask('hold-sweeper', settings.HOLD_SWEEP_INTERVAL_SECONDS, run)
@@ -0,0 +1,201 @@
+"""
+Idempotency store for bookings.
+
+The first request with a given key claims it in `idempotency_keys` and records
+its full response in the same transaction as the booking. Retries replay that
+stored response. The check, the claim and the replay lookup happen in one
+`INSERT ... ON CONFLICT` statement. A small in-memory LRU in front of the table
+absorbs hot retry storms without touching the database. Expired keys are
+deleted in batches by a periodic GC task.
+"""
+
+import json
+from typing import Optional
+
+from asyncpg import Pool
+from .cache import TTLCache
+from .config import settings
+from .metrics import CACHE_HITS, CACHE_MISSES, CONTENTION
+from .statements import register
+from .tasks import PeriodicTask
+
+GC_BATCH_SIZE = 5000
+
+# Responses recorded by this worker (or replayed to it), keyed by idempotency key
+idempotency_cache = TTLCache(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_SECONDS)
+CACHE_HITS.collect_from(lambda: {('idempotency',): idempotency_cache.hits})
+CACHE_MISSES.collect_from(lambda: {('idempotency',): idempotency_cache.misses})
+
+
+CLAIM_IDEMPOTENCY_KEY = register('claim_idempotency_key', """
+    WITH claim AS (
+        INSERT INTO idempotency_keys (key, expires_at)
+        VALUES ($1, now() + make_interval(secs => $2))
+        ON CONFLICT (key) DO UPDATE
+        SET expires_at = EXCLUDED.expires_at, response = NULL, booking_id = NULL,
+            created_at = now()
+        WHERE idempotency_keys.expires_at < now()
+        RETURNING key
+    )
+    SELECT EXISTS (SELECT 1 FROM claim) AS claimed,
+           (SELECT response FROM idempotency_keys WHERE key = $1) AS response
+""")
+
+IDEMPOTENT_RESPONSE = register('idempotent_response', """
+    SELECT response FROM idempotency_keys WHERE key = $1
+""")
+
+STORE_IDEMPOTENT_RESPONSE = register('store_idempotent_response', """
+    UPDATE idempotency_keys
+    SET booking_id = $2, response = $3::jsonb
+    WHERE key = $1
+""")
+
+
+async def claim_idempotency_key(conn, key: str) -> Optional[dict]:
+    """
+    Claim `key` for the current transaction, or return the response already stored for it.
+
+    Must be called inside the transaction that performs the booking, so the claim
+    disappears if the booking fails. An expired key can be claimed again.
+
+    Returns:
+        Optional[dict]: None if the key was claimed (caller proceeds with the booking),
+            otherwise the original response to replay.
+
+    Raises:
+        Exception('IDEMPOTENCY_CONFLICT'): if the key is claimed but has no response yet.
+    """
+    stmt = await conn.prepared(CLAIM_IDEMPOTENCY_KEY)
+    row = await stmt.fetchrow(key, float(settings.IDEMPOTENCY_TTL_SECONDS))
+    if row['claimed']:
+        return None
+    response = row['response']
+    if response is None:
+        # the conflicting request committed while this statement waited on it;
+        # its row is not in our statement snapshot, so look again
+        stmt = await conn.prepared(IDEMPOTENT_RESPONSE)
+        response = await stmt.fetchval(key)
+        if response is None:
+            CONTENTION.inc('idempotency_conflict')
+            raise Exception('IDEMPOTENCY_CONFLICT')
+    return json.loads(response)
+
+
+async def store_idempotent_response(conn, key: str, booking_id: str, response: dict):
+    """
+    Record the response for a key claimed by `claim_idempotency_key`.
+    """
+    stmt = await conn.prepared(STORE_IDEMPOTENT_RESPONSE)
+    await stmt.execute(key, booking_id, json.dumps(response))
+
+
+async def claim_idempotency_keys(conn, keys: list) -> dict:
+    """
+    Set-based variant of `claim_idempotency_key` for a list of distinct keys.
+
+    Returns:
+        dict: key -> None if claimed, the stored response (dict) to replay, or
+            the string 'IDEMPOTENCY_CONFLICT' if another request holds the key.
+    """
+    rows = await conn.fetch("""
+        WITH claim AS (
+            INSERT INTO idempotency_keys (key, expires_at)
+            SELECT k, now() + make_interval(secs => $2)
+            FROM unnest($1::text[]) AS k
+            ON CONFLICT (key) DO UPDATE
+            SET expires_at = EXCLUDED.expires_at, response = NULL, booking_id = NULL,
+                created_at = now()
+            WHERE idempotency_keys.expires_at < now()
+            RETURNING key
+        )
+        SELECT k.key, c.key IS NOT NULL AS claimed, ik.response
+        FROM unnest($1::text[]) AS k(key)
+        LEFT JOIN claim c ON c.key = k.key
+        LEFT JOIN idempotency_keys ik ON ik.key = k.key
+    """, keys, float(settings.IDEMPOTENCY_TTL_SECONDS))
+    claims = {}
+    pending = []
+    for row in rows:
+        if row['claimed']:
+            claims[row['key']] = None
+        elif row['response'] is not None:
+            claims[row['key']] = json.loads(row['response'])
+        else:
+            pending.append(row['key'])
+    if pending:
+        # committed by a concurrent request while the claim waited on it
+        for row in await conn.fetch("SELECT key, response FROM idempotency_keys WHERE key = ANY($1::text[])", pending):
+            if row['response'] is not None:
+                claims[row['key']] = json.loads(row['response'])
+        for key in pending:
+            if key not in claims:
+                CONTENTION.inc('idempotency_conflict')
+                claims[key] = 'IDEMPOTENCY_CONFLICT'
+    return claims
+
+
+async def store_idempotent_responses(conn, keys: list, booking_ids: list, responses: list):
+    """
+    Set-based variant of `store_idempotent_response`.
+    """
+    await conn.execute("""
+        UPDATE idempotency_keys k
+        SET booking_id = r.booking_id, response = r.response::jsonb
+        FROM unnest($1::text[], $2::uuid[], $3::text[]) AS r(key, booking_id, response)
+        WHERE k.key = r.key
+    """, keys, booking_ids, [json.dumps(r) for r in responses])
+
+
+async def release_idempotency_keys(conn, keys: list):
+    """
+    Drop keys claimed by `claim_idempotency_keys` whose items failed.
+
+    Must be called in the claiming transaction, so a retry of a failed item can
+    claim its key again instead of getting IDEMPOTENCY_CONFLICT until it expires.
+    """
+    await conn.execute("""
+        DELETE FROM idempotency_keys
+        WHERE key = ANY($1::text[]) AND response IS NULL
+    """, keys)
+
+
+async def purge_expired_idempotency_keys(pool: Pool) -> int:
+    """
+    Delete expired keys in batches of GC_BATCH_SIZE.
+
+    Rows locked by another worker's GC are skipped, so several workers can run
+    this at the same time.
+
+    Returns:
+        int: number of keys deleted.
+    """
+    deleted = 0
+    async with pool.acquire() as conn:
+        while True:
+            count = await conn.fetchval("""
+                WITH expired AS (
+                    SELECT key FROM idempotency_keys
+                    WHERE expires_at < now()
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                ), gone AS (
+                    DELETE FROM idempotency_keys k
+                    USING expired
+                    WHERE k.key = expired.key
+                    RETURNING 1
+                )
+                SELECT count(*) FROM gone
+            """, GC_BATCH_SIZE)
+            deleted += count
+            if count < GC_BATCH_SIZE:
+                return deleted
+
+
+def idempotency_gc(pool: Pool) -> PeriodicTask:
+    """
+    Build the periodic task that purges expired idempotency keys.
+    """
+    async def run():
+        await purge_expired_idempotency_keys(pool)
+    return PeriodicTask('idempotency-gc', settings.IDEMPOTENCY_GC_INTERVAL_SECONDS, run)
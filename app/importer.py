@@ -0,0 +1,177 @@
+"""
+Bulk event import for Evently.
+
+Season schedules (CSV with a header row, or NDJSON) are parsed and validated
+against `schemas.EventCreate` one record at a time while streaming. Valid rows are
+loaded in batches with `crud.import_events_batch` (COPY into a staging table, then
+set-based inserts into `events` and `event_inventory`). Invalid rows are reported
+with their record number and do not stop the import. When the database rejects a
+batch (e.g. a value Postgres cannot store), its rows are loaded one by one, so
+only the offending rows are reported and the rest of the import goes on.
+
+Usage (CLI):
+    python -m app.importer season.csv
+    python -m app.importer season.ndjson --format ndjson
+"""
+
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+import asyncpg
+from pydantic import ValidationError
+from .config import settings
+from .crud import import_events_batch
+from .db import create_pool
+from .schemas import EventCreate
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+OPTIONAL_FIELDS = ('venue', 'description', 'end_time')
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]):
+    """
+    Split a stream of UTF-8 byte chunks into text lines (line endings kept).
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+async def _csv_records(lines: AsyncIterator[str]):
+    header = None
+    block = []
+    quotes = 0
+    async for line in lines:
+        block.append(line)
+        quotes += line.count('"')
+        # an odd number of quotes means a quoted field continues on the next line
+        if quotes % 2:
+            continue
+        for values in csv.reader(block):
+            if header is None:
+                header = [h.strip() for h in values]
+            elif values:
+                yield dict(zip(header, values))
+        block = []
+        quotes = 0
+    if block:
+        for values in csv.reader(block):
+            if header is not None and values:
+                yield dict(zip(header, values))
+
+
+async def _ndjson_records(lines: AsyncIterator[str]):
+    async for line in lines:
+        if line.strip():
+            yield line
+
+
+def _validate(record) -> dict:
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError('record must be an object')
+    # CSV has no null: empty optional cells mean "not set"
+    for field in OPTIONAL_FIELDS:
+        if record.get(field) == '':
+            record[field] = None
+        record.setdefault(field, None)
+    return EventCreate(**record).model_dump()
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return '; '.join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def _reject(report: dict, row: int, error: Exception):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': row, 'error': _describe(error)})
+
+
+async def _load(pool, batch: list, rows: list, report: dict):
+    try:
+        report['imported'] += await import_events_batch(pool, batch)
+        return
+    except asyncpg.PostgresError as e:
+        if len(batch) == 1:
+            _reject(report, rows[0], e)
+            return
+    # the whole batch was rolled back: load its rows one at a time
+    for event, row in zip(batch, rows):
+        try:
+            report['imported'] += await import_events_batch(pool, [event])
+        except asyncpg.PostgresError as e:
+            _reject(report, row, e)
+
+
+async def import_events(pool, lines: AsyncIterator[str], fmt: str = 'csv') -> dict:
+    """
+    Validate and load events from a stream of text lines.
+
+    Args:
+        pool: DB connection pool
+        lines: async iterator of text lines (see `iter_lines`)
+        fmt (str): 'csv' (with header row) or 'ndjson'
+
+    Returns:
+        dict: { "imported": int, "failed": int, "errors": [{ "row": int, "error": str }] }
+            (at most MAX_REPORTED_ERRORS errors are listed)
+    """
+    records = _csv_records(lines) if fmt == 'csv' else _ndjson_records(lines)
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    batch, rows = [], []
+    row = 0
+    async for record in records:
+        row += 1
+        try:
+            batch.append(_validate(record))
+        except (ValueError, TypeError) as e:
+            _reject(report, row, e)
+            continue
+        rows.append(row)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _load(pool, batch, rows, report)
+            batch, rows = [], []
+    if batch:
+        await _load(pool, batch, rows, report)
+    return report
+
+
+async def _file_lines(path: str):
+    with open(path, encoding='utf-8', newline='') as f:
+        for line in f:
+            yield line
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Bulk import events from a CSV or NDJSON file.')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=('csv', 'ndjson'))
+    args = parser.parse_args()
+    fmt = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+    pool = await create_pool(settings.DATABASE_URL, min_size=1, max_size=2)
+    try:
+        report = await import_events(pool, _file_lines(args.path), fmt)
+    finally:
+        await pool.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Postgres LISTEN/NOTIFY fan-out for Evently.
+
+Each worker keeps a single dedicated connection listening on the `event_changed`
+channel (see migrations/005_event_change_notify.sql) and forwards every
+notification to the in-process subscribers (cache invalidation, etc.).
+It always connects to the primary (DATABASE_URL): NOTIFY is not delivered on
+read replicas.
+"""
+
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'event_changed'
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class EventChangeListener:
+    """
+    Single LISTEN connection per worker, fanning out to many subscribers.
+
+    Subscribers are called with the changed event id, or with None when the
+    connection was (re-)established or lost and notifications may have been
+    missed, meaning "anything may have changed".
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.connected = False
+        self._callbacks = []
+        self._task = None
+
+    def subscribe(self, callback: Callable[[Optional[str]], None]):
+        """
+        Register a callback invoked for every `event_changed` notification.
+        """
+        self._callbacks.append(callback)
+
+    def _dispatch(self, event_id: Optional[str]):
+        for callback in self._callbacks:
+            try:
+                callback(event_id)
+            except Exception:
+                logger.exception("event_changed subscriber failed")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._dispatch(payload)
+
+    async def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn=self.dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(CHANNEL, self._on_notify)
+                self.connected = True
+                self._dispatch(None)
+                await lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection failed, retrying")
+            finally:
+                if self.connected:
+                    self.connected = False
+                    self._dispatch(None)
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def start(self):
+        """
+        Start the background LISTEN loop (no-op when nothing subscribed).
+        """
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the LISTEN loop and close its connection.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global listener instance shared by all subscribers in this worker
+event_listener = EventChangeListener(settings.DATABASE_URL)
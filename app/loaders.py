@@ -0,0 +1,93 @@
+"""
+Request-scoped batching loader for events.
+
+Code that needs several events one by one (e.g. one per booking of a page)
+would otherwise issue one `get_event` query, and one pool acquire, per event.
+An `EventLoader` collects the `load` calls made before the event loop gets
+control back and serves them with a single `crud.get_events` query
+(`WHERE id = ANY($1)`):
+
+- an id requested twice is looked up once and returns the same event;
+- events held by the event cache (`app.cache`) are not queried, and the
+  events the loader reads are stored there (read from the primary if one of
+  them just changed, see `EventCache.refill_pool`).
+
+A loader built with `fresh=True` skips the event cache and reads every event
+from the pool it was given, for callers that must show the current state (the
+user bookings route passes the primary).
+
+A loader memoizes its results, so create one per request (and only when the
+request needs events) rather than sharing one between requests. Callers that
+need events independently, e.g. one per booking of a page (`expand=event` of the
+user bookings route), just `await loader.load(...)` each; `load_many` serves a
+list.
+"""
+
+import asyncio
+
+from asyncpg import Pool
+from .cache import event_cache
+from .crud import get_events
+
+
+class EventLoader:
+    """
+    Deduplicating, batching `get_event` for the lifetime of one request.
+    """
+
+    def __init__(self, pool: Pool, fresh: bool = False):
+        self.pool = pool
+        self.fresh = fresh
+        self._futures = {}
+        self._pending = []
+        self._tasks = set()
+
+    def load(self, event_id: str) -> asyncio.Future:
+        """
+        Future of the event (None if it does not exist); lookups queued in the same
+        loop iteration are fetched together.
+        """
+        future = self._futures.get(event_id)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._futures[event_id] = loop.create_future()
+        cached = None if self.fresh else event_cache.get_event(event_id)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        self._pending.append(event_id)
+        return future
+
+    async def load_many(self, event_ids: list) -> list:
+        """
+        Events of `event_ids`, in order (None for missing ones), in at most one query.
+        """
+        return list(await asyncio.gather(*(self.load(i) for i in event_ids)))
+
+    def _dispatch(self):
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._fetch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: list):
+        generation = event_cache.generation
+        try:
+            pool = self.pool if self.fresh else await event_cache.refill_pool(self.pool, batch)
+            events = await get_events(pool, batch)
+        except Exception as e:
+            for event_id in batch:
+                future = self._futures.pop(event_id)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for event_id in batch:
+            event = events.get(event_id)
+            if event is not None:
+                event_cache.set_event(event_id, event, generation)
+            future = self._futures[event_id]
+            if not future.done():  # cancelled with its request
+                future.set_result(event)
@@ -5,17 +5,34 @@ Defines application lifecycle, routes, and health check endpoints.
 """
 
 import uvicorn
-from fastapi import FastAPI
-from .routes import events, bookings, admin, users
-from .db import init_pool, close_pool, init_db_from_migration
+from fastapi import FastAPI, Response
+from . import metrics
+from .routes import events, bookings, admin, users, exports
+from .config import settings
+from .db import init_pool, init_read_pool, close_pool, init_db_from_migration
+from .coalescer import coalescer
+from .listener import event_listener
+from .idempotency import idempotency_gc
+from .holds import hold_sweeper
+from .rollups import rollup_job
+from .partitions import partition_maintainer
+from .waitlist import waitlist_promoter
+from .streams import availability_hub
+from .audit import audit_writer, outbox_relay
 
 app = FastAPI(title='Evently')
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # Register API routers
 app.include_router(events.router)
 app.include_router(bookings.router)
 app.include_router(admin.router)
 app.include_router(users.router)
+app.include_router(exports.router)
+
+# Periodic maintenance jobs started in on_startup and stopped in on_shutdown
+background_tasks = []
 
 
 @app.get("/")
@@ -34,23 +51,65 @@ async def health_check():
     return {"status": "ok"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """
+        Prometheus scrape endpoint (text exposition format, per worker process).
+        """
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.on_event('startup')
 async def on_startup():
     """
     Startup hook:
-    - Initializes database connection pool.
     - Runs DB migration if INIT_DB is enabled.
+    - Initializes (and warms) the write and read connection pools.
+    - Starts the LISTEN connection used for cache invalidation.
+    - Starts periodic maintenance jobs (idempotency-key GC, hold expiry sweeper, analytics rollups,
+      booking_events partition maintenance, audit outbox relay).
+    - Starts the async audit log writer (AUDIT_LOG_MODE=async).
+    - Starts the waitlist promoter and the seat-availability stream hub if enabled.
     """
-    await init_pool()
     await init_db_from_migration()
+    pool = await init_pool()
+    await init_read_pool()
+    await event_listener.start()
+    background_tasks.append(idempotency_gc(pool))
+    background_tasks.append(hold_sweeper(pool))
+    if settings.ROLLUP_ENABLED:
+        background_tasks.append(rollup_job(pool))
+    background_tasks.append(partition_maintainer())
+    if settings.AUDIT_LOG_MODE == 'outbox':
+        background_tasks.append(outbox_relay(pool))
+    for task in background_tasks:
+        task.start()
+    if settings.AUDIT_LOG_MODE == 'async':
+        audit_writer.start()
+    if settings.WAITLIST_PROMOTION_ENABLED:
+        waitlist_promoter.start(pool)
+    if settings.SSE_ENABLED:
+        availability_hub.start(pool)
 
 
 @app.on_event('shutdown')
 async def on_shutdown():
     """
     Shutdown hook:
-    - Closes database connection pool.
+    - Stops periodic maintenance jobs, the waitlist promoter and the stream hub.
+    - Settles bookings still waiting in the coalescer, then flushes the async audit log.
+    - Stops the LISTEN connection.
+    - Closes the database connection pools.
     """
+    for task in background_tasks:
+        await task.stop()
+    background_tasks.clear()
+    await waitlist_promoter.stop()
+    await availability_hub.stop()
+    await coalescer.drain(await init_pool())
+    await audit_writer.stop()
+    await event_listener.stop()
     await close_pool()
 
 
@@ -0,0 +1,247 @@
+"""
+Lightweight Prometheus metrics for Evently.
+
+A minimal, dependency-free implementation of counters, gauges and histograms
+rendered in the Prometheus text exposition format by `GET /metrics`. Recording a
+sample is a dict lookup plus an addition (histograms add a `bisect`), so the
+instrumentation stays on in production. Metrics are per worker process, like the
+event cache; Prometheus aggregates across workers.
+
+Instrumented here:
+- HTTP request latency per route template (`MetricsMiddleware`)
+- connection pool size / in use and acquire wait time (`db.InstrumentedPool`)
+- duration of every CRUD function (`timed`)
+- booking outcomes, cache hits/misses and inventory contention
+- open seat-availability streams
+"""
+
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _registry.append(self)
+
+    def _header(self) -> list:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value per label set: `counter.inc('confirmed')`.
+    """
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, set directly or read from collectors at scrape time.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._collectors = []
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def collect_from(self, collector: Callable[[], dict]):
+        """
+        Register a callable returning {label values tuple: value}, read on every scrape.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> list:
+        values = dict(self._values)
+        for collector in self._collectors:
+            values.update(collector())
+        lines = self._header()
+        for labels, value in values.items():
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class CounterFunc(Gauge):
+    """
+    Counter whose values are read from collectors at scrape time (e.g. cache hit counts).
+    """
+    kind = 'counter'
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in fixed buckets: `histogram.observe(0.012, 'GET', '/events/')`.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            # per-bucket counts (last slot is +Inf), then sum
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def render(self) -> list:
+        lines = self._header()
+        bounds = self.buckets + (float('inf'),)
+        for labels, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(state[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+def render() -> str:
+    """
+    Render every registered metric in the Prometheus text format.
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# ------------------- METRICS -------------------
+
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests by route template and status.',
+                        ('method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'HTTP request latency by route template.',
+                                 ('method', 'route'))
+
+DB_POOL_ACQUIRE_SECONDS = Histogram('db_pool_acquire_seconds', 'Time spent waiting for a pooled connection.',
+                                    ('pool',))
+DB_POOL_ACQUIRE_TIMEOUTS = Counter('db_pool_acquire_timeouts_total', 'Pool acquires that timed out.', ('pool',))
+DB_POOL_SIZE = Gauge('db_pool_size', 'Open connections in the pool.', ('pool',))
+DB_POOL_IN_USE = Gauge('db_pool_in_use', 'Connections currently checked out of the pool.', ('pool',))
+DB_POOL_MAX_SIZE = Gauge('db_pool_max_size', 'Configured maximum pool size.', ('pool',))
+
+CRUD_SECONDS = Histogram('crud_duration_seconds', 'Duration of CRUD functions, including pool wait.',
+                         ('function',))
+
+BOOKINGS = Counter('bookings_total', 'Booking attempts by outcome (confirmed, not_enough_seats, reused, '
+                                     'cancelled, failed).', ('outcome',))
+
+INVENTORY_UPDATE_SECONDS = Histogram('inventory_update_seconds', 'Time of the conditional inventory UPDATE of a '
+                                     'booking, mostly waiting on the event row lock.')
+CONTENTION = Counter('inventory_contention_total', 'Contended inventory operations by kind (shard_fallback, '
+                     'shard_gather, seats_contended, idempotency_conflict).', ('kind',))
+
+CACHE_HITS = CounterFunc('cache_hits_total', 'In-process cache hits.', ('cache',))
+CACHE_MISSES = CounterFunc('cache_misses_total', 'In-process cache misses.', ('cache',))
+
+SSE_STREAMS = Gauge('sse_streams', 'Open seat-availability streams.')
+SSE_WATCHED_EVENTS = Gauge('sse_watched_events', 'Events watched by at least one seat-availability stream.')
+
+AUDIT_QUEUE_DEPTH = Gauge('audit_queue_depth', 'booking_events entries queued in memory (AUDIT_LOG_MODE=async).')
+AUDIT_FLUSH_SECONDS = Histogram('audit_flush_seconds', 'Time to write one batch of booking_events entries, by mode.',
+                                ('mode',))
+AUDIT_ENTRIES = Counter('audit_entries_total', 'Deferred booking_events entries by outcome (written, overflow: '
+                        'written by the request because the queue was full, failed).', ('outcome',))
+
+ADMISSION_IN_FLIGHT = Gauge('admission_in_flight', 'Booking requests admitted and not finished yet.')
+ADMISSION_QUEUED = Gauge('admission_queued', 'Booking requests waiting for admission.')
+ADMISSION_REJECTIONS = Counter('admission_rejections_total', 'Booking requests shed by admission control, by reason '
+                               '(pool_wait, queue_full, deadline, event_deadline).', ('reason',))
+
+
+def timed(func):
+    """
+    Decorator recording the duration of an async CRUD function in `crud_duration_seconds`.
+    """
+    labels = (func.__name__,)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            CRUD_SECONDS.observe(time.perf_counter() - started, *labels)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status of every HTTP request.
+
+    Requests are labelled with their route template (`/events/{event_id}`), not
+    the raw path, so label cardinality stays bounded; unmatched paths share the
+    label `<unmatched>`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            path = getattr(route, 'path', '<unmatched>')
+            method = scope['method']
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method, path)
+            HTTP_REQUESTS.inc(method, path, status[0])
@@ -0,0 +1,172 @@
+"""
+Versioned migration runner for Evently.
+
+Migrations are the SQL files in `migrations/` (`001_init.sql`, `002_...`),
+applied in file name order. Each one runs once, in its own transaction, and is
+recorded in `schema_migrations` with the SHA-256 of its file:
+
+- startup first reads `schema_migrations` without taking any lock; when every
+  file is recorded with an unchanged checksum (the usual case) nothing else
+  happens, so booting a worker costs one connection and one query;
+- otherwise the process takes a Postgres advisory lock, so when several workers
+  start at once exactly one of them migrates while the others wait, re-check
+  and find the schema up to date;
+- a recorded migration whose file changed since it was applied stops the run
+  (add a new migration instead of editing an applied one).
+
+A database migrated before this runner existed has no `schema_migrations`:
+every migration is re-run once (they are idempotent) and recorded.
+
+Usage (CLI, e.g. before a rolling deploy):
+    python -m app.migrate          # apply pending migrations
+    python -m app.migrate status   # list migrations and whether they are applied
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import asyncpg
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / 'migrations'
+# pg_advisory_lock key held while migrating
+MIGRATION_LOCK_KEY = 0x65766d6967726174
+
+
+class Migration(NamedTuple):
+    version: str
+    path: Path
+    sql: str
+    checksum: str
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    Read the migration files of `directory`, in the order they are applied.
+
+    Returns:
+        list[Migration]: version (file name without `.sql`), path, SQL and checksum.
+    """
+    migrations = []
+    for path in sorted(directory.glob('*.sql')):
+        sql = path.read_text()
+        migrations.append(Migration(path.stem, path, sql, hashlib.sha256(sql.encode()).hexdigest()))
+    return migrations
+
+
+async def _applied(conn) -> dict:
+    # {version: checksum}; empty before the first run
+    try:
+        rows = await conn.fetch('SELECT version, checksum FROM schema_migrations')
+    except asyncpg.UndefinedTableError:
+        return {}
+    return {r['version']: r['checksum'] for r in rows}
+
+
+def _pending(migrations: list, applied: dict) -> list:
+    changed = [m.version for m in migrations if m.version in applied and applied[m.version] != m.checksum]
+    if changed:
+        raise RuntimeError(f"applied migrations changed since they ran: {', '.join(changed)}; "
+                           f"add a new migration instead")
+    return [m for m in migrations if m.version not in applied]
+
+
+async def migrate(conn, migrations: list) -> list:
+    """
+    Apply the migrations not recorded in `schema_migrations` yet.
+
+    Returns:
+        list[str]: versions applied by this call (empty when already up to date).
+
+    Raises:
+        RuntimeError: if an applied migration's file has changed.
+    """
+    if not _pending(migrations, await _applied(conn)):
+        return []
+    await conn.execute('SELECT pg_advisory_lock($1)', MIGRATION_LOCK_KEY)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+              version TEXT PRIMARY KEY,
+              checksum TEXT NOT NULL,
+              applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+              duration_ms DOUBLE PRECISION
+            )
+        """)
+        # another process may have migrated while we waited for the lock
+        applied = []
+        for migration in _pending(migrations, await _applied(conn)):
+            started = time.perf_counter()
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                await conn.execute("""
+                    INSERT INTO schema_migrations (version, checksum, duration_ms) VALUES ($1, $2, $3)
+                """, migration.version, migration.checksum, (time.perf_counter() - started) * 1000)
+            logger.info("applied migration %s", migration.version)
+            applied.append(migration.version)
+        return applied
+    finally:
+        await conn.execute('SELECT pg_advisory_unlock($1)', MIGRATION_LOCK_KEY)
+
+
+async def migrate_database(dsn: str, directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    Apply pending migrations on a dedicated connection to `dsn`.
+
+    Returns:
+        list[str]: versions applied.
+    """
+    migrations = load_migrations(directory)
+    conn = await asyncpg.connect(dsn=dsn)
+    try:
+        return await migrate(conn, migrations)
+    finally:
+        await conn.close()
+
+
+async def status(dsn: str, directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    State of every migration: `applied`, `pending` or `changed` (file edited after it ran).
+
+    Returns:
+        list[dict]: { "version", "state" } in order.
+    """
+    conn = await asyncpg.connect(dsn=dsn)
+    try:
+        applied = await _applied(conn)
+    finally:
+        await conn.close()
+    states = []
+    for migration in load_migrations(directory):
+        if migration.version not in applied:
+            state = 'pending'
+        elif applied[migration.version] != migration.checksum:
+            state = 'changed'
+        else:
+            state = 'applied'
+        states.append({'version': migration.version, 'state': state})
+    return states
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Apply or list Evently database migrations.')
+    parser.add_argument('command', nargs='?', choices=['up', 'status'], default='up')
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        for row in await status(settings.DATABASE_URL):
+            print(f"{row['version']:<40} {row['state']}")
+        return
+    applied = await migrate_database(settings.DATABASE_URL)
+    print('\n'.join(f'applied {version}' for version in applied) or 'up to date')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
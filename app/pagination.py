@@ -0,0 +1,58 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor encodes the sort key of the last row of a page, e.g. (start_time, id)
+for events or (created_at, id) for users and bookings. The next page is fetched
+with a `(sort_key, id) > (cursor)` predicate, so every page costs the same no
+matter how deep it is.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    """
+    Build an opaque cursor from the sort key of the last row on a page.
+
+    Args:
+        sort_value (datetime): value of the timestamp sort column.
+        row_id (str): id of the row (tie-breaker).
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps([sort_value.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Returns:
+        tuple[datetime, str]: (sort_value, row_id)
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), str(uuid.UUID(row_id))
+    except (ValueError, TypeError) as e:
+        raise ValueError('INVALID_CURSOR') from e
+
+
+def next_cursor(rows: list, limit: int, sort_key: str):
+    """
+    Return the cursor for the page after `rows`, or None if this is the last page.
+    """
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last[sort_key], last['id'])
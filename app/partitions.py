@@ -0,0 +1,227 @@
+"""
+Partition maintenance and archival of `booking_events`.
+
+`booking_events` is range-partitioned by month on `created_at`
+(migrations/012_partition_booking_events.sql). A periodic task in each worker
+(only one at a time, guarded by an advisory lock):
+
+- creates the partitions of the next BOOKING_EVENTS_PARTITIONS_AHEAD months,
+  so inserts never hit a missing partition;
+- when BOOKING_EVENTS_RETENTION_MONTHS is set, archives every partition older
+  than that many full months to `<BOOKING_EVENTS_ARCHIVE_DIR>/<partition>.ndjson.gz`
+  (one JSON object per row, like the NDJSON export), then detaches it
+  concurrently and drops it. A partition is only archived once the analytics
+  rollups have folded all of its rows.
+
+Archives can be read directly (`zcat ... | jq`) or loaded back into a plain
+table for SQL:
+
+Usage (CLI):
+    python -m app.partitions maintain
+    python -m app.partitions restore archive/booking_events/booking_events_2025_01.ndjson.gz [--table NAME]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import uuid
+from datetime import date, datetime, timezone
+from typing import Optional
+
+import asyncpg
+from .config import settings
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r'^booking_events_(\d{4})_(\d{2})$')
+# pg_advisory_lock key serializing maintenance across workers
+MAINTENANCE_LOCK_KEY = 0x62655f70617274
+ARCHIVE_FETCH_SIZE = 5000
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _months_before(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def _partitions(conn) -> list:
+    # attached partitions and leftovers of an interrupted archival (detached, or detach pending)
+    rows = await conn.fetch("""
+        SELECT c.relname AS name, i.inhrelid IS NOT NULL AS attached,
+               COALESCE(i.inhdetachpending, false) AS detach_pending
+        FROM pg_class c
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = 'booking_events'::regclass
+        WHERE c.relkind = 'r'
+          AND c.relnamespace = current_schema()::regnamespace
+          AND c.relname ~ '^booking_events_[0-9]{4}_[0-9]{2}$'
+        ORDER BY c.relname
+    """)
+    partitions = []
+    for row in rows:
+        year, month = PARTITION_NAME.match(row['name']).groups()
+        partitions.append(dict(row, month=date(int(year), int(month), 1)))
+    return partitions
+
+
+async def archive_partition(conn, name: str, directory: str) -> int:
+    """
+    Write every row of a partition to `<directory>/<name>.ndjson.gz` (atomically replaced).
+
+    Returns:
+        int: number of rows written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}.ndjson.gz')
+    tmp_path = path + '.tmp'
+    rows = 0
+    f = await asyncio.to_thread(gzip.open, tmp_path, 'wb')
+    try:
+        async with conn.transaction():
+            lines = []
+            query = f'SELECT id, booking_id, event_type, event_payload, created_at FROM {name} ORDER BY id'
+            async for record in conn.cursor(query, prefetch=ARCHIVE_FETCH_SIZE):
+                row = dict(record)
+                if isinstance(row['event_payload'], str):
+                    row['event_payload'] = json.loads(row['event_payload'])
+                lines.append(json.dumps(row, default=_json_default))
+                rows += 1
+                if len(lines) >= ARCHIVE_FETCH_SIZE:
+                    await asyncio.to_thread(f.write, ('\n'.join(lines) + '\n').encode())
+                    lines = []
+            if lines:
+                await asyncio.to_thread(f.write, ('\n'.join(lines) + '\n').encode())
+        await asyncio.to_thread(f.close)
+        os.replace(tmp_path, path)
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+
+async def run_maintenance(conn, months_ahead: int, retention_months: Optional[int], archive_dir: str) -> list:
+    """
+    Create upcoming partitions, then archive and drop the expired ones.
+
+    Returns:
+        list: names of the partitions archived by this run (empty if another worker holds the lock).
+    """
+    if not await conn.fetchval('SELECT pg_try_advisory_lock($1)', MAINTENANCE_LOCK_KEY):
+        return []
+    try:
+        await conn.execute('SELECT ensure_booking_events_partitions($1)', months_ahead)
+        if retention_months is None:
+            return []
+        today = datetime.now(timezone.utc).date()
+        cutoff = _months_before(today.replace(day=1), retention_months)
+        watermark = await conn.fetchval("SELECT last_id FROM rollup_watermarks WHERE name = 'booking_events'")
+        archived = []
+        for partition in await _partitions(conn):
+            if partition['month'] >= cutoff:
+                continue
+            name = partition['name']
+            path = os.path.join(archive_dir, f'{name}.ndjson.gz')
+            if partition['attached'] and not partition['detach_pending']:
+                max_id = await conn.fetchval(f'SELECT max(id) FROM {name}')
+                if settings.ROLLUP_ENABLED and max_id is not None and max_id > (watermark or 0):
+                    logger.warning("not archiving %s: analytics rollups have not folded it yet", name)
+                    continue
+                count = await conn.fetchval(f'SELECT count(*) FROM {name}')
+                written = await archive_partition(conn, name, archive_dir)
+                if written != count:
+                    raise RuntimeError(f'archive of {name} has {written} rows, expected {count}')
+                await conn.execute(f'ALTER TABLE booking_events DETACH PARTITION {name} CONCURRENTLY')
+            elif partition['detach_pending']:
+                await conn.execute(f'ALTER TABLE booking_events DETACH PARTITION {name} FINALIZE')
+            if not os.path.exists(path):
+                # detached by an interrupted run before its archive was written
+                await archive_partition(conn, name, archive_dir)
+            await conn.execute(f'DROP TABLE {name}')
+            logger.info("archived booking_events partition %s to %s", name, path)
+            archived.append(name)
+        return archived
+    finally:
+        await conn.execute('SELECT pg_advisory_unlock($1)', MAINTENANCE_LOCK_KEY)
+
+
+async def maintain() -> list:
+    """
+    Run partition maintenance once on a dedicated connection (DDL and long archive reads
+    stay out of the request pools).
+    """
+    conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    try:
+        return await run_maintenance(conn, settings.BOOKING_EVENTS_PARTITIONS_AHEAD,
+                                     settings.BOOKING_EVENTS_RETENTION_MONTHS, settings.BOOKING_EVENTS_ARCHIVE_DIR)
+    finally:
+        await conn.close()
+
+
+def partition_maintainer() -> PeriodicTask:
+    """
+    Build the periodic task that creates and archives booking_events partitions.
+    """
+    return PeriodicTask('booking-events-partitions', settings.BOOKING_EVENTS_MAINTENANCE_INTERVAL_SECONDS, maintain)
+
+
+def _read_archive(path: str):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                yield (row['id'], uuid.UUID(row['booking_id']) if row['booking_id'] else None, row['event_type'],
+                       json.dumps(row['event_payload']) if row['event_payload'] is not None else None,
+                       datetime.fromisoformat(row['created_at']))
+
+
+async def restore_archive(path: str, table: str) -> int:
+    """
+    Load an archive file into a new plain table shaped like booking_events.
+
+    Returns:
+        int: number of rows restored.
+    """
+    records = await asyncio.to_thread(lambda: list(_read_archive(path)))
+    conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    try:
+        async with conn.transaction():
+            await conn.execute(f'CREATE TABLE "{table}" (LIKE booking_events INCLUDING DEFAULTS)')
+            await conn.copy_records_to_table(
+                table, records=records,
+                columns=['id', 'booking_id', 'event_type', 'event_payload', 'created_at'])
+        return len(records)
+    finally:
+        await conn.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='booking_events partition maintenance and archive restore.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('maintain', help='create upcoming partitions and archive expired ones')
+    restore = commands.add_parser('restore', help='load an archive file into a new table')
+    restore.add_argument('path')
+    restore.add_argument('--table', help='table to create (default: <partition>_restored)')
+    args = parser.parse_args()
+
+    if args.command == 'maintain':
+        print(json.dumps({'archived': await maintain()}))
+    else:
+        table = args.table or os.path.basename(args.path).split('.')[0] + '_restored'
+        rows = await restore_archive(args.path, table)
+        print(json.dumps({'table': table, 'rows': rows}))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Fast JSON responses for Evently's list endpoints.
+
+`GET /events/`, `GET /users/` and `GET /admin/analytics` return rows that are
+already shaped like their response models (explicit columns in model order,
+UUIDs decoded to str by the connection codec), so re-validating every row
+against the model is pure overhead. `rows_response` encodes the rows directly
+(orjson when installed, the stdlib encoder otherwise) into the same bytes
+FastAPI would produce: compact separators, UTF-8, datetimes in pydantic's ISO
+format with a `Z` suffix for UTC. orjson writes small floats as `2e-6` where the
+stdlib writes `2e-06`, so rows with floats are encoded by the stdlib.
+
+Nothing checks the rows on this path, so the queries behind it must never
+return NULL for a required field (e.g. `seats_available` is COALESCEd for
+events without an inventory row); `tests/test_responses.py` checks the bytes
+against the validated path.
+
+The routes keep their `response_model`, so the OpenAPI schema is unchanged;
+`FAST_JSON_ENABLED=false` falls back to the validated path.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import Response
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + 'Z' if value.utcoffset() == timedelta(0) else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(rows, floats: bool = False) -> bytes:
+    """
+    Encode rows exactly like FastAPI's validated JSON response.
+
+    Args:
+        rows (list): row dicts
+        floats (bool): rows contain floats (forces the stdlib encoder)
+    """
+    if orjson is not None and not floats:
+        return orjson.dumps(rows, option=orjson.OPT_UTC_Z)
+    return json.dumps(rows, ensure_ascii=False, allow_nan=False, separators=(',', ':'),
+                      default=_default).encode('utf-8')
+
+
+class RowsResponse(Response):
+    """
+    JSON response whose content is a list of row dicts, encoded without validation.
+    """
+    media_type = 'application/json'
+
+    def __init__(self, rows: list, floats: bool = False, **kwargs):
+        self.floats = floats
+        super().__init__(rows, **kwargs)
+
+    def render(self, content) -> bytes:
+        return dumps(content, self.floats)
+
+
+def rows_response(rows: list, response: Optional[Response] = None, floats: bool = False):
+    """
+    Return `rows` as a `RowsResponse`, or unchanged (for `response_model` validation)
+    when FAST_JSON_ENABLED is off.
+
+    Args:
+        rows (list): row dicts shaped like the route's response model
+        response (Optional[Response]): the route's injected response; its headers
+            (e.g. `X-Next-Cursor`) are copied, as FastAPI ignores them for a returned response
+        floats (bool): rows contain floats (see `dumps`)
+    """
+    if not settings.FAST_JSON_ENABLED:
+        return rows
+    headers = dict(response.headers) if response is not None else None
+    return RowsResponse(rows, floats=floats, headers=headers)
@@ -0,0 +1,45 @@
+"""
+Incremental booking analytics rollups for Evently.
+
+`booking_events` is an append-only log, so per-minute and per-hour activity
+(bookings, cancellations, holds) is folded into `booking_rollups_minute` /
+`booking_rollups_hour` by a periodic task that advances a `booking_events.id`
+watermark (`crud.advance_booking_rollups`). The analytics endpoints read only
+the rollups, never the raw log.
+
+The rollups trail the log by ROLLUP_LAG_SECONDS plus at most one
+ROLLUP_INTERVAL_SECONDS; minute buckets older than ROLLUP_MINUTE_RETENTION_DAYS
+are pruned (hour buckets are kept).
+"""
+
+from asyncpg import Pool
+from .config import settings
+from .crud import advance_booking_rollups, prune_minute_rollups
+from .tasks import PeriodicTask
+
+
+async def advance_rollups(pool: Pool) -> int:
+    """
+    Fold every settled booking event into the rollups, ROLLUP_BATCH_SIZE at a time.
+
+    Returns:
+        int: number of booking events folded.
+    """
+    total = 0
+    while True:
+        folded = await advance_booking_rollups(pool, settings.ROLLUP_BATCH_SIZE, settings.ROLLUP_LAG_SECONDS)
+        if not folded:
+            return total
+        total += folded
+        if folded < settings.ROLLUP_BATCH_SIZE:
+            return total
+
+
+def rollup_job(pool: Pool) -> PeriodicTask:
+    """
+    Build the periodic task that advances the rollups and prunes old minute buckets.
+    """
+    async def run():
+        await advance_rollups(pool)
+        await prune_minute_rollups(pool, settings.ROLLUP_MINUTE_RETENTION_DAYS)
+    return PeriodicTask('booking-rollups', settings.ROLLUP_INTERVAL_SECONDS, run)
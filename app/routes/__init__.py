@@ -6,5 +6,6 @@ This package exposes the main route modules for the application:
 - bookings: endpoints for creating/canceling bookings and listing user bookings
 - admin: admin/analytics endpoints
 - users: endpoints for creating/listing/deleting users
+- exports: streaming bulk exports (NDJSON/CSV)
 """
-from . import events, bookings, admin, users
+from . import events, bookings, admin, users, exports
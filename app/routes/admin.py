@@ -3,12 +3,26 @@ Admin routes.
 
 Contains endpoints used for administrative/analytics purposes.
 """
-from fastapi import APIRouter, Depends
-from ..db import init_pool
-from ..crud import admin_event_stats
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..db import init_pool, init_read_pool
+from ..crud import admin_event_stats, set_inventory_shards, booking_timeseries, booking_velocity
+from ..schemas import AdmissionLimits, EventVelocity, InventoryShardsUpdate, RollupBucket
+from ..cache import event_cache
+from ..admission import admission
+from ..config import settings
+from ..responses import rows_response
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# bucket length and default range per timeseries granularity
+TIMESERIES_GRANULARITIES = {
+    'minute': (timedelta(minutes=1), timedelta(hours=1)),
+    'hour': (timedelta(hours=1), timedelta(days=7)),
+}
+MAX_TIMESERIES_BUCKETS = 10080
+
 
 async def get_pool():
     """
@@ -20,19 +34,167 @@ async def get_pool():
     return await init_pool()
 
 
+async def get_read_pool():
+    """
+    Dependency to provide the read pool (replica when DATABASE_REPLICA_URL is set).
+
+    Returns:
+        asyncpg.Pool: the pool created by init_read_pool()
+    """
+    return await init_read_pool()
+
+
 @router.get("/analytics", response_model=list)
-async def analytics(pool = Depends(get_pool)):
+async def analytics(pool = Depends(get_read_pool)):
     """
     Return analytics rows about events (booking counts, utilization, etc).
 
     This endpoint delegates to the `admin_event_stats` CRUD function which
-    reads from a materialized view in the database.
+    reads the per-event counters in `event_booking_stats`. The counters are
+    updated in the same transaction as each booking/cancellation. They are read
+    from the read pool, so with DATABASE_REPLICA_URL set they trail the primary
+    by the replica's replication lag.
 
     Args:
         pool: database connection pool (injected by Depends).
 
     Returns:
-        list: list of analytics rows (dictionaries) - schema is defined in the DB/view.
+        list: list of analytics rows (dictionaries) - see `schemas.AnalyticsRow`.
     """
     rows = await admin_event_stats(pool)
-    return rows
+    return rows_response(rows, floats=True)
+
+
+@router.get("/analytics/timeseries", response_model=List[RollupBucket])
+async def analytics_timeseries(granularity: str = Query('minute', pattern="^(minute|hour)$"),
+                               start: Optional[datetime] = None,
+                               end: Optional[datetime] = None,
+                               event_id: Optional[str] = None,
+                               pool = Depends(get_read_pool)):
+    """
+    Return bookings, cancellations and holds per minute or hour.
+
+    Reads the incremental rollups (see `app.rollups`), which trail the booking
+    log by a few seconds. Buckets without activity are omitted.
+
+    Args:
+        granularity (str): 'minute' (default range: last hour) or 'hour' (default range: last 7 days)
+        start (Optional[datetime]): inclusive range start (default: `end` minus the default range)
+        end (Optional[datetime]): exclusive range end (default: now)
+        event_id (Optional[str]): restrict to one event (default: summed over all events)
+        pool: database connection pool (injected by Depends).
+
+    Returns:
+        list[RollupBucket]: buckets in time order.
+
+    Raises:
+        HTTPException(400): if the range is empty, spans more than MAX_TIMESERIES_BUCKETS buckets,
+            or event_id is not a valid UUID
+    """
+    step, default_range = TIMESERIES_GRANULARITIES[granularity]
+    end = end or datetime.now(timezone.utc)
+    start = start or end - default_range
+    if start.tzinfo is None or end.tzinfo is None:
+        raise HTTPException(status_code=400, detail="start and end must include a timezone")
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / step > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail="Range too large for this granularity")
+    try:
+        return await booking_timeseries(pool, granularity, start, end, event_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/analytics/velocity", response_model=List[EventVelocity])
+async def analytics_velocity(window_minutes: int = Query(15, ge=1, le=1440),
+                             limit: int = Query(50, ge=1, le=500),
+                             pool = Depends(get_read_pool)):
+    """
+    Return the fastest-selling events over a recent window, with cancellation rates.
+
+    Computed from the per-minute rollups; `cancellation_rate` is tickets cancelled
+    over tickets booked in the window (null when nothing was booked).
+
+    Args:
+        window_minutes (int): length of the window, in minutes (default 15)
+        limit (int): maximum number of events to return (default 50)
+        pool: database connection pool (injected by Depends).
+
+    Returns:
+        list[EventVelocity]: events ordered by tickets booked in the window, descending.
+    """
+    return await booking_velocity(pool, window_minutes, limit)
+
+
+@router.get("/cache", response_model=dict)
+async def cache_stats():
+    """
+    Return hit/miss counters and sizes of the in-process event cache.
+
+    Returns:
+        dict: cache statistics for this worker.
+    """
+    return event_cache.stats()
+
+
+@router.get("/admission", response_model=dict)
+async def admission_stats():
+    """
+    Return the admission control limits and current load of this worker.
+
+    Returns:
+        dict: limits, in-flight and queued booking requests.
+    """
+    return admission.stats()
+
+
+@router.put("/admission", response_model=dict)
+async def update_admission_limits(payload: AdmissionLimits):
+    """
+    Change admission control limits at runtime (this worker only, until it restarts).
+
+    Waiting requests are admitted at once if a limit is raised.
+
+    Args:
+        payload (AdmissionLimits): limits to change; omitted fields are kept.
+
+    Returns:
+        dict: the new limits and current load.
+    """
+    for field, value in payload.model_dump(exclude_none=True).items():
+        setattr(settings, f'ADMISSION_{field.upper()}', value)
+    admission.wake()
+    return admission.stats()
+
+
+@router.put("/events/{event_id}/inventory-shards", response_model=dict)
+async def update_inventory_shards(event_id: str, payload: InventoryShardsUpdate, pool = Depends(get_pool)):
+    """
+    Switch sharded inventory on (shards > 0) or off (shards = 0) for an event.
+
+    With N shards the event's free seats are split across N counter rows, so
+    concurrent bookings lock different rows instead of queueing on one. Bookings,
+    holds, assigned seats and waitlist promotion draw from the shards; atomic
+    batch bookings only use the main inventory row, which holds no free seats
+    while the event is sharded.
+
+    Args:
+        event_id (str): UUID of the event
+        payload (InventoryShardsUpdate): number of shards
+        pool: database connection pool (injected by Depends).
+
+    Returns:
+        dict: { "event_id", "shards", "seats_available" }
+
+    Raises:
+        HTTPException(404): if event not found
+    """
+    try:
+        result = await set_inventory_shards(pool, event_id, payload.shards)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    event_cache.invalidate(event_id)
+    return result
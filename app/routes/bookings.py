@@ -3,17 +3,49 @@ Bookings routes.
 
 Endpoints for:
 - creating bookings (with optional idempotency support),
+- creating many bookings at once (batch),
+- booking assigned seats,
+- holding seats during checkout, then confirming or releasing the hold,
 - cancelling bookings, and
-- listing bookings for a user.
+- listing bookings for a user (optionally with each booking's event).
+
+New bookings, batches, seat bookings and holds pass through admission control
+(`app.admission`) when ADMISSION_ENABLED is set: shed requests get 429 (busy
+event) or 503 (overloaded worker) with a `Retry-After` header. Confirming,
+releasing and cancelling are never shed, as they finish work already admitted.
 """
-from fastapi import APIRouter, Depends, Header, HTTPException
-from ..schemas import BookingRequest, BookingOut
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from ..schemas import (BookingRequest, BookingOut, BatchBookingRequest, BatchBookingOut,
+                       SeatBookingRequest, SeatBookingOut, HoldRequest, HoldOut)
 from ..db import init_pool
-from ..crud import book_tickets, cancel_booking, get_user_bookings
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, next_cursor
+from ..config import settings
+from ..coalescer import coalescer
+from ..admission import admission
+from ..cache import event_cache
+from ..loaders import EventLoader
+from ..seatmap import seat_maps, book_best_seats, book_specific_seats
+from ..crud import (book_tickets, book_tickets_batch, cancel_booking, get_user_bookings,
+                    hold_tickets, confirm_hold, release_hold)
 from typing import Optional
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
+SHED_ERRORS = ('EVENT_BUSY', 'OVERLOADED')
+
+
+def shed_error(code: str) -> HTTPException:
+    """
+    HTTP error for a request shed by admission control.
+
+    Returns:
+        HTTPException: 429 for EVENT_BUSY, 503 for OVERLOADED, with `Retry-After`.
+    """
+    return HTTPException(status_code=429 if code == 'EVENT_BUSY' else 503, detail=code,
+                         headers={'Retry-After': str(settings.ADMISSION_RETRY_AFTER_SECONDS)})
+
 
 async def get_pool():
     """
@@ -35,8 +67,14 @@ async def create_booking(payload: BookingRequest,
     Idempotency:
         This endpoint accepts an idempotency key either in the request body
         (payload.idempotency_key) or as an `Idempotency-Key` header. If provided,
-        repeated requests with the same key will return the same booking instead
-        of creating duplicates.
+        repeated requests with the same key replay the original response
+        (same booking, same shape) instead of creating duplicates, until the key
+        expires (IDEMPOTENCY_TTL_SECONDS).
+
+    Coalescing:
+        When BOOKING_COALESCER_ENABLED is set, bookings without an idempotency key
+        are grouped per event and settled in batches by `app.coalescer`, which
+        passes each batch (not each request) through admission control.
 
     Args:
         payload (BookingRequest): booking payload (user_id, event_id, quantity, optional idempotency_key)
@@ -44,21 +82,197 @@ async def create_booking(payload: BookingRequest,
         pool: DB connection pool (injected)
 
     Returns:
-        dict: { "id": <booking_id>, "status": "CONFIRMED" } or reused response from idempotency.
+        dict: { "id": <booking_id>, "status": "CONFIRMED" }
 
     Raises:
-        HTTPException(409): if not enough seats available.
+        HTTPException(409): if not enough seats available, or a request with the
+            same idempotency key is still in progress.
+        HTTPException(429/503): if shed by admission control.
         HTTPException(400): for other errors.
     """
     # accept idempotency key either in header or in body
     key = payload.idempotency_key or idempotency_key
     try:
-        result = await book_tickets(pool, payload.user_id, payload.event_id, payload.quantity, key)
+        if settings.BOOKING_COALESCER_ENABLED and not key:
+            result = await coalescer.submit(pool, payload.user_id, payload.event_id, payload.quantity)
+        else:
+            async with admission.admit(pool, payload.event_id):
+                result = await book_tickets(pool, payload.user_id, payload.event_id, payload.quantity, key)
+        event_cache.invalidate(payload.event_id)
         return result
     except Exception as e:
+        if str(e) in SHED_ERRORS:
+            raise shed_error(str(e))
+        if str(e) == 'NOT_ENOUGH_SEATS':
+            raise HTTPException(status_code=409, detail="Not enough seats available")
+        if str(e) == 'IDEMPOTENCY_CONFLICT':
+            raise HTTPException(status_code=409, detail="A request with this idempotency key is in progress")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=BatchBookingOut)
+async def create_booking_batch(payload: BatchBookingRequest, pool = Depends(get_pool)):
+    """
+    Create many bookings in one request.
+
+    Items are settled with set-based SQL in a fixed number of round trips,
+    locking inventory rows in a deterministic order. Each item gets its own
+    result, in request order: CONFIRMED (with booking id), or FAILED with an
+    error (NOT_ENOUGH_SEATS, USER_NOT_FOUND, INVALID_ID, IDEMPOTENCY_CONFLICT).
+    Items of events with sharded inventory are booked like `POST /bookings/`;
+    in an atomic batch they fail with INVENTORY_SHARDED.
+    Idempotency keys on items behave like on `POST /bookings/`.
+
+    With `atomic=true` the batch is all-or-nothing: if any item fails nothing is
+    booked, the failing items report their error and the others are ABORTED.
+
+    Args:
+        payload (BatchBookingRequest): items (max 1000) and the atomic flag
+        pool: DB connection pool (injected)
+
+    Returns:
+        BatchBookingOut: per-item results
+
+    Raises:
+        HTTPException(409): if atomic and at least one item failed.
+        HTTPException(503): if shed by admission control.
+    """
+    items = [item.model_dump() for item in payload.items]
+    try:
+        async with admission.admit(pool):
+            results = await book_tickets_batch(pool, items, payload.atomic)
+    except Exception as e:
+        if str(e) in SHED_ERRORS:
+            raise shed_error(str(e))
+        raise
+    for event_id in {item['event_id'] for item in items}:
+        event_cache.invalidate(event_id)
+    if payload.atomic and any(r['status'] == 'FAILED' for r in results):
+        raise HTTPException(status_code=409, detail={'results': results})
+    return {'results': results}
+
+
+@router.post("/seats", response_model=SeatBookingOut)
+async def create_seat_booking(payload: SeatBookingRequest, pool = Depends(get_pool)):
+    """
+    Book assigned seats: the best `quantity` contiguous seats, or specific `seat_labels`.
+
+    Best-seat search runs on an in-memory occupancy map; the final claim locks
+    the chosen seats with `FOR UPDATE SKIP LOCKED` so concurrent buyers do not
+    serialise on each other. The event's inventory counter is updated in the
+    same transaction.
+
+    Args:
+        payload (SeatBookingRequest): user, event and either quantity or seat_labels
+        pool: DB connection pool (injected)
+
+    Returns:
+        SeatBookingOut: booking id, status and the booked seat labels
+
+    Raises:
+        HTTPException(409): if the seats are not available.
+        HTTPException(429/503): if shed by admission control.
+        HTTPException(400): for other errors.
+    """
+    try:
+        async with admission.admit(pool, payload.event_id):
+            if payload.seat_labels:
+                labels = list(dict.fromkeys(payload.seat_labels))
+                result = await book_specific_seats(pool, payload.user_id, payload.event_id, labels)
+            else:
+                result = await book_best_seats(pool, payload.user_id, payload.event_id, payload.quantity)
+    except Exception as e:
+        if str(e) in SHED_ERRORS:
+            raise shed_error(str(e))
+        if str(e) in ('NOT_ENOUGH_SEATS', 'NO_CONTIGUOUS_SEATS', 'SEATS_UNAVAILABLE', 'SEATS_CONTENDED'):
+            raise HTTPException(status_code=409, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    event_cache.invalidate(payload.event_id)
+    return result
+
+
+@router.post("/hold", response_model=HoldOut)
+async def create_hold(payload: HoldRequest, pool = Depends(get_pool)):
+    """
+    Hold seats for a buyer who is still checking out.
+
+    Creates a PENDING booking that expires after HOLD_TTL_SECONDS and moves the
+    seats from `seats_available` into `seats_reserved`. Confirm it with
+    `POST /bookings/{id}/confirm` before it expires; otherwise the expiry sweeper
+    gives the seats back.
+
+    Args:
+        payload (HoldRequest): user, event and quantity
+        pool: DB connection pool (injected)
+
+    Returns:
+        HoldOut: booking id, status PENDING and expiry time
+
+    Raises:
+        HTTPException(409): if not enough seats available.
+        HTTPException(429/503): if shed by admission control.
+        HTTPException(400): for other errors.
+    """
+    try:
+        async with admission.admit(pool, payload.event_id):
+            result = await hold_tickets(pool, payload.user_id, payload.event_id, payload.quantity,
+                                        settings.HOLD_TTL_SECONDS)
+    except Exception as e:
+        if str(e) in SHED_ERRORS:
+            raise shed_error(str(e))
         if str(e) == 'NOT_ENOUGH_SEATS':
             raise HTTPException(status_code=409, detail="Not enough seats available")
         raise HTTPException(status_code=400, detail=str(e))
+    event_cache.invalidate(payload.event_id)
+    return result
+
+
+@router.post("/{booking_id}/confirm", response_model=dict)
+async def confirm_hold_endpoint(booking_id: str, pool = Depends(get_pool)):
+    """
+    Confirm a hold, turning the PENDING booking into a CONFIRMED one.
+
+    Args:
+        booking_id (str): UUID of the held booking
+        pool: DB connection pool (injected)
+
+    Returns:
+        dict: { "id": <booking_id>, "event_id": <event_id>, "status": "CONFIRMED" }
+
+    Raises:
+        HTTPException(409): if the hold does not exist, expired or was released.
+    """
+    try:
+        return await confirm_hold(pool, booking_id)
+    except Exception as e:
+        if str(e) == 'CANNOT_CONFIRM':
+            raise HTTPException(status_code=409, detail="Hold cannot be confirmed (expired or released)")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{booking_id}/release", response_model=dict)
+async def release_hold_endpoint(booking_id: str, pool = Depends(get_pool)):
+    """
+    Release a hold before it expires, giving its seats back.
+
+    Args:
+        booking_id (str): UUID of the held booking
+        pool: DB connection pool (injected)
+
+    Returns:
+        dict: booking id, event id and released quantity
+
+    Raises:
+        HTTPException(400): if the booking is not an open hold.
+    """
+    try:
+        res = await release_hold(pool, booking_id)
+    except Exception as e:
+        if str(e) == 'CANNOT_RELEASE':
+            raise HTTPException(status_code=400, detail="Cannot release hold")
+        raise HTTPException(status_code=500, detail=str(e))
+    event_cache.invalidate(res['event_id'])
+    return res
 
 
 @router.post("/{booking_id}/cancel", response_model=dict)
@@ -82,6 +296,8 @@ async def cancel_booking_endpoint(booking_id: str, pool = Depends(get_pool)):
     """
     try:
         res = await cancel_booking(pool, booking_id)
+        event_cache.invalidate(res['event_id'])
+        seat_maps.discard(res['event_id'])
         return res
     except Exception as e:
         if str(e) == 'CANNOT_CANCEL':
@@ -89,17 +305,52 @@ async def cancel_booking_endpoint(booking_id: str, pool = Depends(get_pool)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/user/{user_id}", response_model=list[BookingOut])
-async def user_bookings(user_id: str, pool = Depends(get_pool)):
+@router.get("/user/{user_id}", response_model=list[BookingOut], response_model_exclude_unset=True)
+async def user_bookings(user_id: str,
+                        response: Response,
+                        limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = None,
+                        expand: Optional[str] = Query(None, pattern="^event$",
+                                                      description="`event` to embed each booking's event"),
+                        pool = Depends(get_pool)):
     """
-    List bookings for a specific user.
+    List bookings for a specific user, with cursor-based pagination.
+
+    Read from the primary, so a user sees a booking as soon as it is made.
+
+    The cursor for the next page is returned in the `X-Next-Cursor` response header.
+    With `expand=event` every booking carries its event (details and current
+    seats_available), so clients need no `GET /events/{id}` per booking. The
+    events come from a request-scoped `EventLoader` on the primary, bypassing the
+    event cache: each event once, in one query.
 
     Args:
         user_id (str): UUID of the user
+        response (Response): used to set the `X-Next-Cursor` header
+        limit (int): maximum number of bookings to return (default 50)
+        cursor (Optional[str]): opaque cursor from a previous page
+        expand (Optional[str]): `event` to embed the event of each booking
         pool: DB connection pool (injected)
 
     Returns:
         list[BookingOut]: bookings belonging to the user, ordered by created_at desc.
+
+    Raises:
+        HTTPException(400): if the cursor is invalid
     """
-    rows = await get_user_bookings(pool, user_id)
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = await get_user_bookings(pool, user_id, limit, before)
+    cursor = next_cursor(rows, limit, 'created_at')
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    if expand == 'event':
+        loader = EventLoader(pool, fresh=True)
+
+        async def embed(booking: dict):
+            booking['event'] = await loader.load(booking['event_id'])
+
+        await asyncio.gather(*(embed(booking) for booking in rows))
     return rows
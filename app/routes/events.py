@@ -2,17 +2,38 @@
 Event routes.
 
 CRUD endpoints for events:
-- list events
+- list events, or fetch several by id in one request
+- search events (keywords, venue, start time range, seats left) with facets
 - get a single event
 - create an event
 - update an event
 - delete an event
+- bulk import events (CSV / NDJSON)
+- create / view an event's seat map
+- join / leave an event's waitlist
+- stream live seat availability (Server-Sent Events)
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from ..schemas import EventCreate, EventOut
-from ..db import init_pool
-from ..crud import list_events, get_event, create_event, update_event, delete_event
+import asyncio
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional
+from ..schemas import EventCreate, EventOut, EventSearchOut, ImportReport, SeatMapCreate, SeatOut, WaitlistJoin, \
+    WaitlistEntryOut
+from ..db import init_pool, init_read_pool
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, next_cursor
+from ..cache import event_cache
+from ..loaders import EventLoader
+from ..responses import rows_response
+from ..importer import import_events, iter_lines
+from ..seatmap import seat_maps
+from ..waitlist import waitlist_promoter
+from ..streams import availability_hub
+from ..config import settings
+from ..crud import list_events, get_event, create_event, update_event, delete_event, create_seats, list_seats, \
+    join_waitlist, leave_waitlist, search_events, event_search_facets
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -27,27 +48,216 @@ async def get_pool():
     return await init_pool()
 
 
+async def get_read_pool():
+    """
+    Dependency to provide the read pool (replica when DATABASE_REPLICA_URL is set).
+
+    Returns:
+        asyncpg.Pool: the pool created by init_read_pool()
+    """
+    return await init_read_pool()
+
+
 @router.get("/", response_model=List[EventOut])
-async def read_events(limit: int = 25, offset: int = 0, pool = Depends(get_pool)):
+async def read_events(response: Response,
+                      limit: int = Query(25, ge=1, le=MAX_PAGE_SIZE),
+                      cursor: Optional[str] = None,
+                      offset: int = Query(0, ge=0, deprecated=True),
+                      ids: Optional[str] = Query(None, description="Comma-separated event ids to fetch"),
+                      pool = Depends(get_read_pool)):
     """
-    List events with pagination.
+    List events ordered by start time, with cursor-based pagination.
+
+    The cursor for the next page is returned in the `X-Next-Cursor` response
+    header (absent on the last page). Pass it back as `?cursor=` to continue.
+
+    With `ids`, returns those events instead (in the order given, unknown ids
+    left out, no pagination): cached ones from the event cache, the rest in a
+    single query.
 
     Args:
+        response (Response): used to set the `X-Next-Cursor` header
         limit (int): maximum number of events to return (default 25)
-        offset (int): offset for pagination (default 0)
+        cursor (Optional[str]): opaque cursor from a previous page
+        offset (int): deprecated offset pagination, ignored when a cursor is given
+        ids (Optional[str]): comma-separated event UUIDs (at most MAX_PAGE_SIZE)
         pool: DB connection pool (injected)
 
     Returns:
         list[EventOut]: list of events with availability information
+
+    Raises:
+        HTTPException(400): if the cursor is invalid, or ids is empty, too long or
+            contains an invalid UUID
+    """
+    if ids is not None:
+        try:
+            event_ids = list(dict.fromkeys(str(uuid.UUID(i.strip())) for i in ids.split(',') if i.strip()))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid event id")
+        if not event_ids or len(event_ids) > MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_PAGE_SIZE} event ids are required")
+        rows = [event for event in await EventLoader(pool).load_many(event_ids) if event is not None]
+        return rows_response(rows, response)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    key = (limit, offset, cursor)
+    rows = event_cache.get_page(key)
+    if rows is None:
+        generation = event_cache.generation
+        rows = await list_events(await event_cache.refill_pool(pool), limit, offset, after)
+        event_cache.set_page(key, rows, generation)
+    cursor = next_cursor(rows, limit, 'start_time')
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    return rows_response(rows, response)
+
+
+@router.get("/search", response_model=EventSearchOut)
+async def search_events_endpoint(response: Response,
+                                 q: Optional[str] = Query(None, max_length=200,
+                                                          description="Keywords (web search syntax: quotes, OR, -word)"),
+                                 venue: Optional[str] = Query(None, max_length=200, description="Venue substring"),
+                                 starts_after: Optional[datetime] = None,
+                                 starts_before: Optional[datetime] = None,
+                                 available: bool = Query(False, description="Only events with seats left"),
+                                 sort: str = Query('start_time', pattern="^(start_time|relevance)$"),
+                                 limit: int = Query(25, ge=1, le=MAX_PAGE_SIZE),
+                                 cursor: Optional[str] = None,
+                                 facets: bool = Query(False, description="Include counts per venue and month"),
+                                 pool = Depends(get_read_pool)):
     """
-    rows = await list_events(pool, limit, offset)
-    return rows
+    Search events by keywords over name, venue and description, venue substring,
+    start time range (`starts_after` inclusive, `starts_before` exclusive) and seats left.
+
+    With `sort=start_time` (default) results are paged like `GET /events/`: the
+    cursor of the next page is in the `X-Next-Cursor` header. `sort=relevance`
+    (requires `q`) returns the `limit` best matches, without further pages.
+    Declared before `/{event_id}` so "search" is not taken for an event id.
+
+    Args:
+        response (Response): used to set the `X-Next-Cursor` header
+        q (Optional[str]): keywords
+        venue (Optional[str]): case-insensitive venue substring
+        starts_after (Optional[datetime]): earliest start time
+        starts_before (Optional[datetime]): start time upper bound
+        available (bool): only events with seats_available > 0
+        sort (str): `start_time` or `relevance`
+        limit (int): maximum number of events to return (default 25)
+        cursor (Optional[str]): opaque cursor from a previous page
+        facets (bool): also count all matches per venue and start month
+        pool: DB connection pool (injected)
+
+    Returns:
+        EventSearchOut: matching events, and facets when requested
+
+    Raises:
+        HTTPException(400): if the cursor is invalid, or relevance sort is used without `q` or with a cursor
+    """
+    if sort == 'relevance' and (not q or cursor):
+        raise HTTPException(status_code=400, detail="Relevance sort requires q and has no cursor")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    filters = dict(q=q, venue=venue, starts_after=starts_after, starts_before=starts_before, available=available)
+    if facets:
+        rows, counts = await asyncio.gather(search_events(pool, sort=sort, limit=limit, after=after, **filters),
+                                            event_search_facets(pool, **filters))
+    else:
+        rows, counts = await search_events(pool, sort=sort, limit=limit, after=after, **filters), None
+    if sort == 'start_time':
+        cursor = next_cursor(rows, limit, 'start_time')
+        if cursor:
+            response.headers['X-Next-Cursor'] = cursor
+    return rows_response({'events': rows, 'facets': counts}, response)
+
+
+@router.get("/stream", response_class=StreamingResponse,
+            responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_seat_availability(ids: str = Query(..., description="Comma-separated event ids"),
+                                   pool = Depends(get_pool)):
+    """
+    Stream live `seats_available` updates for one or more events (Server-Sent Events).
+
+    The current value of every event is sent first, then a new `seats` message
+    whenever it changes, at most once per SSE_COALESCE_INTERVAL_SECONDS per
+    event. Slow clients skip intermediate values. Values are read from the
+    primary, so they are never behind a replica. Declared before
+    `/{event_id}` so "stream" is not taken for an event id.
+
+    Args:
+        ids (str): comma-separated event UUIDs (at most SSE_MAX_EVENTS_PER_STREAM)
+        pool: DB connection pool (injected)
+
+    Returns:
+        StreamingResponse: `text/event-stream` of `event: seats` messages with
+            data `{"event_id", "seats_available"}` (null once the event is deleted)
+
+    Raises:
+        HTTPException(400): if ids is empty, too long or contains an invalid UUID
+        HTTPException(404): if none of the events exist, or streaming is disabled
+        HTTPException(503): if this worker already serves SSE_MAX_STREAMS streams
+    """
+    if not settings.SSE_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        event_ids = list(dict.fromkeys(str(uuid.UUID(i.strip())) for i in ids.split(',') if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid event id")
+    if not event_ids or len(event_ids) > settings.SSE_MAX_EVENTS_PER_STREAM:
+        raise HTTPException(status_code=400,
+                            detail=f"Between 1 and {settings.SSE_MAX_EVENTS_PER_STREAM} event ids are required")
+    try:
+        stream = await availability_hub.open(pool, event_ids)
+    except Exception as e:
+        if str(e) == 'TOO_MANY_STREAMS':
+            raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '5'})
+        raise
+    if all(value is None for value in stream.pending.values()):
+        availability_hub.close(stream)
+        raise HTTPException(status_code=404, detail="Event not found")
+    return StreamingResponse(availability_hub.messages(stream), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+                             background=BackgroundTask(availability_hub.close, stream))
+
+
+@router.post("/import", response_model=ImportReport)
+async def import_events_endpoint(request: Request, format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+                                 pool = Depends(get_pool)):
+    """
+    Bulk import events from the raw request body.
+
+    The body is either CSV with a header row (name, venue, description,
+    start_time, end_time, capacity) or NDJSON with one EventCreate object per
+    line. The format comes from `?format=`, otherwise from the Content-Type
+    (`application/x-ndjson` / `application/json` mean NDJSON, anything else CSV).
+    The body is streamed and validated row by row. Valid rows are loaded in
+    batches through COPY. Rejected rows (invalid, or refused by the database) are
+    listed in the report with their record number and do not stop the import.
+
+    Args:
+        request (Request): raw request, streamed
+        format (Optional[str]): `csv` or `ndjson`
+        pool: DB connection pool (injected)
+
+    Returns:
+        ImportReport: number of imported and failed rows, with per-row errors
+    """
+    if format is None:
+        content_type = request.headers.get('content-type', '')
+        format = 'ndjson' if 'ndjson' in content_type or 'json' in content_type else 'csv'
+    report = await import_events(pool, iter_lines(request.stream()), format)
+    event_cache.invalidate()
+    return report
 
 
 @router.get("/{event_id}", response_model=EventOut)
-async def read_event(event_id: str, pool = Depends(get_pool)):
+async def read_event(event_id: str, pool = Depends(get_read_pool)):
     """
-    Get a single event by ID.
+    Get a single event by ID (served from the event cache when possible).
 
     Args:
         event_id (str): UUID of the event
@@ -59,9 +269,13 @@ async def read_event(event_id: str, pool = Depends(get_pool)):
     Raises:
         HTTPException(404): if event not found
     """
-    row = await get_event(pool, event_id)
-    if not row:
-        raise HTTPException(status_code=404, detail="Event not found")
+    row = event_cache.get_event(event_id)
+    if row is None:
+        generation = event_cache.generation
+        row = await get_event(await event_cache.refill_pool(pool, [event_id]), event_id)
+        if not row:
+            raise HTTPException(status_code=404, detail="Event not found")
+        event_cache.set_event(event_id, row, generation)
     return row
 
 
@@ -78,6 +292,7 @@ async def create_new_event(payload: EventCreate, pool = Depends(get_pool)):
         EventOut: newly created event record (includes seats_available)
     """
     row = await create_event(pool, payload.model_dump())
+    event_cache.invalidate(row['id'])
     return row
 
 
@@ -98,6 +313,7 @@ async def update_existing_event(event_id: str, payload: EventCreate, pool=Depend
         HTTPException(404): if event not found
     """
     row = await update_event(pool, event_id, payload.model_dump())
+    event_cache.invalidate(event_id)
     if not row:
         raise HTTPException(status_code=404, detail="Event not found")
     return row
@@ -119,6 +335,109 @@ async def remove_event(event_id: str, pool=Depends(get_pool)):
         HTTPException(404): if event not found
     """
     row = await delete_event(pool, event_id)
+    event_cache.invalidate(event_id)
     if not row:
         raise HTTPException(status_code=404, detail="Event not found")
     return row
+
+
+@router.post("/{event_id}/seats", response_model=dict)
+async def create_seat_map(event_id: str, payload: SeatMapCreate, pool=Depends(get_pool)):
+    """
+    Create (or extend) the seat map of an event for assigned seating.
+
+    Seats are labelled <row><number>, e.g. `{"rows": {"A": 20, "B": 20}}` creates
+    A1..A20 and B1..B20. The total number of seats may not exceed the event capacity.
+
+    Args:
+        event_id (str): UUID of the event
+        payload (SeatMapCreate): rows and their seat counts
+        pool: DB connection pool (injected)
+
+    Returns:
+        dict: { "event_id": <id>, "seats": <total seats of the event> }
+
+    Raises:
+        HTTPException(404): if event not found
+        HTTPException(409): if the seat map would exceed the event capacity
+    """
+    try:
+        total = await create_seats(pool, event_id, payload.rows)
+    except Exception as e:
+        if str(e) == 'SEATS_EXCEED_CAPACITY':
+            raise HTTPException(status_code=409, detail="Seat map exceeds event capacity")
+        raise HTTPException(status_code=400, detail=str(e))
+    if total is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    seat_maps.discard(event_id)
+    return {'event_id': event_id, 'seats': total}
+
+
+@router.get("/{event_id}/seats", response_model=List[SeatOut])
+async def read_seat_map(event_id: str, pool=Depends(get_read_pool)):
+    """
+    List the seats of an event with their status, in row order.
+
+    Args:
+        event_id (str): UUID of the event
+        pool: DB connection pool (injected)
+
+    Returns:
+        list[SeatOut]: seats (AVAILABLE / HELD / BOOKED / UNAVAILABLE)
+    """
+    return await list_seats(pool, event_id)
+
+
+@router.post("/{event_id}/waitlist", response_model=WaitlistEntryOut)
+async def join_event_waitlist(event_id: str, payload: WaitlistJoin, pool=Depends(get_pool)):
+    """
+    Join (or update the quantity of) a user's entry on an event's waitlist.
+
+    When seats are freed, waitlisted users are promoted in the order they joined:
+    they get a hold or a confirmed booking depending on WAITLIST_PROMOTION_MODE.
+
+    Args:
+        event_id (str): UUID of the event
+        payload (WaitlistJoin): user_id and quantity wanted
+        pool: DB connection pool (injected)
+
+    Returns:
+        WaitlistEntryOut: the waitlist entry
+
+    Raises:
+        HTTPException(404): if the event or user does not exist
+    """
+    try:
+        entry = await join_waitlist(pool, event_id, payload.user_id, payload.quantity)
+    except Exception as e:
+        if str(e) == 'NOT_FOUND':
+            raise HTTPException(status_code=404, detail="Event or user not found")
+        raise HTTPException(status_code=400, detail=str(e))
+    # seats may already be free: let the promoter look at this event
+    waitlist_promoter.notify(event_id)
+    return entry
+
+
+@router.delete("/{event_id}/waitlist/{user_id}", response_model=WaitlistEntryOut)
+async def leave_event_waitlist(event_id: str, user_id: str, pool=Depends(get_pool)):
+    """
+    Remove a user from an event's waitlist.
+
+    Args:
+        event_id (str): UUID of the event
+        user_id (str): UUID of the user
+        pool: DB connection pool (injected)
+
+    Returns:
+        WaitlistEntryOut: the removed entry
+
+    Raises:
+        HTTPException(404): if the user is not on the waitlist
+    """
+    try:
+        entry = await leave_waitlist(pool, event_id, user_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not entry:
+        raise HTTPException(status_code=404, detail="Not on the waitlist")
+    return entry
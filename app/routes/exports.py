@@ -0,0 +1,61 @@
+"""
+Export routes.
+
+Streaming bulk exports for finance reconciliation and the data warehouse:
+- bookings, users and booking_events as NDJSON or CSV,
+- with an optional `since` watermark for incremental pulls.
+"""
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from ..db import init_read_pool
+from ..crud import export_csv, export_ndjson
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+async def get_read_pool():
+    """
+    Dependency to provide the read pool (replica when DATABASE_REPLICA_URL is set).
+
+    Returns:
+        asyncpg.Pool: the pool created by init_read_pool()
+    """
+    return await init_read_pool()
+
+
+@router.get("/{dataset}")
+async def export_dataset(dataset: Literal["bookings", "users", "booking_events"],
+                         format: Literal["ndjson", "csv"] = "ndjson",
+                         since: Optional[datetime] = None,
+                         pool=Depends(get_read_pool)):
+    """
+    Stream every row of a dataset without materialising it in memory.
+
+    NDJSON is read through a server-side cursor; CSV is produced by
+    `COPY ... TO STDOUT`. Rows are written straight to the response, so memory
+    stays flat regardless of the export size.
+
+    Args:
+        dataset (str): one of `bookings`, `users`, `booking_events`
+        format (str): `ndjson` (default) or `csv`
+        since (Optional[datetime]): only export rows created (for bookings: updated)
+            at or after this timestamp
+        pool: DB connection pool (injected)
+
+    Returns:
+        StreamingResponse: the exported rows
+    """
+    stream = export_csv if format == 'csv' else export_ndjson
+    filename = f"{dataset}.{format}"
+    return StreamingResponse(
+        stream(pool, dataset, since),
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
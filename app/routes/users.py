@@ -3,11 +3,13 @@ User routes.
 
 Provides endpoints to create, list, retrieve and delete users.
 """
-from fastapi import APIRouter, Depends, HTTPException
-from ..db import init_pool
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from ..db import init_pool, init_read_pool
 from ..crud import create_user, list_users, delete_user, get_user
 from ..schemas import CreateUser, UserOut
-from typing import List
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, next_cursor
+from ..responses import rows_response
+from typing import List, Optional
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -22,6 +24,16 @@ async def get_pool():
     return await init_pool()
 
 
+async def get_read_pool():
+    """
+    Dependency to provide the read pool (replica when DATABASE_REPLICA_URL is set).
+
+    Returns:
+        asyncpg.Pool: the pool created by init_read_pool()
+    """
+    return await init_read_pool()
+
+
 @router.post("/", response_model=UserOut)
 async def register_user(payload: CreateUser, pool=Depends(get_pool)):
     """
@@ -47,18 +59,36 @@ async def register_user(payload: CreateUser, pool=Depends(get_pool)):
 
 
 @router.get("/", response_model=List[UserOut])
-async def get_users(pool=Depends(get_pool)):
+async def get_users(response: Response,
+                    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[str] = None,
+                    pool=Depends(get_read_pool)):
     """
-    List users ordered by creation time descending.
+    List users ordered by creation time descending, with cursor-based pagination.
+
+    The cursor for the next page is returned in the `X-Next-Cursor` response header.
 
     Args:
+        response (Response): used to set the `X-Next-Cursor` header
+        limit (int): maximum number of users to return (default 50)
+        cursor (Optional[str]): opaque cursor from a previous page
         pool: DB connection pool (injected)
 
     Returns:
         list[UserOut]: list of users
+
+    Raises:
+        HTTPException(400): if the cursor is invalid
     """
-    rows = await list_users(pool)
-    return rows
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = await list_users(pool, limit, before)
+    cursor = next_cursor(rows, limit, 'created_at')
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    return rows_response(rows, response)
 
 
 @router.delete("/{user_id}", response_model=UserOut)
@@ -83,7 +113,7 @@ async def remove_user(user_id: str, pool=Depends(get_pool)):
 
 
 @router.get("/{user_id}", response_model=UserOut)
-async def read_user(user_id: str, pool=Depends(get_pool)):
+async def read_user(user_id: str, pool=Depends(get_read_pool)):
     """
     Retrieve a single user by ID.
 
@@ -2,8 +2,8 @@
 Pydantic models (schemas) used for request validation and response serialization.
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -29,6 +29,39 @@ class EventOut(BaseModel):
     seats_available: int
 
 
+class FacetCount(BaseModel):
+    """Schema for the number of search matches sharing one facet value."""
+    value: Optional[str]
+    count: int
+
+
+class EventSearchFacets(BaseModel):
+    """Schema for counts over all events matching a search."""
+    total: int
+    available: int
+    venues: List[FacetCount]
+    months: List[FacetCount]
+
+
+class EventSearchOut(BaseModel):
+    """Schema for event search response (one page, facets when requested)."""
+    events: List[EventOut]
+    facets: Optional[EventSearchFacets] = None
+
+
+class ImportRowError(BaseModel):
+    """Schema for one rejected row of a bulk import."""
+    row: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    """Schema for bulk import result."""
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+
 class BookingRequest(BaseModel):
     """Schema for booking tickets."""
     user_id: str
@@ -37,6 +70,68 @@ class BookingRequest(BaseModel):
     idempotency_key: Optional[str] = None
 
 
+class HoldRequest(BaseModel):
+    """Schema for holding tickets while the buyer checks out."""
+    user_id: str
+    event_id: str
+    quantity: int = Field(..., gt=0)
+
+
+class HoldOut(BaseModel):
+    """Schema for hold response."""
+    id: str
+    status: str
+    expires_at: datetime
+
+
+class InventoryShardsUpdate(BaseModel):
+    """Schema for switching an event's inventory sharding (0 turns it off)."""
+    shards: int = Field(..., ge=0, le=64)
+
+
+class AdmissionLimits(BaseModel):
+    """Schema for changing admission control limits at runtime (omitted fields are kept)."""
+    enabled: Optional[bool] = None
+    max_in_flight: Optional[int] = Field(None, ge=1)
+    max_in_flight_per_event: Optional[int] = Field(None, ge=1)
+    max_queue: Optional[int] = Field(None, ge=0)
+    queue_timeout_seconds: Optional[float] = Field(None, gt=0)
+    max_pool_wait_seconds: Optional[float] = Field(None, gt=0)
+
+
+class WaitlistJoin(BaseModel):
+    """Schema for joining an event's waitlist."""
+    user_id: str
+    quantity: int = Field(1, gt=0)
+
+
+class WaitlistEntryOut(BaseModel):
+    """Schema for a waitlist entry."""
+    id: str
+    event_id: str
+    user_id: str
+    quantity: int
+    joined_at: datetime
+
+
+class BatchBookingRequest(BaseModel):
+    """Schema for booking many items in one request."""
+    items: List[BookingRequest] = Field(..., min_length=1, max_length=1000)
+    atomic: bool = False
+
+
+class BatchBookingResult(BaseModel):
+    """Schema for the outcome of one item of a batch booking."""
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+
+class BatchBookingOut(BaseModel):
+    """Schema for batch booking response (results in request order)."""
+    results: List[BatchBookingResult]
+
+
 class BookingOut(BaseModel):
     """Schema for booking response."""
     id: str
@@ -45,6 +140,42 @@ class BookingOut(BaseModel):
     quantity: int
     status: str
     created_at: datetime
+    # only with ?expand=event
+    event: Optional[EventOut] = None
+
+
+class SeatMapCreate(BaseModel):
+    """Schema for creating a seat map: row name -> number of seats in that row."""
+    rows: Dict[str, int] = Field(..., min_length=1)
+
+
+class SeatOut(BaseModel):
+    """Schema for one seat of an event's seat map."""
+    seat_label: str
+    seat_row: Optional[str]
+    seat_number: Optional[int]
+    status: str
+
+
+class SeatBookingRequest(BaseModel):
+    """Schema for assigned-seat booking: either best `quantity` seats or specific `seat_labels`."""
+    user_id: str
+    event_id: str
+    quantity: Optional[int] = Field(None, gt=0, le=50)
+    seat_labels: Optional[List[str]] = Field(None, min_length=1, max_length=50)
+
+    @model_validator(mode='after')
+    def check_one_mode(self):
+        if (self.quantity is None) == (self.seat_labels is None):
+            raise ValueError('provide exactly one of quantity or seat_labels')
+        return self
+
+
+class SeatBookingOut(BaseModel):
+    """Schema for assigned-seat booking response."""
+    id: str
+    status: str
+    seats: List[str]
 
 
 class CreateUser(BaseModel):
@@ -68,3 +199,26 @@ class AnalyticsRow(BaseModel):
     capacity: int
     total_booked: int
     utilization: Optional[float]
+
+
+class RollupBucket(BaseModel):
+    """Schema for one time bucket of booking activity."""
+    bucket: datetime
+    bookings: int
+    tickets_booked: int
+    cancellations: int
+    tickets_cancelled: int
+    holds: int
+    holds_released: int
+
+
+class EventVelocity(BaseModel):
+    """Schema for an event's recent sales velocity."""
+    event_id: str
+    name: str
+    bookings: int
+    tickets_booked: int
+    cancellations: int
+    tickets_cancelled: int
+    tickets_per_minute: float
+    cancellation_rate: Optional[float]
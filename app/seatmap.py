@@ -0,0 +1,168 @@
+"""
+Assigned-seating allocation engine for Evently.
+
+Each worker keeps a compact occupancy map per event (one byte per seat, in row
+order) so "best N contiguous seats" is found with a C-level `bytes.find` instead
+of a database scan. The map is only a hint: the final claim goes through
+`crud.claim_seats`, which locks the chosen seats with FOR UPDATE SKIP LOCKED.
+When a claim loses a race, the seats it could not get are marked taken and the
+next candidate is tried.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from asyncpg import Pool
+from .crud import claim_seats, list_seats
+from .metrics import CONTENTION
+
+MAX_CLAIM_ATTEMPTS = 5
+SEAT_MAP_TTL_SECONDS = 30.0
+MAX_SEAT_MAPS = 1000
+
+FREE = 0
+TAKEN = 1
+
+
+class SeatMap:
+    """
+    Occupancy map of one event's seats.
+
+    Attributes:
+        labels (list[str]): seat labels ordered by row, then seat number.
+        rows (list[tuple[int, int]]): [start, end) index range of each row in `labels`.
+        taken (bytearray): FREE/TAKEN flag per seat, aligned with `labels`.
+    """
+
+    def __init__(self, seats: list):
+        self.labels = []
+        self.rows = []
+        self.taken = bytearray()
+        self.loaded_at = time.monotonic()
+        current_row = object()
+        for seat in seats:
+            if seat['seat_row'] != current_row:
+                current_row = seat['seat_row']
+                self.rows.append([len(self.labels), len(self.labels)])
+            self.labels.append(seat['seat_label'])
+            self.taken.append(FREE if seat['status'] == 'AVAILABLE' else TAKEN)
+            self.rows[-1][1] = len(self.labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > SEAT_MAP_TTL_SECONDS
+
+    def find_contiguous(self, quantity: int) -> Optional[list]:
+        """
+        Return the first run of `quantity` adjacent free seats in one row (front rows first).
+        """
+        run = bytes(quantity)
+        for start, end in self.rows:
+            position = self.taken.find(run, start, end)
+            if position != -1:
+                return self.labels[position:position + quantity]
+        return None
+
+    def mark(self, labels: list, flag: int):
+        for label in labels:
+            position = self.index.get(label)
+            if position is not None:
+                self.taken[position] = flag
+
+
+class SeatMapRegistry:
+    """
+    Per-worker LRU of seat maps, loaded lazily from the `seats` table.
+
+    Concurrent requests for a map that is (re)loading share a single load, so
+    they all allocate from the same map instance.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._maps = OrderedDict()
+        self._loading = {}
+
+    async def _load(self, pool: Pool, event_id: str) -> SeatMap:
+        seat_map = SeatMap(await list_seats(pool, event_id))
+        self._maps[event_id] = seat_map
+        self._maps.move_to_end(event_id)
+        while len(self._maps) > self.maxsize:
+            self._maps.popitem(last=False)
+        return seat_map
+
+    async def get(self, pool: Pool, event_id: str, refresh: bool = False) -> SeatMap:
+        seat_map = self._maps.get(event_id)
+        if seat_map is not None and not refresh and not seat_map.stale:
+            self._maps.move_to_end(event_id)
+            return seat_map
+        loading = self._loading.get(event_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(pool, event_id))
+            self._loading[event_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(event_id, None))
+        return await asyncio.shield(loading)
+
+    def discard(self, event_id: str):
+        self._maps.pop(event_id, None)
+
+
+# Global seat map registry shared by the booking routes
+seat_maps = SeatMapRegistry(MAX_SEAT_MAPS)
+
+
+async def book_best_seats(pool: Pool, user_id: str, event_id: str, quantity: int):
+    """
+    Book the best `quantity` contiguous seats of an event.
+
+    Returns:
+        dict: { "id": <booking_id>, "status": "CONFIRMED", "seats": [labels] }
+
+    Raises:
+        Exception('NO_CONTIGUOUS_SEATS'): if no row has enough adjacent free seats.
+        Exception('SEATS_CONTENDED'): if every attempt lost its race to other buyers.
+        Exception('NOT_ENOUGH_SEATS'): if the inventory counter has no room left.
+    """
+    seat_map = await seat_maps.get(pool, event_id)
+    refreshed = False
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        candidate = seat_map.find_contiguous(quantity)
+        if candidate is None:
+            if refreshed:
+                raise Exception('NO_CONTIGUOUS_SEATS')
+            # seats may have been freed by another worker since the map was loaded
+            seat_map = await seat_maps.get(pool, event_id, refresh=True)
+            refreshed = True
+            continue
+        # mark first so concurrent callers in this worker pick other seats
+        seat_map.mark(candidate, TAKEN)
+        try:
+            booking, unavailable = await claim_seats(pool, user_id, event_id, candidate)
+        except Exception:
+            seat_map.mark(candidate, FREE)
+            raise
+        if booking:
+            return booking
+        seat_map.mark([label for label in candidate if label not in unavailable], FREE)
+    CONTENTION.inc('seats_contended')
+    raise Exception('SEATS_CONTENDED')
+
+
+async def book_specific_seats(pool: Pool, user_id: str, event_id: str, labels: list):
+    """
+    Book exactly the requested seats.
+
+    Raises:
+        Exception('SEATS_UNAVAILABLE'): if any requested seat is taken or being claimed.
+        Exception('NOT_ENOUGH_SEATS'): if the inventory counter has no room left.
+    """
+    seat_map = await seat_maps.get(pool, event_id)
+    booking, unavailable = await claim_seats(pool, user_id, event_id, labels)
+    if not booking:
+        seat_map.mark(unavailable, TAKEN)
+        raise Exception('SEATS_UNAVAILABLE')
+    seat_map.mark(labels, TAKEN)
+    return booking
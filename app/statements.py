@@ -0,0 +1,101 @@
+"""
+Registered hot queries and connection setup for Evently.
+
+Hot queries are registered once by name (`register`), next to the CRUD code that
+uses them. CRUD functions run them with `(await conn.prepared(name)).fetch(...)`,
+which goes through asyncpg's per-connection statement cache. With
+`statement_cache_size` > 0 the pool `init` hook (`init_connection`) prepares every
+registered query into that cache when a connection opens, so no request pays for
+parsing and planning them; they are then reused across checkouts. With 0
+(PgBouncer in transaction mode) nothing is prepared ahead and each query runs as
+an unnamed statement, so no named prepared statement is ever left on a server
+connection. Keep the cache larger than the number of registered queries, or
+ad-hoc queries evict them.
+
+Each connection also decodes UUIDs straight to `str` (text codec), so rows can
+be handed to the response models with a plain `dict(record)`; enums already
+arrive as `str`.
+
+Prepared statements are tied to the schema they were planned against: recycle
+the pools (restart the workers) after a migration changes a registered query's
+tables.
+"""
+
+import logging
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# statement name -> SQL, filled by `register` at import time
+STATEMENTS = {}
+
+
+def register(name: str, sql: str) -> str:
+    """
+    Register a hot query under `name` and return the name.
+    """
+    STATEMENTS[name] = sql
+    return name
+
+
+class RegisteredStatement:
+    """
+    A registered query bound to a connection, run through its statement cache.
+    """
+
+    __slots__ = ('_conn', '_sql')
+
+    def __init__(self, conn: asyncpg.Connection, sql: str):
+        self._conn = conn
+        self._sql = sql
+
+    async def fetch(self, *args):
+        return await self._conn.fetch(self._sql, *args)
+
+    async def fetchrow(self, *args):
+        return await self._conn.fetchrow(self._sql, *args)
+
+    async def fetchval(self, *args):
+        return await self._conn.fetchval(self._sql, *args)
+
+    async def execute(self, *args) -> str:
+        return await self._conn.execute(self._sql, *args)
+
+
+class EventlyConnection(asyncpg.Connection):
+    """
+    asyncpg connection that runs registered queries by name.
+    """
+
+    async def prepared(self, name: str) -> RegisteredStatement:
+        """
+        Return the query registered as `name`, bound to this connection.
+        """
+        return RegisteredStatement(self, STATEMENTS[name])
+
+    async def prepare_registered(self):
+        """
+        Prepare every registered statement into the statement cache.
+
+        A statement that cannot be prepared yet (e.g. its table is created by a
+        pending migration) is skipped and prepared on first use instead.
+        """
+        for name, sql in STATEMENTS.items():
+            try:
+                # the public prepare() bypasses the statement cache; this is how
+                # asyncpg itself fills it (the statement stays cached when the
+                # returned handle is dropped)
+                await self._prepare(sql, use_cache=True)
+            except asyncpg.PostgresError as e:
+                logger.warning("could not prepare statement %s: %s", name, e)
+
+
+async def init_connection(conn: EventlyConnection, statement_cache_size: int = 100):
+    """
+    Pool `init` hook: install type codecs, then, when the pool has a statement
+    cache, prepare the registered statements into it.
+    """
+    await conn.set_type_codec('uuid', schema='pg_catalog', encoder=str, decoder=str, format='text')
+    if statement_cache_size > 0:
+        await conn.prepare_registered()
@@ -0,0 +1,212 @@
+"""
+Live seat-availability streams (Server-Sent Events) for Evently.
+
+Clients watching an on-sale open one `GET /events/stream?ids=...` connection
+instead of polling `GET /events/{id}`. Every worker drives all of its streams
+from the single `event_changed` LISTEN connection of `app.listener`:
+
+- notifications only mark events dirty; at most once per
+  SSE_COALESCE_INTERVAL_SECONDS the dirty events that somebody watches are
+  re-read in one query (`crud.get_seats_available`) and fanned out, so a burst
+  of bookings costs one query and one message per event per interval;
+- each stream keeps only the latest unsent value per watched event, so a slow
+  client never queues a backlog: it skips intermediate values and receives
+  the current one when it catches up (memory per stream is bounded by
+  SSE_MAX_EVENTS_PER_STREAM);
+- streams only receive values that differ from the last one they were sent.
+
+Messages are `event: seats` with data `{"event_id": ..., "seats_available": N}`;
+`seats_available` is null once the event is deleted. A comment line is sent
+every SSE_KEEPALIVE_SECONDS so proxies keep idle streams open.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from asyncpg import Pool
+from .config import settings
+from .crud import get_seats_available
+from .listener import event_listener
+from .metrics import SSE_STREAMS, SSE_WATCHED_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilityStream:
+    """
+    One client stream: the events it watches and their latest unsent values.
+    """
+
+    def __init__(self, event_ids: list):
+        self.event_ids = event_ids
+        self.pending = {}
+        self.sent = {}
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def offer(self, event_id: str, seats_available: Optional[int]):
+        """
+        Record the current value of an event; it replaces any value not sent yet.
+        """
+        if self.sent.get(event_id, -1) == seats_available:
+            self.pending.pop(event_id, None)
+            return
+        self.pending[event_id] = seats_available
+        self.wakeup.set()
+
+    def take(self) -> str:
+        """
+        Return the pending values as SSE messages and mark them sent.
+        """
+        updates, self.pending = self.pending, {}
+        self.wakeup.clear()
+        messages = []
+        for event_id, seats_available in updates.items():
+            self.sent[event_id] = seats_available
+            data = json.dumps({'event_id': event_id, 'seats_available': seats_available})
+            messages.append(f'event: seats\ndata: {data}\n\n')
+        return ''.join(messages)
+
+
+class AvailabilityHub:
+    """
+    Per-worker fan-out of seat-availability changes to the open streams.
+
+    Attributes:
+        interval (float): minimum seconds between two updates of one event.
+        max_streams (int): streams accepted by this worker.
+        keepalive (float): seconds of silence before a keep-alive comment is sent.
+    """
+
+    def __init__(self, interval: float, max_streams: int, keepalive: float):
+        self.interval = interval
+        self.max_streams = max_streams
+        self.keepalive = keepalive
+        self._watchers = {}
+        self._streams = 0
+        self._dirty = set()
+        self._wake = asyncio.Event()
+        self._task = None
+        SSE_STREAMS.collect_from(lambda: {(): self._streams})
+        SSE_WATCHED_EVENTS.collect_from(lambda: {(): len(self._watchers)})
+
+    def notify(self, event_id: Optional[str]):
+        """
+        Listener callback: an event changed (None means "anything may have changed").
+        """
+        if not self._watchers:
+            return
+        if event_id is None:
+            self._dirty.update(self._watchers)
+        elif event_id in self._watchers:
+            self._dirty.add(event_id)
+        else:
+            return
+        self._wake.set()
+
+    async def _publish(self, pool: Pool, event_ids: list):
+        values = await get_seats_available(pool, event_ids)
+        for event_id in event_ids:
+            for stream in self._watchers.get(event_id, ()):
+                stream.offer(event_id, values.get(event_id))
+
+    async def _run(self, pool: Pool):
+        while True:
+            await self._wake.wait()
+            # let the burst that woke us settle: one read per event per interval
+            await asyncio.sleep(self.interval)
+            self._wake.clear()
+            event_ids, self._dirty = [e for e in self._dirty if e in self._watchers], set()
+            if not event_ids:
+                continue
+            try:
+                await self._publish(pool, event_ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("seat availability refresh failed")
+                self._dirty.update(event_ids)
+                self._wake.set()
+
+    async def open(self, pool: Pool, event_ids: list) -> AvailabilityStream:
+        """
+        Register a stream and queue the current values of its events.
+
+        Raises:
+            Exception('TOO_MANY_STREAMS'): if this worker already serves `max_streams` streams.
+        """
+        if self._streams >= self.max_streams:
+            raise Exception('TOO_MANY_STREAMS')
+        stream = AvailabilityStream(event_ids)
+        self._streams += 1
+        # watch first, then read: a change landing in between is published again
+        for event_id in event_ids:
+            self._watchers.setdefault(event_id, set()).add(stream)
+        try:
+            values = await get_seats_available(pool, event_ids)
+        except BaseException:
+            self.close(stream)
+            raise
+        for event_id in event_ids:
+            stream.offer(event_id, values.get(event_id))
+        return stream
+
+    def close(self, stream: AvailabilityStream):
+        """
+        Unregister a stream (events nobody watches any more are dropped). Idempotent.
+        """
+        if stream.closed:
+            return
+        stream.closed = True
+        self._streams -= 1
+        for event_id in stream.event_ids:
+            watchers = self._watchers.get(event_id)
+            if watchers is not None:
+                watchers.discard(stream)
+                if not watchers:
+                    del self._watchers[event_id]
+
+    async def messages(self, stream: AvailabilityStream):
+        """
+        Async iterator of SSE chunks for one stream; closes the stream when the client goes away.
+        """
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(stream.wakeup.wait(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                chunk = stream.take()
+                if chunk:
+                    yield chunk
+        finally:
+            self.close(stream)
+
+    def start(self, pool: Pool):
+        """
+        Start the refresh loop (no-op if it is already running).
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(pool))
+
+    async def stop(self):
+        """
+        Cancel the refresh loop and wait for it to finish.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global hub instance for this worker
+availability_hub = AvailabilityHub(settings.SSE_COALESCE_INTERVAL_SECONDS, settings.SSE_MAX_STREAMS,
+                                   settings.SSE_KEEPALIVE_SECONDS)
+if settings.SSE_ENABLED:
+    event_listener.subscribe(availability_hub.notify)
@@ -0,0 +1,61 @@
+"""
+Background task helpers for Evently.
+
+Maintenance jobs (idempotency-key GC, hold expiry, rollups, ...) run as periodic
+asyncio tasks inside each worker. They are started from `main.on_startup` and
+stopped from `main.on_shutdown`.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Run an async callable every `interval` seconds until stopped.
+
+    Errors are logged and the job simply runs again on the next tick, so a
+    transient database failure never kills the loop.
+
+    Attributes:
+        name (str): name used in log messages.
+        interval (float): seconds to sleep between runs.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable[None]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("periodic task %s failed", self.name)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        Start the loop (no-op if it is already running).
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Cancel the loop and wait for it to finish.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,126 @@
+"""
+Waitlist auto-promotion for Evently.
+
+When seats are freed (cancellations, released or expired holds, capacity
+changes), the head of the event's waitlist is turned into holds or bookings in
+FIFO `joined_at` order. The promoter is driven by the `event_changed`
+notifications of `app.listener`, so every freed seat triggers promotion in every
+worker within milliseconds; a periodic scan catches anything missed while the
+LISTEN connection was down. `crud.promote_waitlist` locks the inventory row and
+claims waitlist rows with SKIP LOCKED, so running the promoter in several
+workers never double-promotes an entry or oversells the event.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from asyncpg import Pool
+from .cache import event_cache
+from .config import settings
+from .crud import events_with_promotable_waitlist, promote_waitlist
+from .listener import event_listener
+
+logger = logging.getLogger(__name__)
+
+# Notifications arriving within this window are promoted together
+PROMOTION_DEBOUNCE_SECONDS = 0.05
+
+
+class WaitlistPromoter:
+    """
+    Per-worker background loop promoting waitlisted users of events with free seats.
+
+    Attributes:
+        mode (str): 'hold' (promoted users get a hold expiring after HOLD_TTL_SECONDS)
+            or 'booking' (promoted users get a CONFIRMED booking).
+        batch_size (int): waitlist entries examined per promotion transaction.
+        scan_interval (float): seconds between full scans for promotable events.
+    """
+
+    def __init__(self, mode: str, batch_size: int, scan_interval: float):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.scan_interval = scan_interval
+        self.promoted = 0
+        self._dirty = set()
+        self._full_scan = True
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def notify(self, event_id: Optional[str]):
+        """
+        Listener callback: an event changed (None means "anything may have changed").
+        """
+        if event_id is None:
+            self._full_scan = True
+        else:
+            self._dirty.add(event_id)
+        self._wake.set()
+
+    async def promote(self, pool: Pool, event_id: str) -> int:
+        """
+        Promote waitlisted users of one event until its free seats or its waitlist run out.
+
+        Returns:
+            int: number of waitlist entries promoted.
+        """
+        ttl = settings.HOLD_TTL_SECONDS if self.mode == 'hold' else None
+        total = 0
+        while True:
+            promoted = await promote_waitlist(pool, event_id, self.batch_size, ttl)
+            total += len(promoted)
+            if len(promoted) < self.batch_size:
+                break
+        if total:
+            self.promoted += total
+            event_cache.invalidate(event_id)
+        return total
+
+    async def _run(self, pool: Pool):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.scan_interval)
+            except asyncio.TimeoutError:
+                self._full_scan = True
+            await asyncio.sleep(PROMOTION_DEBOUNCE_SECONDS)
+            self._wake.clear()
+            event_ids, self._dirty = self._dirty, set()
+            try:
+                if self._full_scan:
+                    self._full_scan = False
+                    event_ids.update(await events_with_promotable_waitlist(pool))
+                for event_id in event_ids:
+                    await self.promote(pool, event_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("waitlist promotion failed")
+                # retry everything on the next scan
+                self._full_scan = True
+
+    def start(self, pool: Pool):
+        """
+        Start the promotion loop (no-op if it is already running).
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(pool))
+
+    async def stop(self):
+        """
+        Cancel the promotion loop and wait for it to finish.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global promoter instance for this worker
+waitlist_promoter = WaitlistPromoter(settings.WAITLIST_PROMOTION_MODE, settings.WAITLIST_PROMOTION_BATCH_SIZE,
+                                     settings.WAITLIST_SCAN_INTERVAL_SECONDS)
+if settings.WAITLIST_PROMOTION_ENABLED:
+    event_listener.subscribe(waitlist_promoter.notify)
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Evently backend.
+
+Run against a local PostgreSQL database configured through DATABASE_URL.
+"""
@@ -0,0 +1,81 @@
+"""
+Benchmark: direct `crud.book_tickets` vs the group-commit booking coalescer.
+
+Fires N concurrent single-seat bookings at one hot event through both paths and
+prints throughput. Requires a migrated database (INIT_DB=true once) in DATABASE_URL.
+
+Usage:
+    python -m benchmarks.coalescer --requests 5000 --concurrency 500
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.crud import create_event, create_user, book_tickets
+from app.coalescer import BookingCoalescer
+from app.db import create_pool
+
+
+async def _setup(pool, capacity: int):
+    user = await create_user(pool, f"bench-{uuid.uuid4()}@example.com", "bench")
+    event = await create_event(pool, {
+        'name': 'coalescer benchmark',
+        'venue': None,
+        'description': None,
+        'start_time': datetime.now(timezone.utc),
+        'end_time': None,
+        'capacity': capacity,
+    })
+    return user['id'], event['id']
+
+
+async def _run(label: str, book, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            try:
+                await book()
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {requests} bookings in {elapsed:.2f}s -> "
+          f"{requests / elapsed:,.0f} bookings/s ({failures} failed)")
+    return requests / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--max-batch', type=int, default=settings.BOOKING_COALESCER_MAX_BATCH)
+    parser.add_argument('--window-ms', type=float, default=settings.BOOKING_COALESCER_WINDOW_MS)
+    args = parser.parse_args()
+
+    pool = await create_pool(settings.DATABASE_URL, min_size=args.pool_size, max_size=args.pool_size)
+    try:
+        user_id, event_id = await _setup(pool, args.requests)
+        direct = await _run('direct', lambda: book_tickets(pool, user_id, event_id, 1),
+                            args.requests, args.concurrency)
+
+        user_id, event_id = await _setup(pool, args.requests)
+        batcher = BookingCoalescer(args.max_batch, args.window_ms)
+        batched = await _run('coalesced', lambda: batcher.submit(pool, user_id, event_id, 1),
+                             args.requests, args.concurrency)
+        print(f"speedup    {batched / direct:.1f}x")
+    finally:
+        await pool.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,421 @@
+"""
+Load and contention benchmark suite for the Evently API.
+
+Drives the FastAPI app over HTTP, either in-process (httpx ASGI transport, no
+network) or against real uvicorn workers started for the run, through a set of
+scenarios:
+
+    hot_event      many concurrent single-seat bookings racing for one event
+    cold_events    bookings spread over many events (no shared inventory row)
+    cancel_churn   book-then-cancel mix on one event
+    retry_storm    every idempotency key retried several times concurrently
+    read_heavy     event listing pages and detail reads with a trickle of bookings
+
+Each scenario reports throughput, latency percentiles, status codes, pool wait
+time (in-process only, where the app's pool can be observed) and an oversell
+check of the inventory it touched. Results are written as JSON so runs can be
+compared with `--compare`.
+
+Requires a migrated database (INIT_DB=true once) in DATABASE_URL.
+
+Usage:
+    python -m benchmarks.load
+    python -m benchmarks.load --transport uvicorn --workers 4 --scenarios hot_event,retry_storm
+    python -m benchmarks.load --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from app.config import settings
+from app.crud import create_event, create_user
+from app.db import create_pool
+
+UVICORN_PORT = 8765
+UVICORN_STARTUP_TIMEOUT_SECONDS = 30.0
+
+
+def percentile(values: list, pct: float):
+    """
+    Nearest-rank percentile of `values` (None when empty).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summary_ms(samples: list):
+    if not samples:
+        return None
+    return {
+        'p50': round(percentile(samples, 50) * 1000, 3),
+        'p90': round(percentile(samples, 90) * 1000, 3),
+        'p99': round(percentile(samples, 99) * 1000, 3),
+        'max': round(max(samples) * 1000, 3),
+        'mean': round(sum(samples) / len(samples) * 1000, 3),
+    }
+
+
+class Recorder:
+    """
+    Latency and status-code samples of one scenario.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors += 1
+            return None
+        self.latencies.append(time.perf_counter() - started)
+        self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+        return response
+
+
+class _TimedAcquire:
+    def __init__(self, context, samples: list):
+        self._context = context
+        self._samples = samples
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        conn = await self._context.__aenter__()
+        self._samples.append(time.perf_counter() - started)
+        return conn
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+
+class TimedPool:
+    """
+    Wrapper around one of the app's pools recording how long `acquire()` waits.
+    """
+
+    def __init__(self, pool, waits: list):
+        self._pool = pool
+        self.waits = waits
+
+    def acquire(self, *args, **kwargs):
+        return _TimedAcquire(self._pool.acquire(*args, **kwargs), self.waits)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+# ------------------- SCENARIOS -------------------
+
+async def _new_event(pool, tag: str, capacity: int) -> str:
+    event = await create_event(pool, {
+        'name': f'bench {tag}',
+        'venue': None,
+        'description': None,
+        'start_time': datetime.now(timezone.utc) + timedelta(days=30),
+        'end_time': None,
+        'capacity': capacity,
+    })
+    return event['id']
+
+
+async def _new_users(pool, count: int) -> list:
+    run = uuid.uuid4().hex[:8]
+    return [(await create_user(pool, f'bench-{run}-{i}@example.com', 'bench'))['id'] for i in range(count)]
+
+
+def _book(recorder, users, event_id, quantity=1, key=None):
+    async def op(client):
+        body = {'user_id': random.choice(users), 'event_id': event_id, 'quantity': quantity}
+        headers = {'Idempotency-Key': key} if key else None
+        return await recorder.request(client, 'POST', '/bookings/', json=body, headers=headers)
+    return op
+
+
+async def hot_event(pool, recorder, users, requests: int):
+    # twice as many buyers as seats: the sell-out path is part of the measurement
+    event_id = await _new_event(pool, 'hot event', requests // 2)
+    return [_book(recorder, users, event_id) for _ in range(requests)], [event_id]
+
+
+async def cold_events(pool, recorder, users, requests: int):
+    event_ids = [await _new_event(pool, f'cold event {i}', requests) for i in range(50)]
+    return [_book(recorder, users, random.choice(event_ids)) for _ in range(requests)], event_ids
+
+
+async def cancel_churn(pool, recorder, users, requests: int):
+    event_id = await _new_event(pool, 'cancel churn', max(1, requests // 10))
+
+    async def op(client):
+        response = await _book(recorder, users, event_id)(client)
+        if response is not None and response.status_code == 200 and random.random() < 0.7:
+            await recorder.request(client, 'POST', f"/bookings/{response.json()['id']}/cancel")
+
+    return [op for _ in range(requests)], [event_id]
+
+
+async def retry_storm(pool, recorder, users, requests: int):
+    event_id = await _new_event(pool, 'retry storm', requests)
+    retries = 5
+    keys = [f'bench-{uuid.uuid4()}' for _ in range(max(1, requests // retries))]
+    ops = [_book(recorder, [users[i % len(users)]], event_id, key=key)
+           for i, key in enumerate(keys) for _ in range(retries)]
+    random.shuffle(ops)
+    return ops, [event_id], {'distinct_keys': len(keys)}
+
+
+async def read_heavy(pool, recorder, users, requests: int):
+    event_ids = [await _new_event(pool, f'read heavy {i}', 10 ** 6) for i in range(20)]
+
+    async def list_page(client):
+        response = await recorder.request(client, 'GET', '/events/', params={'limit': 50})
+        cursor = response.headers.get('X-Next-Cursor') if response is not None else None
+        if cursor:
+            await recorder.request(client, 'GET', '/events/', params={'limit': 50, 'cursor': cursor})
+
+    async def detail(client):
+        await recorder.request(client, 'GET', f'/events/{random.choice(event_ids)}')
+
+    ops = []
+    for _ in range(requests):
+        roll = random.random()
+        if roll < 0.45:
+            ops.append(list_page)
+        elif roll < 0.95:
+            ops.append(detail)
+        else:
+            ops.append(_book(recorder, users, random.choice(event_ids)))
+    return ops, event_ids
+
+
+SCENARIOS = {
+    'hot_event': hot_event,
+    'cold_events': cold_events,
+    'cancel_churn': cancel_churn,
+    'retry_storm': retry_storm,
+    'read_heavy': read_heavy,
+}
+
+
+# ------------------- CHECKS -------------------
+
+async def check_inventory(pool, event_ids: list) -> dict:
+    """
+    Verify that no event is oversold and that its counters match its bookings.
+    """
+    rows = await pool.fetch("""
+        SELECT e.id, e.capacity,
+               ei.seats_available + COALESCE((SELECT sum(sh.seats_available) FROM event_inventory_shards sh
+                                              WHERE sh.event_id = e.id), 0) AS seats_available,
+               (SELECT COALESCE(sum(b.quantity), 0) FROM bookings b
+                WHERE b.event_id = e.id AND b.status IN ('CONFIRMED', 'PENDING')) AS seats_taken
+        FROM events e
+        JOIN event_inventory ei ON ei.event_id = e.id
+        WHERE e.id = ANY($1::uuid[])
+    """, event_ids)
+    oversold = [str(r['id']) for r in rows if r['seats_taken'] > r['capacity']]
+    drifted = [str(r['id']) for r in rows if r['seats_available'] + r['seats_taken'] != r['capacity']]
+    return {'oversold': oversold, 'counter_drift': drifted, 'ok': not oversold and not drifted}
+
+
+async def check_retry_storm(pool, event_ids: list, distinct_keys: int) -> dict:
+    bookings = await pool.fetchval("SELECT count(*) FROM bookings WHERE event_id = ANY($1::uuid[])", event_ids)
+    return {'bookings': bookings, 'expected': distinct_keys, 'ok': bookings == distinct_keys}
+
+
+# ------------------- HARNESS -------------------
+
+async def run_scenario(name: str, client, pool, timed_pool, users, requests: int, concurrency: int) -> dict:
+    recorder = Recorder()
+    built = await SCENARIOS[name](pool, recorder, users, requests)
+    ops, event_ids = built[0], built[1]
+    if timed_pool is not None:
+        timed_pool.waits.clear()
+
+    queue = iter(ops)
+
+    async def worker():
+        for op in queue:
+            await op(client)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    checks = {'inventory': await check_inventory(pool, event_ids)}
+    if name == 'retry_storm':
+        checks['idempotency'] = await check_retry_storm(pool, event_ids, built[2]['distinct_keys'])
+    return {
+        'scenario': name,
+        'operations': len(ops),
+        'requests': len(recorder.latencies),
+        'transport_errors': recorder.errors,
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(len(recorder.latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': _summary_ms(recorder.latencies),
+        'status_counts': {str(k): v for k, v in sorted(recorder.statuses.items())},
+        'pool_wait_ms': _summary_ms(timed_pool.waits) if timed_pool is not None else None,
+        'checks': checks,
+        'ok': all(c['ok'] for c in checks.values()),
+    }
+
+
+async def run_asgi(scenarios: list, requests: int, concurrency: int) -> list:
+    from app import db, main
+
+    await main.on_startup()
+    # routes resolve their pools through init_pool() / init_read_pool(), which
+    # return db._pool / db._read_pool; both record into the same wait samples
+    waits = []
+    timed_pool = TimedPool(await db.init_pool(), waits)
+    db._pool = timed_pool
+    db._read_pool = TimedPool(await db.init_read_pool(), waits)
+    try:
+        users = await _new_users(timed_pool, 20)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=60) as client:
+            results = []
+            for name in scenarios:
+                results.append(await run_scenario(name, client, timed_pool, timed_pool, users, requests, concurrency))
+                _print_result('asgi', results[-1])
+            return results
+    finally:
+        db._pool = timed_pool._pool
+        db._read_pool = db._read_pool._pool
+        await main.on_shutdown()
+
+
+async def _wait_until_up(url: str):
+    deadline = time.monotonic() + UVICORN_STARTUP_TIMEOUT_SECONDS
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'uvicorn did not come up at {url}')
+
+
+async def run_uvicorn(scenarios: list, requests: int, concurrency: int, workers: int) -> list:
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(UVICORN_PORT),
+         '--workers', str(workers), '--log-level', 'warning'],
+        env=os.environ.copy())
+    base_url = f'http://127.0.0.1:{UVICORN_PORT}'
+    pool = await create_pool(settings.DATABASE_URL, min_size=1, max_size=4)
+    try:
+        await _wait_until_up(f'{base_url}/healthz')
+        users = await _new_users(pool, 20)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            results = []
+            for name in scenarios:
+                results.append(await run_scenario(name, client, pool, None, users, requests, concurrency))
+                _print_result('uvicorn', results[-1])
+            return results
+    finally:
+        await pool.close()
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _print_result(transport: str, result: dict):
+    latency = result['latency_ms'] or {}
+    wait = f"{result['pool_wait_ms']['p99']:>7.2f}ms" if result['pool_wait_ms'] else '    n/a  '
+    print(f"{transport:<8} {result['scenario']:<13} {result['throughput_rps']:>9,.0f} req/s  "
+          f"p50 {latency.get('p50', 0):>8.2f}ms  p99 {latency.get('p99', 0):>8.2f}ms  "
+          f"pool wait p99 {wait}  {'ok' if result['ok'] else 'CHECK FAILED'}")
+
+
+def _compare(previous: dict, current: dict):
+    before = {(r['transport'], r['scenario']): r for r in previous.get('results', [])}
+    print('\ncompared with previous run:')
+    for result in current['results']:
+        old = before.get((result['transport'], result['scenario']))
+        if not old or not old.get('latency_ms') or not result.get('latency_ms'):
+            continue
+        print(f"{result['transport']:<8} {result['scenario']:<13} "
+              f"throughput {result['throughput_rps'] / old['throughput_rps'] - 1:+7.1%}  "
+              f"p50 {result['latency_ms']['p50'] / old['latency_ms']['p50'] - 1:+7.1%}  "
+              f"p99 {result['latency_ms']['p99'] / old['latency_ms']['p99'] - 1:+7.1%}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transport', choices=('asgi', 'uvicorn', 'both'), default='asgi')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='comma-separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=2000, help='operations per scenario')
+    parser.add_argument('--concurrency', type=int, default=100, help='concurrent virtual clients')
+    parser.add_argument('--workers', type=int, default=2, help='uvicorn worker processes')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    random.seed(args.seed)
+
+    results = []
+    if args.transport in ('asgi', 'both'):
+        for result in await run_asgi(scenarios, args.requests, args.concurrency):
+            results.append({'transport': 'asgi', **result})
+    if args.transport in ('uvicorn', 'both'):
+        for result in await run_uvicorn(scenarios, args.requests, args.concurrency, args.workers):
+            results.append({'transport': 'uvicorn', 'workers': args.workers, **result})
+
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'booking_coalescer_enabled': settings.BOOKING_COALESCER_ENABLED,
+            'event_cache_enabled': settings.EVENT_CACHE_ENABLED,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nresults written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            _compare(json.load(f), report)
+    if not all(r['ok'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
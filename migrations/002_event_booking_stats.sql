@@ -0,0 +1,20 @@
+-- 002_event_booking_stats.sql
+-- Per-event booking counters maintained incrementally by the booking path.
+-- Replaces the full REFRESH of mv_event_booking_stats on every booking/cancel.
+
+CREATE TABLE IF NOT EXISTS event_booking_stats (
+  event_id UUID PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+  total_booked BIGINT NOT NULL DEFAULT 0 CHECK (total_booked >= 0),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+
+-- Backfill counters for bookings made before this migration.
+INSERT INTO event_booking_stats (event_id, total_booked)
+SELECT b.event_id, SUM(b.quantity)
+FROM bookings b
+WHERE b.status = 'CONFIRMED' AND b.event_id IS NOT NULL
+GROUP BY b.event_id
+ON CONFLICT (event_id) DO NOTHING;
+
+-- The materialized view is no longer maintained; drop it so nothing reads stale data.
+DROP MATERIALIZED VIEW IF EXISTS mv_event_booking_stats;
@@ -0,0 +1,6 @@
+-- 003_keyset_pagination_indexes.sql
+-- Composite indexes matching the keyset (cursor) pagination order of the list endpoints.
+
+CREATE INDEX IF NOT EXISTS idx_events_start_time_id ON events(start_time, id);
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_bookings_user_created_at_id ON bookings(user_id, created_at, id);
@@ -0,0 +1,5 @@
+-- 004_export_indexes.sql
+-- Indexes backing the `since` watermark of the bulk export endpoints.
+
+CREATE INDEX IF NOT EXISTS idx_bookings_updated_at ON bookings(updated_at);
+CREATE INDEX IF NOT EXISTS idx_booking_events_created_at ON booking_events(created_at);
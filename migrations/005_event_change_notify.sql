@@ -0,0 +1,33 @@
+-- 005_event_change_notify.sql
+-- Publish a NOTIFY on channel `event_changed` (payload: event id) whenever an event
+-- or its availability changes, so every app worker can drop stale cache entries.
+
+CREATE OR REPLACE FUNCTION notify_event_changed() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM pg_notify('event_changed', OLD.id::text);
+  ELSE
+    PERFORM pg_notify('event_changed', NEW.id::text);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_event_inventory_changed() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('event_changed', NEW.event_id::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_events_notify ON events;
+CREATE TRIGGER trg_events_notify
+AFTER INSERT OR UPDATE OR DELETE ON events
+FOR EACH ROW EXECUTE FUNCTION notify_event_changed();
+
+DROP TRIGGER IF EXISTS trg_event_inventory_notify ON event_inventory;
+CREATE TRIGGER trg_event_inventory_notify
+AFTER UPDATE ON event_inventory
+FOR EACH ROW
+WHEN (OLD.version IS DISTINCT FROM NEW.version OR OLD.seats_available IS DISTINCT FROM NEW.seats_available)
+EXECUTE FUNCTION notify_event_inventory_changed();
@@ -0,0 +1,13 @@
+-- 006_idempotency_keys.sql
+-- Idempotency store: one row per client key with the full original response.
+-- Rows past expires_at may be re-claimed and are purged by the GC task.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  key TEXT PRIMARY KEY,
+  booking_id UUID,
+  response JSONB,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
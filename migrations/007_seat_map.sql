@@ -0,0 +1,8 @@
+-- 007_seat_map.sql
+-- Row/number columns for assigned seating plus indexes used by seat allocation.
+
+ALTER TABLE seats ADD COLUMN IF NOT EXISTS seat_row TEXT;
+ALTER TABLE seats ADD COLUMN IF NOT EXISTS seat_number INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_seats_event_status ON seats(event_id, status);
+CREATE INDEX IF NOT EXISTS idx_seats_booking ON seats(booking_id);
@@ -0,0 +1,8 @@
+-- 008_booking_holds.sql
+-- Temporary seat holds: PENDING bookings carry an expiry, swept by a background job.
+
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP WITH TIME ZONE;
+
+-- Only open holds are indexed, so the sweeper's scan stays small however many
+-- bookings exist.
+CREATE INDEX IF NOT EXISTS idx_bookings_pending_expiry ON bookings(expires_at) WHERE status = 'PENDING';
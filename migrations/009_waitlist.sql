@@ -0,0 +1,9 @@
+-- 009_waitlist.sql
+-- Waitlist entries carry the wanted quantity; one entry per user per event.
+-- (event_id, joined_at) lets promotion read the head of the queue with an index
+-- scan, whatever the length of the waitlist.
+
+ALTER TABLE waitlist ADD COLUMN IF NOT EXISTS quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0);
+
+CREATE INDEX IF NOT EXISTS idx_waitlist_event_joined ON waitlist(event_id, joined_at);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_waitlist_event_user ON waitlist(event_id, user_id);
@@ -0,0 +1,33 @@
+-- 010_inventory_shards.sql
+-- Optional sharded inventory for hot events. When an event is sharded
+-- (event_inventory.shard_count > 0), its free seats are split across
+-- `shard_count` sub-counter rows so concurrent bookings lock different rows.
+-- The main event_inventory row then only holds seats returned by bookings that
+-- were not taken from a single shard. An event's availability is the main row
+-- plus the sum of its shards; its version is main.version + sum(shard.version),
+-- which still increases on every change (resharding folds shard versions into
+-- the main row). Shard rows also carry the seats_reserved / total_booked of the
+-- bookings taken from them, so the hot path never touches a per-event row.
+
+ALTER TABLE event_inventory ADD COLUMN IF NOT EXISTS shard_count INTEGER NOT NULL DEFAULT 0 CHECK (shard_count >= 0);
+
+CREATE TABLE IF NOT EXISTS event_inventory_shards (
+  event_id UUID NOT NULL REFERENCES event_inventory(event_id) ON DELETE CASCADE,
+  shard INTEGER NOT NULL,
+  seats_available INTEGER NOT NULL CHECK (seats_available >= 0),
+  seats_reserved INTEGER NOT NULL DEFAULT 0,
+  total_booked BIGINT NOT NULL DEFAULT 0,
+  version BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, shard)
+);
+
+-- shard a booking was taken from (NULL: the main row), so cancellation returns
+-- its seats to the same counter
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS inventory_shard INTEGER;
+
+DROP TRIGGER IF EXISTS trg_event_inventory_shards_notify ON event_inventory_shards;
+CREATE TRIGGER trg_event_inventory_shards_notify
+AFTER UPDATE ON event_inventory_shards
+FOR EACH ROW
+WHEN (OLD.version IS DISTINCT FROM NEW.version OR OLD.seats_available IS DISTINCT FROM NEW.seats_available)
+EXECUTE FUNCTION notify_event_inventory_changed();
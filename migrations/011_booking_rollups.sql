@@ -0,0 +1,40 @@
+-- 011_booking_rollups.sql
+-- Per-event booking activity in minute and hour buckets, folded incrementally
+-- from the append-only booking_events log by the rollup job. The job keeps the
+-- last folded booking_events.id in rollup_watermarks and starts from 0, so
+-- existing history is backfilled on the first runs.
+
+CREATE TABLE IF NOT EXISTS booking_rollups_minute (
+  event_id UUID NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+  bookings INTEGER NOT NULL DEFAULT 0,
+  tickets_booked BIGINT NOT NULL DEFAULT 0,
+  cancellations INTEGER NOT NULL DEFAULT 0,
+  tickets_cancelled BIGINT NOT NULL DEFAULT 0,
+  holds INTEGER NOT NULL DEFAULT 0,
+  holds_released INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS booking_rollups_hour (
+  event_id UUID NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+  bookings INTEGER NOT NULL DEFAULT 0,
+  tickets_booked BIGINT NOT NULL DEFAULT 0,
+  cancellations INTEGER NOT NULL DEFAULT 0,
+  tickets_cancelled BIGINT NOT NULL DEFAULT 0,
+  holds INTEGER NOT NULL DEFAULT 0,
+  holds_released INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, bucket)
+);
+
+-- cross-event velocity reads the most recent minutes of every event
+CREATE INDEX IF NOT EXISTS idx_booking_rollups_minute_bucket ON booking_rollups_minute(bucket);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  name TEXT PRIMARY KEY,
+  last_id BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+
+INSERT INTO rollup_watermarks (name) VALUES ('booking_events') ON CONFLICT (name) DO NOTHING;
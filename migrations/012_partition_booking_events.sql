@@ -0,0 +1,80 @@
+-- 012_partition_booking_events.sql
+-- booking_events becomes a table range-partitioned by month on created_at
+-- (partitions named booking_events_YYYY_MM, bounds in UTC). The primary key
+-- has to include the partition key, so it becomes (id, created_at); ids still
+-- come from the same sequence. The existing rows are copied into monthly
+-- partitions once (the legacy table is renamed first and dropped afterwards).
+-- Future partitions are created ahead of time by
+-- ensure_booking_events_partitions(), called here and by the maintenance job
+-- in app/partitions.py, which also archives old partitions.
+
+CREATE OR REPLACE FUNCTION create_booking_events_partition(month date) RETURNS text AS $$
+DECLARE
+    name text := format('booking_events_%s', to_char(month, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(name) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF booking_events FOR VALUES FROM (%L) TO (%L)',
+                       name,
+                       date_trunc('month', month)::timestamp AT TIME ZONE 'UTC',
+                       (date_trunc('month', month) + interval '1 month')::timestamp AT TIME ZONE 'UTC');
+    END IF;
+    RETURN name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- partitions for the current month and the next `months_ahead` months
+CREATE OR REPLACE FUNCTION ensure_booking_events_partitions(months_ahead int) RETURNS void AS $$
+DECLARE
+    month date;
+BEGIN
+    FOR month IN
+        SELECT generate_series(date_trunc('month', now() AT TIME ZONE 'UTC'),
+                               date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead),
+                               interval '1 month')::date
+    LOOP
+        PERFORM create_booking_events_partition(month);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    month date;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('booking_events') AND relkind = 'r') THEN
+        ALTER TABLE booking_events RENAME TO booking_events_legacy;
+        ALTER TABLE booking_events_legacy RENAME CONSTRAINT booking_events_pkey TO booking_events_legacy_pkey;
+        ALTER TABLE booking_events_legacy
+            RENAME CONSTRAINT booking_events_booking_id_fkey TO booking_events_legacy_booking_id_fkey;
+        ALTER INDEX IF EXISTS idx_booking_events_created_at RENAME TO idx_booking_events_legacy_created_at;
+
+        CREATE TABLE booking_events (
+          id BIGINT NOT NULL DEFAULT nextval('booking_events_id_seq'),
+          booking_id UUID REFERENCES bookings(id) ON DELETE CASCADE,
+          event_type TEXT NOT NULL,
+          event_payload JSONB,
+          created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+          PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+        ALTER SEQUENCE booking_events_id_seq OWNED BY booking_events.id;
+        CREATE INDEX idx_booking_events_created_at ON booking_events(created_at);
+
+        FOR month IN
+            SELECT generate_series(date_trunc('month', min(created_at) AT TIME ZONE 'UTC'),
+                                   date_trunc('month', greatest(max(created_at), now()) AT TIME ZONE 'UTC'),
+                                   interval '1 month')::date
+            FROM booking_events_legacy
+            HAVING min(created_at) IS NOT NULL
+        LOOP
+            PERFORM create_booking_events_partition(month);
+        END LOOP;
+        PERFORM ensure_booking_events_partitions(0);
+
+        INSERT INTO booking_events (id, booking_id, event_type, event_payload, created_at)
+        SELECT id, booking_id, event_type, event_payload, COALESCE(created_at, now())
+        FROM booking_events_legacy;
+        DROP TABLE booking_events_legacy;
+    END IF;
+END$$;
+
+SELECT ensure_booking_events_partitions(3);
@@ -0,0 +1,36 @@
+-- 013_event_search.sql
+-- Indexes backing GET /events/search:
+-- - a generated tsvector over name (weight A), venue (B) and description (C),
+--   with a GIN index, for keyword search;
+-- - a trigram GIN index on venue for substring (ILIKE) venue matching, when the
+--   pg_trgm extension is installed or can be created by the migrating role
+--   (without it venue matching still works, as a scan);
+-- - a partial index on sharded events, so "seats left" can be answered from
+--   idx_inventory_available OR'ed with the few sharded events (whose free seats
+--   live in event_inventory_shards).
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+  setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+  setweight(to_tsvector('english', coalesce(venue, '')), 'B') ||
+  setweight(to_tsvector('english', coalesce(description, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_events_search ON events USING gin(search_vector);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')
+       AND EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        BEGIN
+            CREATE EXTENSION pg_trgm;
+        EXCEPTION WHEN OTHERS THEN
+            -- e.g. insufficient_privilege: keep the migration, venue matching scans
+            RAISE NOTICE 'pg_trgm not created, venue search will not be indexed: %', SQLERRM;
+        END;
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS idx_events_venue_trgm ON events USING gin(venue gin_trgm_ops);
+    END IF;
+END$$;
+
+CREATE INDEX IF NOT EXISTS idx_inventory_sharded ON event_inventory(event_id) WHERE shard_count > 0;
@@ -0,0 +1,9 @@
+-- 014_booking_audit_outbox.sql
+-- Outbox for the booking_events audit log (AUDIT_LOG_MODE=outbox): the
+-- statement that inserts or cancels a booking also appends the event type
+-- ('BOOK', 'CANCEL') to bookings.audit_pending, and the relay in app/audit.py
+-- moves pending entries to booking_events in batches. NULL means nothing is pending.
+
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS audit_pending TEXT[];
+
+CREATE INDEX IF NOT EXISTS idx_bookings_audit_pending ON bookings(id) WHERE audit_pending IS NOT NULL;
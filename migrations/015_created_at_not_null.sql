@@ -0,0 +1,10 @@
+-- 015_created_at_not_null.sql
+-- users.created_at and bookings.created_at are the keyset pagination sort keys
+-- (and are encoded into the page cursors), so they must never be NULL. Rows
+-- written with an explicit NULL get the best time known for them.
+
+UPDATE users SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE users ALTER COLUMN created_at SET NOT NULL;
+
+UPDATE bookings SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL;
+ALTER TABLE bookings ALTER COLUMN created_at SET NOT NULL;
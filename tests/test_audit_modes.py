@@ -0,0 +1,69 @@
+import pytest
+
+from app import crud
+from app.audit import relay_outbox
+from app.config import settings
+from app.crud import (book_tickets_batch, confirm_hold, expire_holds, hold_tickets, join_waitlist,
+                      promote_waitlist, release_hold)
+
+pytestmark = pytest.mark.anyio
+
+
+class _RecordingWriter:
+    def __init__(self):
+        self.entries = []
+
+    def offer(self, booking_id, event_type, payload):
+        self.entries.append((booking_id, event_type))
+        return True
+
+
+async def _exercise_booking_paths(pool, user_id, event_id) -> list:
+    # one entry of every kind besides BOOK/CANCEL on the single-booking path
+    expected = []
+    batch = await book_tickets_batch(pool, [{'user_id': user_id, 'event_id': event_id, 'quantity': 1}])
+    expected.append((batch[0]['id'], 'BOOK'))
+    hold = await hold_tickets(pool, user_id, event_id, 1, 60)
+    await confirm_hold(pool, hold['id'])
+    expected += [(hold['id'], 'HOLD'), (hold['id'], 'CONFIRM')]
+    hold = await hold_tickets(pool, user_id, event_id, 1, 60)
+    await release_hold(pool, hold['id'])
+    expected += [(hold['id'], 'HOLD'), (hold['id'], 'RELEASE')]
+    hold = await hold_tickets(pool, user_id, event_id, 1, 60)
+    await pool.execute("UPDATE bookings SET expires_at = now() - interval '1 second' WHERE id = $1", hold['id'])
+    await expire_holds(pool, 100)
+    expected += [(hold['id'], 'HOLD'), (hold['id'], 'EXPIRE')]
+    await join_waitlist(pool, event_id, user_id, 1)
+    promoted = await promote_waitlist(pool, event_id, 10)
+    expected.append((promoted[0]['id'], 'BOOK'))
+    return expected
+
+
+async def _written(pool, event_id) -> list:
+    rows = await pool.fetch("""
+        SELECT be.booking_id, be.event_type
+        FROM booking_events be JOIN bookings b ON b.id = be.booking_id
+        WHERE b.event_id = $1
+    """, event_id)
+    return sorted((str(r['booking_id']), r['event_type']) for r in rows)
+
+
+@pytest.mark.parametrize('mode', ['sync', 'async', 'outbox'])
+async def test_every_booking_path_follows_audit_mode(pool, user_id, make_event, monkeypatch, mode):
+    monkeypatch.setattr(settings, 'AUDIT_LOG_MODE', mode)
+    writer = _RecordingWriter()
+    monkeypatch.setattr(crud, 'audit_writer', writer)
+    event_id = await make_event(capacity=10)
+
+    expected = sorted(await _exercise_booking_paths(pool, user_id, event_id))
+
+    if mode == 'sync':
+        assert await _written(pool, event_id) == expected
+    elif mode == 'async':
+        assert await _written(pool, event_id) == []
+        assert sorted(writer.entries) == expected
+    else:
+        assert await _written(pool, event_id) == []
+        while await relay_outbox(pool, 1000):
+            pass
+        assert await _written(pool, event_id) == expected
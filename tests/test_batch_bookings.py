@@ -0,0 +1,38 @@
+import uuid
+
+import pytest
+
+from app.crud import book_tickets_batch
+from app.idempotency import idempotency_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_failed_keyed_item_can_be_retried(pool, user_id, make_event):
+    event_id = await make_event(capacity=2)
+    key = f'test-{uuid.uuid4()}'
+    item = {'user_id': user_id, 'event_id': event_id, 'quantity': 3, 'idempotency_key': key}
+
+    results = await book_tickets_batch(pool, [item, {'user_id': user_id, 'event_id': event_id, 'quantity': 1}])
+    assert results[0] == {'status': 'FAILED', 'error': 'NOT_ENOUGH_SEATS'}
+    assert results[1]['status'] == 'CONFIRMED'
+    assert await pool.fetchval("SELECT count(*) FROM idempotency_keys WHERE key = $1", key) == 0
+
+    # the retry claims the key again instead of hitting IDEMPOTENCY_CONFLICT
+    retry = await book_tickets_batch(pool, [dict(item, quantity=1)])
+    assert retry[0]['status'] == 'CONFIRMED'
+    idempotency_cache.pop(key)
+    replay = await book_tickets_batch(pool, [dict(item, quantity=1)])
+    assert replay[0] == retry[0]
+
+
+async def test_atomic_batch_releases_claims(pool, user_id, make_event):
+    event_id = await make_event(capacity=1)
+    key = f'test-{uuid.uuid4()}'
+    items = [{'user_id': user_id, 'event_id': event_id, 'quantity': 1, 'idempotency_key': key},
+             {'user_id': user_id, 'event_id': event_id, 'quantity': 1}]
+
+    results = await book_tickets_batch(pool, items, atomic=True)
+    assert [r['status'] for r in results] == ['ABORTED', 'FAILED']
+    retry = await book_tickets_batch(pool, items[:1])
+    assert retry[0]['status'] == 'CONFIRMED'
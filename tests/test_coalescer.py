@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import coalescer as coalescer_module
+from app.config import settings
+from app.db import InstrumentedPool
+from app.main import app
+from app.routes import bookings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_coalesced_bookings_are_not_capped_per_event(pool, user_id, make_event, monkeypatch):
+    monkeypatch.setattr(settings, 'ADMISSION_ENABLED', True)
+    monkeypatch.setattr(settings, 'ADMISSION_MAX_IN_FLIGHT_PER_EVENT', 1)
+    monkeypatch.setattr(settings, 'BOOKING_COALESCER_ENABLED', True)
+    monkeypatch.setattr(coalescer_module.coalescer, 'max_batch', 8)
+    monkeypatch.setattr(coalescer_module.coalescer, 'window', 0.05)
+    batches = []
+    book_tickets_batch = coalescer_module.book_tickets_batch
+
+    async def recording_batch(pool, items, atomic=False):
+        batches.append(len(items))
+        return await book_tickets_batch(pool, items, atomic)
+
+    monkeypatch.setattr(coalescer_module, 'book_tickets_batch', recording_batch)
+    write_pool = InstrumentedPool(pool, 'test')
+    app.dependency_overrides[bookings.get_pool] = lambda: write_pool
+    try:
+        event_id = await make_event(capacity=10)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            responses = await asyncio.gather(*(
+                client.post('/bookings/', json={'user_id': user_id, 'event_id': event_id, 'quantity': 1})
+                for _ in range(8)))
+    finally:
+        app.dependency_overrides.pop(bookings.get_pool)
+    assert [r.status_code for r in responses] == [200] * 8
+    assert batches == [8]
@@ -0,0 +1,47 @@
+import pytest
+
+from app import cache
+from app.cache import EventCache
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+PRIMARY, REPLICA = object(), object()
+EVENT, OTHER = 'e1', 'e2'
+
+
+@pytest.fixture
+def event_cache(monkeypatch):
+    async def init_pool():
+        return PRIMARY
+    monkeypatch.setattr(cache, 'init_pool', init_pool)
+    monkeypatch.setattr(settings, 'DATABASE_REPLICA_URL', 'postgresql://replica/evently')
+    monkeypatch.setattr(settings, 'EVENT_CACHE_PRIMARY_REFILL_SECONDS', 60.0)
+    return EventCache(True, 100, 5.0)
+
+
+async def test_changed_event_refills_from_primary(event_cache):
+    assert await event_cache.refill_pool(REPLICA, [EVENT]) is REPLICA
+    event_cache.invalidate(EVENT)
+    assert await event_cache.refill_pool(REPLICA, [EVENT]) is PRIMARY
+    assert await event_cache.refill_pool(REPLICA, [OTHER, EVENT]) is PRIMARY
+    assert await event_cache.refill_pool(REPLICA, [OTHER]) is REPLICA
+    assert await event_cache.refill_pool(REPLICA) is PRIMARY
+
+
+async def test_full_invalidation_refills_every_event_from_primary(event_cache):
+    event_cache.invalidate()
+    assert await event_cache.refill_pool(REPLICA, [OTHER]) is PRIMARY
+
+
+async def test_refills_from_replica_after_the_window(event_cache, monkeypatch):
+    monkeypatch.setattr(settings, 'EVENT_CACHE_PRIMARY_REFILL_SECONDS', 0.0)
+    event_cache.invalidate(EVENT)
+    assert await event_cache.refill_pool(REPLICA, [EVENT]) is REPLICA
+    assert await event_cache.refill_pool(REPLICA) is REPLICA
+
+
+async def test_without_replica_reads_stay_on_read_pool(event_cache, monkeypatch):
+    monkeypatch.setattr(settings, 'DATABASE_REPLICA_URL', None)
+    event_cache.invalidate(EVENT)
+    assert await event_cache.refill_pool(REPLICA, [EVENT]) is REPLICA
@@ -0,0 +1,33 @@
+import json
+import uuid
+
+import pytest
+
+from app import importer
+from app.importer import import_events
+
+pytestmark = pytest.mark.anyio
+
+
+async def _lines(records: list):
+    for record in records:
+        yield json.dumps(record) + '\n'
+
+
+def _event(name: str) -> dict:
+    return {'name': name, 'start_time': '2031-01-01T20:00:00+00:00', 'capacity': 10}
+
+
+async def test_database_error_rejects_only_its_row(pool, monkeypatch):
+    monkeypatch.setattr(importer, 'IMPORT_BATCH_SIZE', 2)
+    prefix = f'Import {uuid.uuid4().hex[:8]}'
+    records = [_event(f'{prefix} A'), _event(f'{prefix} \u0000 B'), _event(f'{prefix} C'),
+               {'name': 'No start'}, _event(f'{prefix} D')]
+
+    report = await import_events(pool, _lines(records), 'ndjson')
+
+    assert report['imported'] == 3
+    assert report['failed'] == 2
+    assert [e['row'] for e in report['errors']] == [2, 4]
+    names = await pool.fetch("SELECT name FROM events WHERE name LIKE $1 ORDER BY name", prefix + ' %')
+    assert [r['name'] for r in names] == [f'{prefix} A', f'{prefix} C', f'{prefix} D']
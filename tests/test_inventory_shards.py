@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud import (book_tickets, book_tickets_batch, events_with_promotable_waitlist, get_event, hold_tickets,
+                      join_waitlist, promote_waitlist, release_hold, set_inventory_shards, update_event)
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_update_event_respreads_capacity_over_shards(pool, user_id, make_event):
+    event_id = await make_event(capacity=8)
+    await set_inventory_shards(pool, event_id, 4)
+
+    await update_event(pool, event_id, {'name': 'Bigger', 'start_time': datetime.now(timezone.utc) + timedelta(days=1),
+                                        'capacity': 10})
+    shards = await pool.fetch("""
+        SELECT seats_available FROM event_inventory_shards WHERE event_id = $1 ORDER BY shard
+    """, event_id)
+    assert [r['seats_available'] for r in shards] == [3, 3, 2, 2]
+    assert await pool.fetchval("SELECT seats_available FROM event_inventory WHERE event_id = $1", event_id) == 0
+    assert (await get_event(pool, event_id))['seats_available'] == 10
+
+    # served by a single shard, not the gather path
+    booking = await book_tickets(pool, user_id, event_id, 2)
+    assert await pool.fetchval("SELECT inventory_shard FROM bookings WHERE id = $1", booking['id']) is not None
+
+
+async def _free_seats(pool, event_id):
+    return (await get_event(pool, event_id))['seats_available']
+
+
+async def test_hold_and_release_on_sharded_event(pool, user_id, make_event):
+    event_id = await make_event(capacity=8)
+    await set_inventory_shards(pool, event_id, 4)
+
+    hold = await hold_tickets(pool, user_id, event_id, 5, 60)
+    assert hold['status'] == 'PENDING'
+    assert await _free_seats(pool, event_id) == 3
+    with pytest.raises(Exception, match='NOT_ENOUGH_SEATS'):
+        await hold_tickets(pool, user_id, event_id, 4, 60)
+
+    await release_hold(pool, hold['id'])
+    assert await _free_seats(pool, event_id) == 8
+
+
+async def test_waitlist_promotion_draws_from_shards(pool, user_id, make_event):
+    event_id = await make_event(capacity=4)
+    await set_inventory_shards(pool, event_id, 2)
+    await join_waitlist(pool, event_id, user_id, 3)
+
+    assert event_id in {str(e) for e in await events_with_promotable_waitlist(pool)}
+    promoted = await promote_waitlist(pool, event_id, 10)
+    assert [p['quantity'] for p in promoted] == [3]
+    assert await _free_seats(pool, event_id) == 1
+
+
+async def test_batch_books_sharded_event_items(pool, user_id, make_event):
+    event_id = await make_event(capacity=4)
+    await set_inventory_shards(pool, event_id, 2)
+    items = [{'user_id': user_id, 'event_id': event_id, 'quantity': 2} for _ in range(3)]
+
+    atomic = await book_tickets_batch(pool, items, atomic=True)
+    assert [r['status'] for r in atomic] == ['FAILED'] * 3
+    assert {r['error'] for r in atomic} == {'INVENTORY_SHARDED'}
+
+    results = await book_tickets_batch(pool, items)
+    assert sorted(r['status'] for r in results) == ['CONFIRMED', 'CONFIRMED', 'FAILED']
+    assert [r['error'] for r in results if r['status'] == 'FAILED'] == ['NOT_ENOUGH_SEATS']
+    assert await _free_seats(pool, event_id) == 0
@@ -0,0 +1,41 @@
+import httpx
+import pytest
+
+from app import loaders
+from app.crud import book_tickets
+from app.main import app
+from app.routes import bookings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_embedded_events_are_loaded_in_one_query(pool, user_id, make_event, monkeypatch):
+    queries = []
+    get_events = loaders.get_events
+
+    async def recording_get_events(pool, event_ids):
+        queries.append(sorted(event_ids))
+        return await get_events(pool, event_ids)
+
+    monkeypatch.setattr(loaders, 'get_events', recording_get_events)
+    # a stale cached copy must not be embedded
+    stale = lambda event_id: {'id': event_id, 'seats_available': 10}
+    monkeypatch.setattr(loaders.event_cache, 'get_event', stale)
+    first, second = await make_event(capacity=10), await make_event(capacity=10)
+    for event_id in (first, second, first):
+        await book_tickets(pool, user_id, event_id, 1)
+
+    app.dependency_overrides[bookings.get_pool] = lambda: pool
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            response = await client.get(f'/bookings/user/{user_id}', params={'expand': 'event'})
+            plain = await client.get(f'/bookings/user/{user_id}')
+    finally:
+        app.dependency_overrides.pop(bookings.get_pool)
+
+    assert response.status_code == 200
+    rows = response.json()
+    assert [r['event']['id'] for r in rows] == [r['event_id'] for r in rows]
+    assert {r['event']['seats_available'] for r in rows if r['event_id'] == first} == {8}
+    assert queries == [sorted([first, second])]
+    assert all('event' not in r for r in plain.json())
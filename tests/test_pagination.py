@@ -0,0 +1,37 @@
+import pytest
+
+from app.migrate import MIGRATIONS_DIR
+from app.pagination import decode_cursor, next_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_created_at_migration_backfills_null_sort_keys(pool, user_id, make_event):
+    event_id = await make_event(capacity=5)
+    sql = (MIGRATIONS_DIR / '015_created_at_not_null.sql').read_text()
+    async with pool.acquire() as conn:
+        tx = conn.transaction()
+        await tx.start()
+        try:
+            await conn.execute("""
+                ALTER TABLE users ALTER COLUMN created_at DROP NOT NULL;
+                ALTER TABLE bookings ALTER COLUMN created_at DROP NOT NULL;
+            """)
+            legacy_user = await conn.fetchval("""
+                INSERT INTO users (email, created_at) VALUES ('legacy@example.com', NULL) RETURNING id
+            """)
+            await conn.execute("""
+                INSERT INTO bookings (user_id, event_id, quantity, status, created_at)
+                VALUES ($1, $2, 1, 'CONFIRMED', NULL)
+            """, legacy_user, event_id)
+            await conn.execute(sql)
+
+            rows = await conn.fetch("""
+                SELECT id, created_at FROM bookings WHERE user_id = $1
+                UNION ALL SELECT id, created_at FROM users WHERE id = $1
+            """, legacy_user)
+            assert len(rows) == 2 and all(r['created_at'] is not None for r in rows)
+            cursor = next_cursor([dict(rows[0])], 1, 'created_at')
+            assert decode_cursor(cursor) == (rows[0]['created_at'], str(rows[0]['id']))
+        finally:
+            await tx.rollback()
@@ -0,0 +1,97 @@
+"""
+The fast JSON path (`app.responses`) must produce the bytes of FastAPI's
+validated `response_model` serialization.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import responses
+from app.crud import list_events
+from app.schemas import AnalyticsRow, EventOut, EventSearchOut, UserOut
+
+UTC = timezone.utc
+EVENTS = [
+    {'id': '0b7f1c9e-3a51-4d0e-9c57-1f2d3e4a5b6c', 'name': 'Open Air', 'venue': None, 'description': None,
+     'start_time': datetime(2030, 6, 1, 18, 30, tzinfo=UTC), 'end_time': None, 'capacity': 500,
+     'seats_available': 0},
+    {'id': '5d8e2f1a-6b7c-4d9e-8f0a-1b2c3d4e5f60', 'name': 'Café «Jazz» 🎷', 'venue': 'Salle "Pleyel"\n',
+     'description': 'back\\slash', 'start_time': datetime(2030, 6, 2, 20, 0, 0, 123456, tzinfo=UTC),
+     'end_time': datetime(2030, 6, 2, 23, 0, tzinfo=timezone(timedelta(hours=2))), 'capacity': 0,
+     'seats_available': 2 ** 31 - 1},
+]
+USERS = [
+    {'id': 'a1b2c3d4-e5f6-4789-8abc-def012345678', 'email': 'x@example.com', 'name': None,
+     'created_at': datetime(2025, 1, 1, tzinfo=UTC)},
+    {'id': 'b1b2c3d4-e5f6-4789-8abc-def012345678', 'email': 'y@example.com', 'name': 'Ünïcödé',
+     'created_at': datetime(2025, 1, 1, 0, 0, 0, 1, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))},
+]
+ANALYTICS = [
+    {'event_id': EVENTS[0]['id'], 'name': 'Open Air', 'capacity': 500, 'total_booked': 500, 'utilization': 1.0},
+    {'event_id': EVENTS[1]['id'], 'name': 'Jazz', 'capacity': 3, 'total_booked': 1, 'utilization': 1 / 3},
+    {'event_id': EVENTS[1]['id'], 'name': 'Tiny', 'capacity': 10 ** 6, 'total_booked': 2, 'utilization': 2e-06},
+    {'event_id': EVENTS[1]['id'], 'name': 'Big', 'capacity': 1, 'total_booked': 10 ** 17, 'utilization': 1e17},
+    {'event_id': EVENTS[1]['id'], 'name': 'Empty', 'capacity': 0, 'total_booked': 0, 'utilization': None},
+]
+SEARCH = {'events': EVENTS, 'facets': {'total': 2, 'available': 1,
+                                       'venues': [{'value': None, 'count': 1}, {'value': 'Salle', 'count': 1}],
+                                       'months': [{'value': '2030-06', 'count': 2}]}}
+
+
+def _client(model, content, floats: bool = False) -> TestClient:
+    app = FastAPI()
+
+    @app.get('/validated', response_model=model)
+    async def validated():
+        return content
+
+    @app.get('/fast', response_model=model)
+    async def fast():
+        return responses.RowsResponse(content, floats=floats)
+
+    return TestClient(app)
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        if responses.orjson is None:
+            pytest.skip('orjson not installed')
+    else:
+        monkeypatch.setattr(responses, 'orjson', None)
+    return request.param
+
+
+@pytest.mark.parametrize('model, content, floats', [
+    (List[EventOut], EVENTS, False),
+    (List[EventOut], [], False),
+    (List[UserOut], USERS, False),
+    (List[AnalyticsRow], ANALYTICS, True),
+    (EventSearchOut, SEARCH, False),
+])
+def test_fast_path_matches_validated_bytes(encoder, model, content, floats):
+    client = _client(model, content, floats)
+    validated = client.get('/validated')
+    fast = client.get('/fast')
+    assert validated.status_code == fast.status_code == 200
+    assert fast.content == validated.content
+    assert fast.headers['content-type'] == validated.headers['content-type']
+
+
+@pytest.mark.anyio
+async def test_event_without_inventory_encodes_like_validated(pool):
+    event_id = await pool.fetchval("""
+        INSERT INTO events (name, start_time, capacity) VALUES ('No inventory', '1970-01-02T00:00:00Z', 5)
+        RETURNING id
+    """)
+    try:
+        rows = [r for r in await list_events(pool, 10) if r['id'] == str(event_id)]
+        assert len(rows) == 1 and rows[0]['seats_available'] == 0
+        client = _client(List[EventOut], rows)
+        assert client.get('/fast').content == client.get('/validated').content
+    finally:
+        await pool.execute("DELETE FROM events WHERE id = $1", event_id)
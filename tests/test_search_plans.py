@@ -0,0 +1,69 @@
+"""
+Every search filter and the facet query can be answered from the indexes of
+migration 013 (checked with EXPLAIN, sequential scans disabled so the planner
+picks an index whenever one applies, whatever the table size).
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud import _event_search_facets_query, _search_events_query
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime.now(timezone.utc)
+
+
+def _index_names(plan: dict) -> set:
+    names = {plan['Index Name']} if 'Index Name' in plan else set()
+    for child in plan.get('Plans', []):
+        names |= _index_names(child)
+    return names
+
+
+async def _plan_indexes(pool, sql: str, args: list) -> set:
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute('SET LOCAL enable_seqscan = off')
+            plan = await conn.fetchval(f'EXPLAIN (FORMAT JSON) {sql}', *args)
+    return _index_names(json.loads(plan)[0]['Plan'])
+
+
+def _search(q=None, venue=None, starts_after=None, starts_before=None, available=False, sort='start_time',
+            after=None):
+    return _search_events_query(q, venue, starts_after, starts_before, available, sort, 25, after)
+
+
+async def test_keywords_use_search_vector_index(pool):
+    assert 'idx_events_search' in await _plan_indexes(pool, *_search(q='jazz festival'))
+    assert 'idx_events_search' in await _plan_indexes(pool, *_search(q='"jazz night"', sort='relevance'))
+
+
+async def test_start_time_range_uses_start_time_index(pool):
+    indexes = await _plan_indexes(pool, *_search(starts_after=NOW, starts_before=NOW + timedelta(days=7)))
+    assert indexes & {'idx_events_start_time_id', 'idx_events_start_time'}
+
+
+async def test_keyset_page_uses_start_time_index(pool):
+    indexes = await _plan_indexes(pool, *_search(after=(NOW, '00000000-0000-0000-0000-000000000000')))
+    assert 'idx_events_start_time_id' in indexes
+
+
+async def test_seats_left_uses_inventory_indexes(pool):
+    indexes = await _plan_indexes(pool, *_search(available=True))
+    assert {'idx_inventory_available', 'idx_inventory_sharded'} <= indexes
+
+
+async def test_venue_substring_uses_trigram_index(pool):
+    if await pool.fetchval("SELECT to_regclass('idx_events_venue_trgm')") is None:
+        pytest.skip('pg_trgm not installed')
+    assert 'idx_events_venue_trgm' in await _plan_indexes(pool, *_search(venue='arena'))
+
+
+async def test_facets_use_filter_indexes(pool):
+    assert 'idx_events_search' in await _plan_indexes(pool, *_event_search_facets_query(
+        'jazz', None, None, None, False))
+    indexes = await _plan_indexes(pool, *_event_search_facets_query(None, None, None, None, True))
+    assert {'idx_inventory_available', 'idx_inventory_sharded'} <= indexes
@@ -0,0 +1,36 @@
+import pytest
+
+from app.config import settings
+from app.crud import get_event
+from app.db import create_pool
+from app.statements import STATEMENTS
+
+pytestmark = pytest.mark.anyio
+
+
+async def _server_statements(pool) -> int:
+    async with pool.acquire() as conn:
+        return await conn.fetchval("SELECT count(*) FROM pg_prepared_statements")
+
+
+async def test_no_named_statements_without_cache(pool, make_event):
+    event_id = await make_event(capacity=3)
+    uncached = await create_pool(settings.DATABASE_URL, 1, 1, statement_cache_size=0)
+    try:
+        assert (await get_event(uncached, event_id))['seats_available'] == 3
+        assert await _server_statements(uncached) == 0
+    finally:
+        await uncached.close()
+
+
+async def test_registered_queries_prepared_when_connection_opens(pool, make_event):
+    event_id = await make_event(capacity=3)
+    cached = await create_pool(settings.DATABASE_URL, 1, 1, statement_cache_size=100)
+    try:
+        prepared = await _server_statements(cached)
+        assert prepared >= len(STATEMENTS)
+        await get_event(cached, event_id)
+        await get_event(cached, event_id)
+        assert await _server_statements(cached) == prepared
+    finally:
+        await cached.close()